@@ -0,0 +1,55 @@
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from managers.contact_cache import ContactCache
+from managers.contact_store import ContactStore
+
+SENDERS = 200_000
+CHECKPOINTS = 5
+
+
+def sender_stream(rng, count):
+    # Mostly new senders with a core of regulars who post again and again
+    regulars = [rng.randrange(10**9) for _ in range(2000)]
+    for _ in range(count):
+        yield rng.choice(regulars) if rng.random() < 0.3 else rng.randrange(10**9, 10**10)
+
+
+def dict_bytes(mapping):
+    total = sys.getsizeof(mapping)
+    for key, info in mapping.items():
+        total += sys.getsizeof(key) + sys.getsizeof(info) + sum(sys.getsizeof(v) for v in info.values())
+    return total
+
+
+def main():
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ContactStore(Path(tmp) / 'contacts.db')
+        cache = ContactCache(store, max_entries=5000, ttl=3600)
+        unbounded = {}  # The old contact_cache: a dict per user, never evicted
+
+        print(f"👥 {SENDERS} sender lookups (30% from 2000 regulars), cache of {cache.max_entries}")
+        print(f"{'lookups':>8} {'cache KB':>9} {'dict-of-dicts KB':>17} {'hit rate':>9} {'µs/lookup':>10}")
+        elapsed = 0.0
+        for i, user_id in enumerate(sender_stream(rng, SENDERS), 1):
+            tick = time.perf_counter()
+            if cache.get(user_id) is None:
+                cache.put(user_id, f"user{user_id}", f"First {user_id} Last")
+            elapsed += time.perf_counter() - tick
+            unbounded[user_id] = {'username': f"user{user_id}", 'full_name': f"First {user_id} Last",
+                                  'timestamp': time.time()}
+
+            if i % (SENDERS // CHECKPOINTS) == 0:
+                dict_kb = dict_bytes(unbounded) / 1024
+                print(f"{i:>8} {cache.memory_bytes() / 1024:>9.0f} {dict_kb:>17.0f} "
+                      f"{cache.stats()['hit_rate']:>9.1%} {elapsed / i * 1e6:>10.1f}")
+        print(f"📊 {cache.stats()}")
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
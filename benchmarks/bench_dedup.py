@@ -0,0 +1,99 @@
+import asyncio
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+os.environ.setdefault("API_ID", "0")  # config.py needs it; no Telegram connection is made
+
+from benchmarks.fake_telegram import FakeEvent, FakeMessage, FakeTelegramClient, synthetic_text
+from managers.checkpoint_manager import CheckpointManager
+from managers.contact_manager import ContactManager
+from managers.contact_store import ContactStore
+from managers.entity_cache import EntityCache
+from managers.id_set import CompactIdSet
+from pipeline.message_pipeline import MessagePipeline
+from pipeline.send_scheduler import SendScheduler
+
+CONTACTED = 300_000
+LOOKUPS = 200_000
+
+
+# --- Membership structures at a few hundred thousand contacted IDs ---
+def measure(name, build, ids, probes):
+    tracemalloc.start()
+    structure = build(int(str(user_id)) for user_id in ids)  # Fresh int objects, as when loaded from the store
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    hits = sum(1 for user_id in probes if user_id in structure)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {memory / 1e6:7.1f} MB  {elapsed / len(probes) * 1e9:6.0f} ns/lookup  ({hits} hits)")
+
+
+def bench_structures():
+    rng = random.Random(3)
+    ids = rng.sample(range(10**6, 8 * 10**9), CONTACTED)
+    hit_probes = rng.sample(ids, LOOKUPS // 5)
+    miss_probes = [rng.randrange(8 * 10**9, 9 * 10**9) for _ in range(LOOKUPS - len(hit_probes))]
+    probes = hit_probes + miss_probes
+    rng.shuffle(probes)
+
+    print(f"🔢 {CONTACTED} contacted IDs, {LOOKUPS} lookups (20% already contacted)")
+    measure("set()", set, ids, probes)
+    measure("CompactIdSet", CompactIdSet, ids, probes)
+    measure("CompactIdSet + Bloom (10b/id)", lambda v: CompactIdSet(v, bloom_bits=10 * CONTACTED), ids, probes)
+
+
+# --- Sender resolution: how many get_sender() round-trips the listener still pays for ---
+class CountingEvent(FakeEvent):
+    calls = 0
+
+    async def get_sender(self):
+        CountingEvent.calls += 1
+        return await super().get_sender()
+
+
+async def bench_listener(messages=2000, repeat_share=0.6, sender_latency=0.05):
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        client = FakeTelegramClient()
+        contact_manager = ContactManager(store=ContactStore(workdir / 'contacts.db'))
+        contacted = list(range(1, 5001))
+        for user_id in contacted:
+            contact_manager.add_messaged_user(user_id)
+
+        last_read = CheckpointManager(workdir / 'last_read.json', interval=1.0)
+        entity_cache = EntityCache(client, path=workdir / 'entities.json')
+        pipeline = MessagePipeline(client, SendScheduler(client), entity_cache, contact_manager, last_read)
+        # Ingest only: no classification workers, so the queue just has to hold everything
+        pipeline.ingest_queue = asyncio.Queue()
+
+        events = []
+        for i in range(messages):
+            sender_id = rng.choice(contacted) if rng.random() < repeat_share else 100_000 + i
+            events.append(CountingEvent(FakeMessage(i + 1, -100, sender_id, synthetic_text(rng)), sender_latency))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            await asyncio.gather(*(pipeline.handle_event(event) for event in events))
+            elapsed = time.perf_counter() - start
+
+        await last_read.close()
+        await entity_cache.close()
+
+    counters = pipeline.counters
+    print(f"📨 {messages} messages ({repeat_share:.0%} from contacted users), get_sender() {sender_latency * 1000:.0f} ms")
+    print(f"   deduplicated={counters['deduplicated']} keyword-rejected={counters['rejected']} "
+          f"queued={counters['submitted']} get_sender calls={CountingEvent.calls} in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    bench_structures()
+    asyncio.run(bench_listener())
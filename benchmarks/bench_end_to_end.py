@@ -0,0 +1,271 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("API_ID", "0")  # config.py needs it; no Telegram connection is made
+
+import classifier.llm_classifier as llm_classifier
+import classifier.model_classifier as model_classifier
+from benchmarks.fake_telegram import FakeTelegramClient, FakeEvent, FakeMessage, synthetic_text, load_corpus
+from benchmarks.llm_stubs import StubServer, stub_gemini, stub_gemini_batch
+from classifier.llm_classifier import (
+    build_router, openrouter_provider, build_batch_router, openrouter_batch_provider, LLMBatcher
+)
+from classifier.near_duplicates import NearDuplicateIndex
+from classifier.verdict_cache import VerdictCache
+from constants.keywords import GROUPS
+from managers.checkpoint_manager import CheckpointManager
+from managers.contact_manager import ContactManager
+from managers.contact_store import ContactStore
+from managers.entity_cache import EntityCache
+from on_start.get_last_messages import process_missed_messages, group_key_for
+from pipeline.message_pipeline import MessagePipeline, high_water_key
+from pipeline.send_scheduler import SendScheduler
+
+GROUP_KEYS = [int(group_key_for(group)) for group in GROUPS]
+
+
+# --- Measurement helpers ---
+class TimedPipeline(MessagePipeline):
+    # The real pipeline, plus receipt -> classified latency per message
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+
+    async def classify(self, job):
+        try:
+            return await super().classify(job)
+        finally:
+            self.latencies.append(time.monotonic() - job.received_at)
+
+
+class LoopLagMonitor:
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def __enter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+# --- Bot wiring with fakes in place of Telegram and the LLM providers ---
+class Bot:
+    def __init__(self, workdir, client, args):
+        self.client = client
+        self.contact_manager = ContactManager(store=ContactStore(workdir / 'contacts.db'))
+        self.last_read = CheckpointManager(workdir / 'last_read.json', interval=1.0)
+        self.entity_cache = EntityCache(client, path=workdir / 'entities.json')
+        self.send_scheduler = SendScheduler(client, global_rate=10_000, global_burst=10_000, per_chat_rate=10_000,
+                                            per_chat_burst=10_000)
+        self.pipeline = TimedPipeline(
+            client, self.send_scheduler, self.entity_cache, self.contact_manager, self.last_read,
+            classify_workers=llm_classifier.classify_worker_count(args.workers), queue_size=args.queue_size, dm_delay=(0, 0), notice_delay=(0, 0),
+            near_duplicates=None if args.no_near_dup else NearDuplicateIndex()
+        )
+
+    def start(self):
+        self.send_scheduler.start()
+        self.pipeline.start()
+
+    async def drain(self):
+        await self.pipeline.join()
+        while self.pipeline.pending_timers or self.pipeline.outreach_queue.qsize() or self.send_scheduler.queue_depth:
+            await asyncio.sleep(0.01)
+        await self.pipeline.outreach_queue.join()
+
+    async def stop(self):
+        await self.pipeline.stop()
+        await self.send_scheduler.stop()
+        await self.last_read.close()
+        await self.entity_cache.close()
+
+
+def corpus_iter(args, rng):
+    if args.corpus:
+        for row in load_corpus(args.corpus):
+            yield row.get('text') or '', row.get('sender_id'), row.get('chat_id')
+    while True:
+        yield synthetic_text(rng), None, None
+
+
+# --- Scenarios ---
+async def scenario_steady(bot, args, rng):
+    # Telethon spawns one handler task per update; do the same at a fixed arrival rate
+    corpus = corpus_iter(args, rng)
+    tasks = []
+    for i in range(args.messages):
+        text, sender_id, chat_id = next(corpus)
+        message = FakeMessage(i + 1, chat_id or rng.choice(GROUP_KEYS), sender_id or 10_000 + i, text)
+        tasks.append(asyncio.create_task(bot.pipeline.handle_event(FakeEvent(message, args.sender_latency))))
+        await asyncio.sleep(1 / args.rate)
+    await asyncio.gather(*tasks)
+    return args.messages
+
+
+async def scenario_burst(bot, args, rng):
+    # A handful of ads cross-posted (lightly edited) into every group at once, plus chatter
+    ads = rng.sample([synthetic_text(rng) for _ in range(200)], 30)
+    tasks = []
+    message_id = 0
+    for ad_index, ad in enumerate(ads):
+        same_sender = rng.random() < 0.5  # Half come from one recruiter, half from a ring of accounts
+        for group_index, chat_id in enumerate(GROUP_KEYS):
+            message_id += 1
+            sender_id = 20_000 + ad_index if same_sender else 30_000 + ad_index * 100 + group_index
+            text = ad + rng.choice(["", " 🔥", " !", "\n@recruiter"])
+            tasks.append(asyncio.create_task(
+                bot.pipeline.handle_event(FakeEvent(FakeMessage(message_id, chat_id, sender_id, text)))
+            ))
+    for _ in range(args.messages // 10):
+        message_id += 1
+        message = FakeMessage(message_id, rng.choice(GROUP_KEYS), 40_000 + message_id, synthetic_text(rng))
+        tasks.append(asyncio.create_task(bot.pipeline.handle_event(FakeEvent(message))))
+    await asyncio.gather(*tasks)
+    return message_id
+
+
+async def scenario_replay(bot, args, rng):
+    # Long outage: a backlog per group, resumed from the message-ID high-water mark
+    per_group = max(1, args.messages // len(GROUP_KEYS))
+    corpus = corpus_iter(args, rng)
+    sender = 50_000
+    for chat_id in GROUP_KEYS:
+        messages = []
+        for message_id in range(1, per_group + 1):
+            sender += 1
+            text, sender_id, _ = next(corpus)
+            messages.append(FakeMessage(message_id, chat_id, sender_id or sender, text))
+        bot.client.add_history(chat_id, messages)
+        bot.last_read[high_water_key(str(chat_id))] = 0
+    await process_missed_messages(bot.client, bot.last_read, bot.pipeline)
+    return per_group * len(GROUP_KEYS)
+
+
+SCENARIOS = {'steady': scenario_steady, 'burst': scenario_burst, 'replay': scenario_replay}
+
+
+def counted(call, tally, kind):
+    async def wrapper(payload):
+        tally[kind] += 1
+        return await call(payload)
+    return wrapper
+
+
+async def run_scenario(name, args, stub_url):
+    rng = random.Random(args.seed)
+    requests = {'single': 0, 'batch': 0}
+    llm_classifier.OPENROUTER_URL = stub_url
+    llm_classifier.llm_router = build_router({
+        "gemini": counted(stub_gemini(args.gemini_latency, fail_every=args.gemini_fail_every), requests, 'single'),
+        "stub/openrouter": counted(openrouter_provider("stub/openrouter"), requests, 'single'),
+    })
+    if args.llm_batch > 1:
+        llm_classifier.batch_router = build_batch_router({
+            "batch:gemini": counted(stub_gemini_batch(args.gemini_latency * 2, drop_every=args.batch_drop_every),
+                                    requests, 'batch'),
+            "batch:stub/openrouter": counted(openrouter_batch_provider("stub/openrouter"), requests, 'batch'),
+        })
+        llm_classifier.llm_batcher = LLMBatcher(max_batch=args.llm_batch, max_waiting=args.workers + args.llm_batch)
+    else:
+        llm_classifier.llm_batcher = None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        llm_classifier.verdict_cache = VerdictCache(workdir / 'verdicts.json')
+        client = FakeTelegramClient(page_latency=args.page_latency, send_latency=args.send_latency)
+        bot = Bot(workdir, client, args)
+        bot.start()
+
+        with LoopLagMonitor() as lag, contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            count = await SCENARIOS[name](bot, args, rng)
+            await bot.drain()
+            elapsed = time.perf_counter() - start
+
+        await bot.stop()
+        await llm_classifier.verdict_cache.close()
+
+    latencies = bot.pipeline.latencies
+    return {
+        'scenario': name,
+        'messages': count,
+        'classified': len(latencies),
+        'dms_sent': bot.pipeline.counters['sent'],
+        'near_duplicates': bot.pipeline.counters['near_duplicate'],
+        'llm_cache_hits': llm_classifier.verdict_cache.hits,
+        'llm_requests': requests['single'] + requests['batch'],
+        'llm_batch_requests': requests['batch'],
+        'elapsed_s': round(elapsed, 2),
+        'msg_per_s': round(count / elapsed, 1),
+        'classify_p50_ms': round(percentile(latencies, 0.5) * 1000, 1),
+        'classify_p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+        'loop_lag_p50_ms': round(percentile(lag.lags, 0.5) * 1000, 2),
+        'loop_lag_p99_ms': round(percentile(lag.lags, 0.99) * 1000, 2),
+        'loop_lag_max_ms': round(max(lag.lags, default=0) * 1000, 2),
+    }
+
+
+async def run(args):
+    model_classifier.load_models()
+    server = StubServer({"stub/openrouter": (args.openrouter_latency, 0)}).start()
+    try:
+        results = []
+        for name in (SCENARIOS if args.scenario == 'all' else [args.scenario]):
+            results.append(await run_scenario(name, args, server.url))
+            await llm_classifier.close_llm_clients()
+    finally:
+        server.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark with a fake Telegram client and stub LLMs")
+    parser.add_argument('--scenario', choices=['all', *SCENARIOS], default='all')
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--rate', type=float, default=500, help="steady scenario arrivals per second")
+    parser.add_argument('--workers', type=int, default=4, help="classify workers (batching adds --llm-batch more)")
+    parser.add_argument('--queue-size', type=int, default=200)
+    parser.add_argument('--gemini-latency', type=float, default=0.4)
+    parser.add_argument('--gemini-fail-every', type=int, default=0)
+    parser.add_argument('--openrouter-latency', type=float, default=0.6)
+    parser.add_argument('--llm-batch', type=int, default=1, help="messages per batched LLM request (1 = off)")
+    parser.add_argument('--batch-drop-every', type=int, default=0,
+                        help="stub batch replies leave out every n-th message (exercises the fallback)")
+    parser.add_argument('--sender-latency', type=float, default=0.0, help="simulated get_sender() round-trip")
+    parser.add_argument('--page-latency', type=float, default=0.05, help="simulated history page round-trip")
+    parser.add_argument('--send-latency', type=float, default=0.02)
+    parser.add_argument('--corpus', help="JSONL message export to use instead of the synthetic corpus")
+    parser.add_argument('--no-near-dup', action='store_true', help="classify cross-posted copies independently")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    for result in asyncio.run(run(args)):
+        print(f"🏁 {result.pop('scenario')}: " + ', '.join(f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == '__main__':
+    main()
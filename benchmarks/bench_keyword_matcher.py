@@ -0,0 +1,94 @@
+import random
+import time
+
+import classifier.keyword_classifier as keyword_classifier
+from classifier.keyword_matcher import KeywordMatcher, ahocorasick
+from constants.keywords import employer_keywords, freelancer_keywords, barred_keywords, KEYWORD_WORD_BOUNDARY
+
+CORPUS_SIZE = 100_000
+FILLER_WORDS = [
+    "hello", "team", "today", "update", "remote", "role", "please", "daily", "photo", "shop",
+    "graphic", "design", "manager", "assistant", "english", "hours", "weekly", "paid", "client",
+    "account", "chat", "group", "posting", "details", "below", "tasks", "experience", "skills",
+    "leading", "threaded", "jbl", "phone", "adapt",
+]
+
+
+# Reference: the original per-keyword substring scan
+def legacy_label_message_keywords(text):
+    text = text.lower()
+    if any(b in text for b in barred_keywords):
+        return 'barred'
+
+    employer_count = sum(1 for k in employer_keywords if k in text)
+    freelancer_count = sum(1 for k in freelancer_keywords if k in text)
+
+    if employer_count >= 2 and employer_count > freelancer_count:
+        return 'employer'
+    elif freelancer_count >= 2 and freelancer_count > employer_count:
+        return 'freelancer'
+    return 'unsure'
+
+
+def build_corpus(size, seed=42):
+    rng = random.Random(seed)
+    keywords = employer_keywords + freelancer_keywords + barred_keywords
+    corpus = []
+    for _ in range(size):
+        words = rng.choices(FILLER_WORDS, k=rng.randint(8, 60))
+        for _ in range(rng.randint(0, 4)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        text = ' '.join(words)
+        corpus.append(text.upper() if rng.random() < 0.1 else text.capitalize())
+    return corpus
+
+
+def timed(label_fn, corpus):
+    start = time.perf_counter()
+    labels = [label_fn(text) for text in corpus]
+    return labels, time.perf_counter() - start
+
+
+def main():
+    corpus = build_corpus(CORPUS_SIZE)
+    print(f"📦 Synthetic corpus: {len(corpus):,} messages")
+
+    legacy_labels, legacy_time = timed(legacy_label_message_keywords, corpus)
+    print(f"🐢 Substring scan:   {legacy_time:.2f}s ({len(corpus) / legacy_time:,.0f} msg/s)")
+
+    # Each backend through the real label function; 'regex' is what a default install runs
+    categories = {'barred': barred_keywords, 'employer': employer_keywords, 'freelancer': freelancer_keywords}
+    defaults = keyword_classifier.barred_matcher, keyword_classifier.keyword_matcher
+    for backend in ('regex', 'ahocorasick') if ahocorasick else ('regex',):
+        keyword_classifier.barred_matcher = KeywordMatcher({'barred': barred_keywords}, KEYWORD_WORD_BOUNDARY, backend)
+        keyword_classifier.keyword_matcher = KeywordMatcher(
+            {'employer': employer_keywords, 'freelancer': freelancer_keywords}, KEYWORD_WORD_BOUNDARY, backend
+        )
+        compiled_labels, compiled_time = timed(keyword_classifier.label_message_keywords, corpus)
+        print(f"⚡ Compiled matcher ({backend}): {compiled_time:.2f}s ({len(corpus) / compiled_time:,.0f} msg/s), "
+              f"{legacy_time / compiled_time:.1f}x")
+        mismatches = sum(1 for a, b in zip(legacy_labels, compiled_labels) if a != b)
+        if mismatches:
+            raise SystemExit(f"❌ {mismatches} labels differ from the substring scan ({backend})")
+    keyword_classifier.barred_matcher, keyword_classifier.keyword_matcher = defaults
+    if not ahocorasick:
+        print("ℹ️ pyahocorasick not installed; the regex backend is the one in use")
+    print("✅ Labels match the substring scan")
+
+    sample = [text.lower() for text in corpus[:10_000]]
+    for word_boundary in (False, True):
+        matchers = [KeywordMatcher(categories, word_boundary, backend) for backend in ('regex', 'ahocorasick')
+                    if backend == 'regex' or ahocorasick]
+        if any(m.find(text) != matchers[0].find(text) or (m.search(text) is None) != (matchers[0].search(text) is None)
+               for m in matchers[1:] for text in sample):
+            raise SystemExit(f"❌ Backends disagree (word_boundary={word_boundary})")
+
+    # Word-boundary mode intentionally differs; report how many messages it stops barring
+    bounded = KeywordMatcher(categories, word_boundary=True)
+    changed = sum(1 for text in sample if not bounded.count(text)['barred']
+                  and legacy_label_message_keywords(text) == 'barred')
+    print(f"🔤 Word-boundary mode un-bars {changed} of {len(sample):,} messages")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("API_ID", "0")  # config.py needs it; no Telegram connection is made
+
+import classifier.llm_classifier as llm_classifier
+from benchmarks.llm_stubs import StubServer
+from classifier.llm_classifier import build_router, openrouter_provider
+
+# Stub OpenRouter behaviour per model: (latency seconds, fail every n-th call or 0)
+STUB_MODELS = {
+    "stub/slow": (0.40, 0),
+    "stub/flaky": (0.05, 2),
+    "stub/fast": (0.08, 0),
+}
+REQUESTS = 60
+
+
+async def run(router):
+    winners = {}
+    start = time.perf_counter()
+    for i in range(REQUESTS):
+        provider, result = await router.classify(f"stub message {i}")
+        assert result is not None and result["label"] in llm_classifier.VALID_LABELS
+        winners[provider] = winners.get(provider, 0) + 1
+    elapsed = time.perf_counter() - start
+    await llm_classifier.close_llm_clients()
+    return winners, elapsed
+
+
+def main():
+    server = StubServer(STUB_MODELS).start()
+    llm_classifier.OPENROUTER_URL = server.url
+
+    try:
+        router = build_router({model: openrouter_provider(model) for model in STUB_MODELS})
+        winners, elapsed = asyncio.run(run(router))
+    finally:
+        server.shutdown()
+
+    print(f"📨 {REQUESTS} requests in {elapsed:.2f}s ({elapsed / REQUESTS * 1000:.0f} ms avg)")
+    print(f"🏆 Answered by: {winners}")
+    print(f"🛰️ Router stats: {json.dumps(router.stats(), indent=2)}")
+
+    # The fast, healthy model should end up carrying most of the traffic
+    if max(winners, key=winners.get) != "stub/fast":
+        raise SystemExit("❌ Router did not converge on the fastest healthy provider")
+    print("✅ Router converged on the fastest healthy provider")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import os
+import random
+import time
+
+os.environ.setdefault("API_ID", "0")  # config.py needs it; no Telegram connection is made
+
+from benchmarks.bench_end_to_end import LoopLagMonitor, percentile
+from benchmarks.fake_telegram import synthetic_text
+from classifier import offload
+from classifier.model_classifier import load_models, score_message_model_batched
+
+
+def corpus(count, long_share, seed=9):
+    # Replay-burst mix: mostly short posts, some very long ones (pasted job descriptions)
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        text = synthetic_text(rng)
+        if rng.random() < long_share:
+            text = ' '.join(synthetic_text(rng) for _ in range(40))
+        texts.append(text)
+    return texts
+
+
+async def classify(text):
+    label = await offload.label_keywords(text)
+    _, p_employer = await score_message_model_batched(text)  # Every message hits the model, to load it
+    return label, p_employer
+
+
+async def run_mode(mode, texts, workers):
+    offload.start(mode, workers)
+    if mode != 'inline':
+        await asyncio.gather(*(classify(text) for text in texts[:64]))  # Warm the pool
+
+    with LoopLagMonitor(interval=0.005) as lag:
+        start = time.perf_counter()
+        await asyncio.gather(*(classify(text) for text in texts))
+        elapsed = time.perf_counter() - start
+    offload.shutdown()
+
+    print(f"{mode:<8} {len(texts) / elapsed:>8.0f} msg/s   loop lag p50={percentile(lag.lags, 0.5) * 1000:6.2f} ms  "
+          f"p99={percentile(lag.lags, 0.99) * 1000:6.2f} ms  max={max(lag.lags, default=0) * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event-loop lag with the keyword/model tiers inline vs offloaded")
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--long-share', type=float, default=0.2)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    load_models()
+    texts = corpus(args.messages, args.long_share)
+    print(f"⚙️ {args.messages} messages ({args.long_share:.0%} long), keyword + model tiers, "
+          f"{args.workers} pool workers")
+    for mode in ('inline', 'thread', 'process'):
+        asyncio.run(run_mode(mode, texts, args.workers))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.fake_telegram import synthetic_text
+from benchmarks.llm_stubs import stub_verdict
+from classifier.model_classifier import score_messages_model, gate_model_score
+from classifier.online_model import OnlineModel
+
+MESSAGES = 20_000
+WINDOW = 2_000
+
+
+def noisy_text(rng):
+    # Synthetic posts plus made-up tokens, so the vocabulary keeps growing like real traffic
+    words = [f"tok{rng.randrange(10**6)}" for _ in range(rng.randrange(0, 6))]
+    return synthetic_text(rng) + " " + " ".join(words)
+
+
+def truth(text):
+    return 'employer' if stub_verdict(text)['label'] == 'employer' else 'freelancer'
+
+
+def main():
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        online = OnlineModel(path=Path(tmp) / 'online.pkl', min_samples=0, checkpoint_interval=0,
+                             baseline=lambda texts: [p for _, p in score_messages_model(texts)])
+        print(f"📈 Prequential run: {MESSAGES} messages, stub LLM verdicts as labels, windows of {WINDOW}")
+        print(f"{'seen':>7} {'static agree':>12} {'online agree':>12} {'online confident':>16} "
+              f"{'coef MB':>8} {'train ms/batch':>14} {'serving':>8}")
+
+        train_time = 0.0
+        for start in range(0, MESSAGES, WINDOW):
+            texts = [noisy_text(rng) for _ in range(WINDOW)]
+            labels = [truth(text) for text in texts]
+
+            static = score_messages_model(texts)
+            static_agree = sum(label == expected for (label, _), expected in zip(static, labels)) / WINDOW
+            if online.classifier is not None:
+                # Test-then-train: score the window before learning from it
+                scored = online.score(texts)
+                online_agree = sum(label == expected for (label, _), expected in zip(scored, labels)) / WINDOW
+                confident = sum(gate_model_score(p) != 'uncertain' for _, p in scored) / WINDOW
+                coef_mb = online.classifier.coef_.nbytes / 1e6
+            else:
+                online_agree = confident = coef_mb = 0.0
+
+            tick = time.perf_counter()
+            for text, label in zip(texts, labels):
+                online.learn(text, label)
+            train_time += time.perf_counter() - tick
+
+            print(f"{start:>7} {static_agree:>12.1%} {online_agree:>12.1%} {confident:>16.1%} "
+                  f"{coef_mb:>8.2f} {train_time / max(online.batches, 1) * 1000:>14.2f} "
+                  f"{'online' if online.ready else 'static':>8}")
+
+        online.save()
+        print(f"💾 Checkpoint: {(Path(tmp) / 'online.pkl').stat().st_size / 1e6:.2f} MB, {online.stats()}")
+
+
+if __name__ == '__main__':
+    main()
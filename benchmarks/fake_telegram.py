@@ -0,0 +1,133 @@
+import asyncio
+import datetime
+import json
+
+from telethon import utils
+from telethon.tl.types import User, Channel, Chat, ChatPhotoEmpty, PeerChannel, PeerChat
+
+# --- Synthetic corpus ---
+EMPLOYER_TEMPLATES = [
+    "We are hiring a remote virtual assistant! Requirements: good English, 4 hours daily. Salary weekly. DM to apply",
+    "Job opening: we're looking for a python developer. Must have Django experience. Send resume, compensation negotiable",
+    "Now hiring chat support VA, full training provided. Responsibilities include inbox management. Apply now",
+    "Need a graphic designer for ongoing work, requirements in the form, to apply fill out this form",
+]
+FREELANCER_TEMPLATES = [
+    "Hi, I'm an experienced VA available for hire, my skills include email and calendar management. Portfolio in bio",
+    "I offer web development services, proof of work available, can start immediately",
+    "Looking for work as a video editor, flexible schedule, let's connect",
+]
+CHATTER_TEMPLATES = [
+    "good morning everyone",
+    "anyone knows how payments work here?",
+    "thanks for the add",
+    "check the pinned message please",
+    "what time zone is this role in",
+]
+SPAM_TEMPLATES = [
+    "Unban your account fast, DM me",
+    "Buying instagram accounts, limited spots",
+]
+DECORATIONS = ["", " 🔥", " 🚀🚀", "!!", " ✅", "\n\n#hiring"]
+
+
+def synthetic_text(rng):
+    pool = rng.choices(
+        [EMPLOYER_TEMPLATES, FREELANCER_TEMPLATES, CHATTER_TEMPLATES, SPAM_TEMPLATES],
+        weights=[0.2, 0.25, 0.45, 0.1]
+    )[0]
+    return rng.choice(pool) + rng.choice(DECORATIONS)
+
+
+def load_corpus(path):
+    # JSONL export: one {"text": ..., "sender_id": ..., "chat_id": ..., "id": ...} per line
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+# --- Fake Telethon objects ---
+def fake_user(user_id):
+    return User(id=user_id, access_hash=user_id * 7 + 1, first_name=f"user{user_id}", username=f"user{user_id}")
+
+
+def fake_chat_entity(peer):
+    peer_id = utils.get_peer_id(peer)
+    real_id, peer_type = utils.resolve_id(peer_id)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    if peer_type is PeerChannel:
+        return Channel(id=real_id, title=f"group {peer_id}", photo=ChatPhotoEmpty(), date=now,
+                       access_hash=real_id * 3 + 1, megagroup=True)
+    if peer_type is PeerChat:
+        return Chat(id=real_id, title=f"group {peer_id}", photo=ChatPhotoEmpty(), participants_count=0, date=now,
+                    version=0)
+    return fake_user(real_id)
+
+
+class FakeMessage:
+    def __init__(self, message_id, chat_id, sender_id, text):
+        self.id = message_id
+        self.chat_id = chat_id
+        self.sender_id = sender_id
+        self.sender = fake_user(sender_id)
+        self.message = text
+        self.date = datetime.datetime.now(datetime.timezone.utc)
+
+    async def get_sender(self):
+        return self.sender
+
+
+class FakeEvent:
+    def __init__(self, message, sender_latency=0.0):
+        self.message = message
+        self.chat_id = message.chat_id
+        self.sender_id = message.sender_id
+        self.sender_latency = sender_latency
+
+    async def get_sender(self):
+        if self.sender_latency:
+            await asyncio.sleep(self.sender_latency)  # Simulated get_entity round-trip
+        return self.message.sender
+
+
+class FakeTelegramClient:
+    def __init__(self, my_id=1, send_latency=0.0, page_size=100, page_latency=0.0):
+        self.my_id = my_id
+        self.send_latency = send_latency
+        self.page_size = page_size
+        self.page_latency = page_latency
+        self.history = {}  # marked chat id -> [FakeMessage], oldest first
+        self.sent = []
+        self.get_entity_calls = 0
+
+    def add_history(self, chat_id, messages):
+        self.history.setdefault(chat_id, []).extend(messages)
+
+    async def get_me(self):
+        return fake_user(self.my_id)
+
+    async def get_entity(self, peer):
+        self.get_entity_calls += 1
+        return fake_chat_entity(peer)
+
+    async def send_message(self, entity, message, **kwargs):
+        if self.send_latency:
+            await asyncio.sleep(self.send_latency)
+        self.sent.append((entity, message))
+        return None
+
+    async def iter_messages(self, entity, min_id=None, offset_date=None, reverse=False, limit=None, wait_time=None):
+        messages = self.history.get(utils.get_peer_id(entity), [])
+        if min_id is not None:
+            messages = [m for m in messages if m.id > min_id]
+        if not reverse:
+            messages = messages[::-1]
+        if limit is not None:
+            messages = messages[:limit]
+        for start in range(0, len(messages), self.page_size):
+            if self.page_latency:
+                await asyncio.sleep(self.page_latency)  # One GetHistory round-trip per page
+            for message in messages[start:start + self.page_size]:
+                yield message
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def stub_verdict(message):
+    # Deterministic stand-in for the LLM's judgement
+    text = message.lower()
+    if "hiring" in text or "job opening" in text or "need a" in text:
+        return {"label": "employer", "reason": "stub: job post", "response": "Hey! I just saw your job posting."}
+    return {"label": "freelancer", "reason": "stub: not a job post", "response": ""}
+
+
+def stub_batch_verdicts(messages, drop_every=0):
+    # Indexed JSON-array reply; drop_every leaves out every n-th item, like a sloppy model
+    return [
+        {"index": i, **stub_verdict(message)}
+        for i, message in enumerate(messages)
+        if not (drop_every and (i + 1) % drop_every == 0)
+    ]
+
+
+def parse_batch_prompt(content):
+    # Inverse of llm_classifier.build_batch_prompt
+    return [json.loads(quoted) for quoted in re.findall(r'^\[\d+\] (".*")$', content, re.MULTILINE)]
+
+
+# --- Stub OpenRouter chat-completions endpoint on a local port ---
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, models, host="127.0.0.1", port=0):
+        # models: {model name: (latency seconds, fail every n-th call or 0)}
+        self.models = models
+        self.calls = {}
+        self.lock = threading.Lock()
+        super().__init__((host, port), StubOpenRouterHandler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/api/v1/chat/completions"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def handle_error(self, request, client_address):
+        pass  # Hedged requests that lost the race are dropped mid-flight by the client
+
+
+class StubOpenRouterHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        model = payload["models"][0]
+        latency, fail_every = self.server.models.get(model, (0.0, 0))
+        with self.server.lock:
+            self.server.calls[model] = count = self.server.calls.get(model, 0) + 1
+        time.sleep(latency)
+
+        if fail_every and count % fail_every == 0:
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        message = payload["messages"][-1]["content"]
+        if message.startswith("Messages:\n"):
+            verdict = stub_batch_verdicts(parse_batch_prompt(message))
+        else:
+            verdict = stub_verdict(message)
+        body = json.dumps({"choices": [{"message": {"content": json.dumps(verdict)}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def stub_gemini(latency=0.5, fail_every=0):
+    # Drop-in for classify_with_google: same signature, fixed latency, optional failures
+    calls = 0
+
+    async def classify(message):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(latency)
+        if fail_every and calls % fail_every == 0:
+            return None
+        return stub_verdict(message)
+
+    return classify
+
+
+def stub_gemini_batch(latency=0.8, drop_every=0):
+    # Drop-in for classify_batch_with_google
+    async def classify(messages):
+        await asyncio.sleep(latency)
+        return stub_batch_verdicts(messages, drop_every)
+
+    return classify
@@ -1,13 +1,26 @@
-from constants.keywords import employer_keywords, freelancer_keywords, barred_keywords
+from classifier.keyword_matcher import KeywordMatcher
+from constants.keywords import employer_keywords, freelancer_keywords, barred_keywords, KEYWORD_WORD_BOUNDARY
+
+# Compiled once at import. Barred keywords get their own matcher so a barred message stops at
+# the first hit (most spam does), and one pass over the rest yields both hit counts.
+barred_matcher = KeywordMatcher({'barred': barred_keywords}, word_boundary=KEYWORD_WORD_BOUNDARY)
+keyword_matcher = KeywordMatcher(
+    {
+        'employer': employer_keywords,
+        'freelancer': freelancer_keywords,
+    },
+    word_boundary=KEYWORD_WORD_BOUNDARY
+)
 
 
 def label_message_keywords(text):
     text = text.lower()
-    if any(b in text for b in barred_keywords):
+    if barred_matcher.search(text) is not None:
         return 'barred'
 
-    employer_count = sum(1 for k in employer_keywords if k in text)
-    freelancer_count = sum(1 for k in freelancer_keywords if k in text)
+    counts = keyword_matcher.count(text)
+    employer_count = counts['employer']
+    freelancer_count = counts['freelancer']
 
     if employer_count >= 2 and employer_count > freelancer_count:
         return 'employer'
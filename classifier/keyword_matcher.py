@@ -0,0 +1,136 @@
+import re
+
+try:
+    import ahocorasick  # pyahocorasick: C Aho-Corasick automaton, used when installed
+except ImportError:
+    ahocorasick = None
+
+
+# --- Single-pass keyword matcher compiled once over all keyword lists ---
+# Uses an Aho-Corasick automaton when pyahocorasick is available, otherwise a trie-shaped
+# regex searched from one match start to the next. Both report the distinct keywords found,
+# which is exactly what the old `k in text` scans counted; `search` stops at the first one,
+# like the old `any(k in text ...)` barred check.
+class KeywordMatcher:
+    def __init__(self, categories, word_boundary=False, backend=None):
+        self.word_boundary = word_boundary
+        self.categories = list(categories)
+        self._keyword_categories = {}
+
+        for category, keywords in categories.items():
+            for keyword in keywords:
+                # Text is lower-cased before matching, so upper-case entries ("PH", "DA") can
+                # only ever hit in word-boundary mode, where matching them is safe.
+                if word_boundary:
+                    keyword = keyword.lower()
+                self._keyword_categories.setdefault(keyword, set()).add(category)
+
+        if backend is None:
+            backend = 'ahocorasick' if ahocorasick else 'regex'
+        self.backend = backend
+
+        if backend == 'ahocorasick':
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self._keyword_categories:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+            self.find = self._find_automaton
+            self.search = self._search_automaton
+        else:
+            keywords = sorted(self._keyword_categories)
+            self._implied = {k: self._implied_keywords(k) for k in keywords}
+            prefix = r'(?<!\w)' if word_boundary else ''
+            # No lookahead wrapper: a leading alternation lets the regex engine skip ahead to
+            # possible first characters instead of probing every position
+            self._pattern = re.compile(prefix + self._trie_to_regex(self._build_trie(keywords)))
+            self.find = self._find_regex
+            self.search = self._search_regex
+
+    # --- Aho-Corasick backend ---
+    def _iter_automaton(self, text):
+        if not self.word_boundary:
+            for _, keyword in self._automaton.iter(text):
+                yield keyword
+            return
+
+        last = len(text) - 1
+        for end, keyword in self._automaton.iter(text):
+            start = end - len(keyword) + 1
+            if start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if end < last and _is_word_char(text[end + 1]):
+                continue
+            yield keyword
+
+    def _find_automaton(self, text):
+        if not self.word_boundary:
+            return {keyword for _, keyword in self._automaton.iter(text)}
+        return set(self._iter_automaton(text))
+
+    def _search_automaton(self, text):
+        return next(self._iter_automaton(text), None)
+
+    # --- Regex backend ---
+    @staticmethod
+    def _build_trie(keywords):
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = True
+        return trie
+
+    def _implied_keywords(self, keyword):
+        # A match for `keyword` at some position is also a match for every other keyword
+        # that is a prefix of it at that same position (e.g. "limited spot" / "limited spots").
+        implied = []
+        for other in self._keyword_categories:
+            if other != keyword and keyword.startswith(other):
+                if self.word_boundary and _is_word_char(keyword[len(other)]):
+                    continue
+                implied.append(other)
+        return implied
+
+    def _trie_to_regex(self, node):
+        terminal = '' in node
+        branches = [re.escape(char) + self._trie_to_regex(node[char]) for char in sorted(k for k in node if k)]
+        end = r'(?!\w)' if self.word_boundary else ''
+
+        if not branches:
+            return end
+
+        alternation = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if terminal:
+            # Longer keywords are tried first; shorter ones are recovered through `_implied`
+            return f'(?:{alternation}|{end})' if end else f'(?:{alternation})?'
+        return alternation
+
+    def _find_regex(self, text):
+        # The trie is greedy, so each match is the longest keyword starting there; restarting
+        # one character later (not at the match end) also finds keywords that overlap it
+        found = set()
+        search = self._pattern.search
+        match = search(text)
+        while match is not None:
+            keyword = match.group()
+            if keyword not in found:
+                found.add(keyword)
+                found.update(self._implied[keyword])
+            match = search(text, match.start() + 1)
+        return found
+
+    def _search_regex(self, text):
+        match = self._pattern.search(text)
+        return match.group() if match is not None else None
+
+    def count(self, text):
+        counts = dict.fromkeys(self.categories, 0)
+        for keyword in self.find(text):
+            for category in self._keyword_categories[keyword]:
+                counts[category] += 1
+        return counts
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
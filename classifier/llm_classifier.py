@@ -1,11 +1,20 @@
-import os
+import asyncio
 import json
 import re
 
 import httpx
-from config import open_router_api_key, gemini_api_key
-from google import genai
-from google.genai import types
+from config import open_router_api_key, gemini_api_key, worker_id
+from classifier.llm_router import LLMRouter
+from classifier.model_classifier import learn_from_verdict
+from classifier.verdict_cache import VerdictCache, VERDICT_CACHE_FILE
+from metrics import LLM_CACHE
+from pipeline.sharding import worker_path
+from constants.keywords import (
+    GEMINI_CONCURRENCY, GEMINI_TIMEOUT, LLM_CACHE_SIZE, LLM_CACHE_TTL, OPENROUTER_TIMEOUT,
+    LLM_CALL_TIMEOUT, LLM_HEDGE, LLM_CIRCUIT_FAILURES, LLM_CIRCUIT_COOLDOWN,
+    LLM_BATCH_SIZE, LLM_BATCH_DELAY, LLM_BATCH_MAX_CHARS, LLM_BATCH_TIMEOUT, CHECKPOINT_FLUSH_INTERVAL,
+    PIPELINE_CLASSIFY_WORKERS
+)
 
 OPENROUTER_API_KEY = open_router_api_key
 GEMINI_API_KEY = gemini_api_key
@@ -15,13 +24,15 @@ HEADERS = {
     "Content-Type": "application/json",
 }
 
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
 MODELS = [
     "mistralai/devstral-small:free",
     "google/gemma-3n-e4b-it:free",
     "nousresearch/deephermes-3-mistral-24b-preview:free"
 ]
 
-SYSTEM_PROMPT = """You are a Telegram bot assistant that classifies group messages about job posts.
+CRITERIA = """You are a Telegram bot assistant that classifies group messages about job posts.
 
 Your job is to label the sender as one of:
 - "employer": offering remote virtual assistant or technical/dev work
@@ -32,7 +43,9 @@ Your job is to label the sender as one of:
 
 You’re only interested in remote VA/dev roles, not team leads, sales, or region/language-specific (asides Nigeria) jobs.
 You can also make some exceptions to the criteria if it is dev/tech role.
+"""
 
+SYSTEM_PROMPT = CRITERIA + """
 Reply ONLY with a JSON object like:
 {
   "label": "employer|freelancer|spam|unclear|skip",
@@ -43,44 +56,96 @@ Reply ONLY with a JSON object like:
 Leave "response" empty unless label is "employer". Only respond if confident.
 """
 
-# --- PRIMARY: Google GenAI LLM ---
-def classify_with_google(message: str) -> dict | None:
-    try:
-        # Set up Gemini client
-        client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
-        model = "gemma-3-12b-it"
-
-        # Prepare the prompt
-        contents = [
-            types.Content(
-                role="user",
-                parts=[types.Part.from_text(
-                    text=f"{SYSTEM_PROMPT}\nMessage: \"{message.strip()}\"")]
-            )
-        ]
+BATCH_SYSTEM_PROMPT = CRITERIA + """
+You will get several numbered messages from different senders. Classify each one on its own.
+
+Reply ONLY with a JSON array holding one object per message, like:
+[
+  {
+    "index": 0,
+    "label": "employer|freelancer|spam|unclear|skip",
+    "reason": "brief reason",
+    "response": "Hey! I just saw your job posting and I'm really interested.[ If a keyword or trivia question is required, add a natural reply here. ]"
+  }
+]
+
+"index" is the message's number. Leave "response" empty unless label is "employer". Only respond if confident.
+"""
+
+GEMINI_MODEL = "gemma-3-12b-it"
+LLM_ERROR_REASON = "LLM error"
+VALID_LABELS = {"employer", "freelancer", "spam", "unclear", "skip"}
 
-        config = types.GenerateContentConfig(response_mime_type="text/plain")
+# Verdicts for cross-posted / reposted ads, keyed on normalized message text.
+# One file per worker, so workers don't overwrite each other's verdicts; all of them seed the cache.
+verdict_cache = VerdictCache(
+    worker_path(VERDICT_CACHE_FILE, worker_id), max_size=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL,
+    flush_interval=CHECKPOINT_FLUSH_INTERVAL, seed_pattern=VERDICT_CACHE_FILE.with_name('llm_verdicts*.json')
+)
 
-        # Generate response (non-streaming)
-        response = client.models.generate_content(
-            model=model,
-            contents=contents,
-            config=config
+# One long-lived Gemini client, created on first use (google.genai is slow to import)
+_gemini_client = None
+_gemini_types = None
+_gemini_semaphore = asyncio.Semaphore(GEMINI_CONCURRENCY)
+
+
+def _get_gemini_client():
+    global _gemini_client, _gemini_types
+    if _gemini_client is None:
+        from google import genai
+        from google.genai import types
+
+        _gemini_types = types
+        _gemini_client = genai.Client(api_key=GEMINI_API_KEY)
+    return _gemini_client, _gemini_types
+
+
+def extract_json(text: str) -> str:
+    # Attempt to extract JSON inside ```json ... ```
+    match = re.search(r"```json\s*(.*?)\s*```", text, re.DOTALL)
+    if match:
+        return match.group(1).strip()
+    # Try fallback: see if the whole response is just JSON
+    return text
+
+
+async def _generate_google(prompt: str, timeout: float) -> str:
+    client, types = _get_gemini_client()
+
+    # Prepare the prompt
+    contents = [
+        types.Content(
+            role="user",
+            parts=[types.Part.from_text(text=prompt)]
         )
+    ]
 
-        # Extract full text
-        full_response = response.text.strip()
+    config = types.GenerateContentConfig(response_mime_type="text/plain")
+
+    # Generate response (non-streaming) on the async client, so the event loop keeps
+    # serving Telegram updates; the semaphore caps concurrent Gemini calls.
+    async with _gemini_semaphore:
+        response = await asyncio.wait_for(
+            client.aio.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=contents,
+                config=config
+            ),
+            timeout=timeout
+        )
 
-        # Attempt to extract JSON inside ```json ... ```
-        match = re.search(r"```json\s*(.*?)\s*```", full_response, re.DOTALL)
-        if match:
-            json_text = match.group(1).strip()
-        else:
-            # Try fallback: see if the whole response is just JSON
-            json_text = full_response
+    # Extract full text
+    return response.text.strip()
+
+
+# --- PRIMARY: Google GenAI LLM ---
+async def classify_with_google(message: str, timeout: float = GEMINI_TIMEOUT) -> dict | None:
+    full_response = ""
+    try:
+        full_response = await _generate_google(f"{SYSTEM_PROMPT}\nMessage: \"{message.strip()}\"", timeout)
 
         # Attempt to parse
-        parsed = json.loads(json_text)
+        parsed = json.loads(extract_json(full_response))
 
         # Validate result (optional but useful)
         if not isinstance(parsed, dict) or "label" not in parsed:
@@ -88,6 +153,9 @@ def classify_with_google(message: str) -> dict | None:
 
         return parsed
 
+    except asyncio.TimeoutError:
+        print(f"⏱️ Google LLM timed out after {timeout}s")
+        return None
     except json.JSONDecodeError as e:
         print(f"⚠️ Google LLM JSON decode error: {e}")
         print(f"🪵 Raw text returned:\n---\n{full_response}\n---")
@@ -97,38 +165,270 @@ def classify_with_google(message: str) -> dict | None:
         return None
 
 
-# --- FALLBACK: OpenRouter LLM ---
-async def classify_with_openrouter(message: str) -> dict:
+# --- Shared OpenRouter HTTP client (connection pool, HTTP/2 when `h2` is installed) ---
+_http_client = None
+
+
+def _get_http_client():
+    global _http_client
+    if _http_client is None:
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        _http_client = httpx.AsyncClient(
+            http2=http2,
+            headers=HEADERS,
+            timeout=httpx.Timeout(OPENROUTER_TIMEOUT),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+        )
+    return _http_client
+
+
+async def close_llm_clients():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def _post_openrouter(models: list, system_prompt: str, user_content: str, max_tokens: int) -> str:
     payload = {
-        "models": MODELS,
+        "models": models,
         "temperature": 0.2,
-        "max_tokens": 300,
+        "max_tokens": max_tokens,
         "messages": [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": f"Message: \"{message.strip()}\""}
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content}
         ]
     }
 
+    response = await _get_http_client().post(OPENROUTER_URL, json=payload)
+    response.raise_for_status()
+    output = response.json()
+    return output["choices"][0]["message"]["content"]
+
+
+async def _request_openrouter(message: str, models: list) -> dict:
+    content = await _post_openrouter(models, SYSTEM_PROMPT, f"Message: \"{message.strip()}\"", 300)
+    return json.loads(content)
+
+
+def openrouter_provider(model: str):
+    # Single-model OpenRouter call, so the router can track each model separately
+    async def call(message: str) -> dict:
+        return await _request_openrouter(message, [model])
+    return call
+
+
+def is_valid_verdict(result) -> bool:
+    return isinstance(result, dict) and result.get("label") in VALID_LABELS
+
+
+def build_router(providers=None) -> LLMRouter:
+    if providers is None:
+        providers = {"gemini": classify_with_google}
+        providers.update({model: openrouter_provider(model) for model in MODELS})
+    return LLMRouter(
+        providers,
+        validate=is_valid_verdict,
+        hedge=LLM_HEDGE,
+        timeout=LLM_CALL_TIMEOUT,
+        failure_threshold=LLM_CIRCUIT_FAILURES,
+        cooldown=LLM_CIRCUIT_COOLDOWN,
+    )
+
+
+llm_router = build_router()
+
+
+# --- Batched requests: several pending messages share one prompt and one round-trip ---
+def build_batch_prompt(messages: list) -> str:
+    # JSON-quoted, so quotes and newlines inside a post can't blur the message boundaries
+    numbered = "\n".join(f"[{i}] {json.dumps(message.strip(), ensure_ascii=False)}" for i, message in enumerate(messages))
+    return f"Messages:\n{numbered}"
+
+
+async def classify_batch_with_google(messages: list, timeout: float = LLM_BATCH_TIMEOUT) -> list | None:
+    full_response = ""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=HEADERS,
-                json=payload
-            )
-            response.raise_for_status()
-            output = response.json()
-            content = output["choices"][0]["message"]["content"]
-            return json.loads(content)
+        full_response = await _generate_google(f"{BATCH_SYSTEM_PROMPT}\n{build_batch_prompt(messages)}", timeout)
+        return json.loads(extract_json(full_response))
+    except asyncio.TimeoutError:
+        print(f"⏱️ Google LLM batch timed out after {timeout}s")
+        return None
+    except json.JSONDecodeError as e:
+        print(f"⚠️ Google LLM batch JSON decode error: {e}")
+        return None
     except Exception as e:
-        print(f"❌ OpenRouter fallback also failed: {e}")
-        return {"label": "unclear", "reason": "LLM error", "response": ""}
+        print(f"⚠️ Google LLM batch failed: {e}")
+        return None
+
+
+def openrouter_batch_provider(model: str):
+    async def call(messages: list) -> list:
+        content = await _post_openrouter([model], BATCH_SYSTEM_PROMPT, build_batch_prompt(messages), 300 * len(messages))
+        return json.loads(extract_json(content))
+    return call
+
+
+def is_valid_batch(result) -> bool:
+    # Partial replies still count; parse_batch_verdicts decides per message
+    return isinstance(result, list) and any(is_valid_verdict(item) for item in result)
+
+
+def parse_batch_verdicts(result, count: int) -> dict:
+    # Indexed JSON array -> {index: verdict}; out-of-range, repeated or invalid entries are dropped
+    verdicts = {}
+    if not isinstance(result, list):
+        return verdicts
+    for item in result:
+        if not is_valid_verdict(item):
+            continue
+        index = item.get("index")
+        if type(index) is int and 0 <= index < count and index not in verdicts:
+            verdicts[index] = {key: value for key, value in item.items() if key != "index"}
+    return verdicts
+
+
+def build_batch_router(providers=None) -> LLMRouter:
+    # Own router (and health stats): batch latencies would skew the single-message hedge deadlines
+    if providers is None:
+        providers = {"batch:gemini": classify_batch_with_google}
+        providers.update({f"batch:{model}": openrouter_batch_provider(model) for model in MODELS})
+    return LLMRouter(
+        providers,
+        validate=is_valid_batch,
+        hedge=LLM_HEDGE,
+        timeout=LLM_BATCH_TIMEOUT,
+        failure_threshold=LLM_CIRCUIT_FAILURES,
+        cooldown=LLM_CIRCUIT_COOLDOWN,
+    )
+
+
+class LLMBatcher:
+    def __init__(self, max_batch=LLM_BATCH_SIZE, max_delay=LLM_BATCH_DELAY, max_chars=LLM_BATCH_MAX_CHARS,
+                 max_waiting=PIPELINE_CLASSIFY_WORKERS):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_chars = max_chars
+        # Each classify worker waits on one message, so a batch can never grow past the worker
+        # count; waiting for max_batch would make every batch sit out the full timer
+        self.target = min(max_batch, max_waiting)
+        self._pending = []
+        self._pending_chars = 0
+        self._timer = None
+        self._tasks = set()
+        self.batches = 0
+        self.batched_messages = 0
+        self.fallbacks = 0
+        self.oversized = 0
+
+    async def classify(self, message, flush=False):
+        # -> (provider, verdict | None), like LLMRouter.classify. flush: nothing else is queued
+        # behind this message, so send what is pending now instead of waiting for the timer
+        if len(message) > self.max_chars:
+            self.oversized += 1
+            return await llm_router.classify(message)
+        if self._pending_chars + len(message) > self.max_chars:
+            self._flush()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((message, future))
+        self._pending_chars += len(message)
+
+        if flush or len(self._pending) >= self.target:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending, self._pending_chars = self._pending, [], 0
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        try:
+            results = await self._classify_batch([message for message, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _classify_batch(self, messages):
+        verdicts, provider = {}, None
+        if len(messages) > 1:
+            self.batches += 1
+            self.batched_messages += len(messages)
+            provider, result = await batch_router.classify(messages)
+            verdicts = parse_batch_verdicts(result, len(messages))
+
+        # Anything the batch reply dropped or mangled (or a lone message) goes out on its own
+        missing = [i for i in range(len(messages)) if i not in verdicts]
+        if missing and len(messages) > 1:
+            self.fallbacks += len(missing)
+            print(f"🧩 Batch reply covered {len(verdicts)}/{len(messages)} messages; "
+                  f"retrying {len(missing)} one by one")
+        retried = await asyncio.gather(*(llm_router.classify(messages[i]) for i in missing))
+
+        results = [(provider, verdicts[i]) if i in verdicts else None for i in range(len(messages))]
+        for i, result in zip(missing, retried):
+            results[i] = result
+        return results
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'batched_messages': self.batched_messages,
+            'avg_batch': round(self.batched_messages / self.batches, 1) if self.batches else 0.0,
+            'fallbacks': self.fallbacks,
+            'oversized': self.oversized,
+        }
+
+
+def classify_worker_count(workers=PIPELINE_CLASSIFY_WORKERS):
+    # A batch parks up to LLM_BATCH_SIZE workers on one request; the extra workers keep the
+    # keyword/model tiers moving meanwhile, so batching doesn't cut classification throughput
+    return workers + (llm_batcher.max_batch if llm_batcher is not None else 0)
+
+
+batch_router = build_batch_router() if LLM_BATCH_SIZE > 1 else None
+llm_batcher = LLMBatcher(max_waiting=PIPELINE_CLASSIFY_WORKERS + LLM_BATCH_SIZE) if LLM_BATCH_SIZE > 1 else None
 
 
 # --- UNIFIED CLASSIFIER ---
-async def classify_message_llm(message: str) -> dict:
-    result = classify_with_google(message)
-    if result is None or result.get("label") not in {"employer", "freelancer", "spam", "unclear", "skip"}:
-        print("🔁 Falling back to OpenRouter...")
-        result = await classify_with_openrouter(message)
+async def classify_message_llm(message: str, flush: bool = False) -> dict:
+    cached = verdict_cache.get(message)
+    if cached is not None:
+        LLM_CACHE.labels('hit').inc()
+        print(f"🗃️ LLM verdict cache hit: {cached.get('label')}")
+        return cached
+    LLM_CACHE.labels('miss').inc()
+
+    if llm_batcher is not None:
+        provider, result = await llm_batcher.classify(message, flush=flush)
+    else:
+        provider, result = await llm_router.classify(message)
+    if result is None:
+        print("❌ All LLM providers failed")
+        return {"label": "unclear", "reason": LLM_ERROR_REASON, "response": ""}
+
+    print(f"🛰️ LLM verdict from {provider}")
+    verdict_cache.put(message, result)
+    learn_from_verdict(message, result)
     return result
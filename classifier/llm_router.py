@@ -0,0 +1,145 @@
+import asyncio
+import time
+from collections import deque
+
+from metrics import LLM_CALLS, LLM_FALLBACKS
+
+
+# --- Rolling health/latency stats + circuit breaker for one LLM provider ---
+class ProviderStats:
+    def __init__(self, name, call, window=50, failure_threshold=3, cooldown=300):
+        self.name = name
+        self.call = call
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+    def record(self, latency, ok):
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+            self.consecutive_failures = 0
+            self.opened_at = None
+        else:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    print(f"🚧 Circuit opened for {self.name} after {self.consecutive_failures} failures")
+                self.opened_at = time.monotonic()
+
+    def available(self):
+        # Closed, or open long enough to let a half-open trial request through
+        return self.opened_at is None or time.monotonic() - self.opened_at >= self.cooldown
+
+    def percentile(self, pct):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    @property
+    def error_rate(self):
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def score(self, timeout):
+        # Lower is better; providers with no samples yet score 0 so they get explored
+        p50 = self.percentile(0.5)
+        if p50 is None:
+            return 0.0 if not self.outcomes else timeout
+        return p50 + self.error_rate * timeout
+
+    def snapshot(self):
+        return {
+            'calls': len(self.outcomes),
+            'error_rate': round(self.error_rate, 3),
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'circuit': 'closed' if self.opened_at is None else ('half-open' if self.available() else 'open'),
+        }
+
+
+# --- Picks the fastest healthy provider, hedging with the runner-up past its p95 ---
+class LLMRouter:
+    def __init__(self, providers, validate, hedge=True, timeout=30, min_hedge_samples=5,
+                 failure_threshold=3, cooldown=300):
+        # providers: ordered {name: async fn(message) -> dict | None}; order breaks score ties
+        self.providers = [
+            ProviderStats(name, call, failure_threshold=failure_threshold, cooldown=cooldown)
+            for name, call in providers.items()
+        ]
+        self.validate = validate
+        self.hedge = hedge
+        self.timeout = timeout
+        self.min_hedge_samples = min_hedge_samples
+        self.hedged_requests = 0
+
+    def ranked(self):
+        healthy = [p for p in self.providers if p.available()] or list(self.providers)
+        return sorted(healthy, key=lambda p: p.score(self.timeout))
+
+    def _hedge_deadline(self, provider):
+        if not self.hedge or len(provider.latencies) < self.min_hedge_samples:
+            return None
+        return provider.percentile(0.95)
+
+    async def _timed_call(self, provider, message):
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(provider.call(message), timeout=self.timeout)
+        except asyncio.CancelledError:
+            LLM_CALLS.labels(provider.name, 'cancelled').inc()
+            raise  # Losing hedge: neither a success nor a failure
+        except asyncio.TimeoutError:
+            print(f"⏱️ {provider.name} timed out after {self.timeout}s")
+            result = None
+        except Exception as e:
+            print(f"⚠️ {provider.name} failed: {type(e).__name__} - {e}")
+            result = None
+
+        ok = result is not None and self.validate(result)
+        provider.record(time.monotonic() - start, ok)
+        LLM_CALLS.labels(provider.name, 'ok' if ok else 'error').inc()
+        return result if ok else None
+
+    async def classify(self, message):
+        candidates = self.ranked()
+        first_choice = candidates[0].name if candidates else None
+        in_flight = {}
+        try:
+            while candidates or in_flight:
+                if not in_flight:
+                    provider = candidates.pop(0)
+                    in_flight[asyncio.create_task(self._timed_call(provider, message))] = provider
+
+                hedge_after = None
+                if candidates and len(in_flight) == 1:
+                    hedge_after = self._hedge_deadline(next(iter(in_flight.values())))
+
+                done, _ = await asyncio.wait(in_flight, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    provider = candidates.pop(0)
+                    print(f"🏇 Hedging with {provider.name} after {hedge_after:.2f}s")
+                    self.hedged_requests += 1
+                    in_flight[asyncio.create_task(self._timed_call(provider, message))] = provider
+                    continue
+
+                for task in done:
+                    provider = in_flight.pop(task)
+                    result = task.result()
+                    if result is not None:
+                        if provider.name != first_choice:
+                            LLM_FALLBACKS.inc()
+                        return provider.name, result
+        finally:
+            for task in in_flight:
+                task.cancel()
+        return None, None
+
+    def stats(self):
+        return {
+            'hedged_requests': self.hedged_requests,
+            'providers': {p.name: p.snapshot() for p in self.providers},
+        }
@@ -1,9 +1,181 @@
-import joblib
+import asyncio
+import threading
+import time
 
-vectorizer = joblib.load('models/tfidf_vectorizer.pkl')
-model = joblib.load('models/message_classifier_model.pkl')
+from classifier import offload
+from constants.keywords import (
+    MODEL_BATCH_SIZE, MODEL_BATCH_DELAY, MODEL_EMPLOYER_THRESHOLD, MODEL_REJECT_THRESHOLD,
+    ONLINE_MODEL, ONLINE_N_FEATURES, ONLINE_BATCH_SIZE, ONLINE_MIN_SAMPLES, ONLINE_CHECKPOINT_INTERVAL,
+    ONLINE_HOLDOUT_EVERY, ONLINE_HOLDOUT_SIZE, ONLINE_MIN_HOLDOUT
+)
+
+VECTORIZER_PATH = 'models/tfidf_vectorizer.pkl'
+MODEL_PATH = 'models/message_classifier_model.pkl'
+
+vectorizer = None
+model = None
+model_load_time = None
+online_model = None  # OnlineModel when ONLINE_MODEL is on; serves the tier once it beats the static model
+online_model_path = None  # Set per worker by main.py (worker_path) so workers don't overwrite each other's model
+_load_lock = threading.Lock()
+
+
+def load_models():
+    # Loaded on first use (or warmed from a background thread) instead of at import.
+    # mmap_mode='r' maps the model arrays read-only so several bot processes share the pages.
+    global vectorizer, model, model_load_time, online_model
+    if model is not None:
+        return vectorizer, model
+
+    with _load_lock:
+        if model is None:
+            import joblib  # Pulls in scikit-learn, which is most of the load cost
+
+            start = time.perf_counter()
+            loaded_vectorizer = joblib.load(VECTORIZER_PATH, mmap_mode='r')
+            loaded_model = joblib.load(MODEL_PATH, mmap_mode='r')
+            vectorizer, model = loaded_vectorizer, loaded_model
+            model_load_time = time.perf_counter() - start
+            print(f"🧠 Loaded TF-IDF model in {model_load_time:.2f}s")
+
+            if ONLINE_MODEL and online_model is None:
+                from classifier.online_model import OnlineModel, ONLINE_MODEL_PATH
+
+                online_model = OnlineModel(
+                    path=online_model_path or ONLINE_MODEL_PATH,
+                    n_features=ONLINE_N_FEATURES,
+                    batch_size=ONLINE_BATCH_SIZE,
+                    min_samples=ONLINE_MIN_SAMPLES,
+                    checkpoint_interval=ONLINE_CHECKPOINT_INTERVAL,
+                    baseline=lambda texts: [p for _, p in _score_static(texts)],
+                    holdout_every=ONLINE_HOLDOUT_EVERY,
+                    holdout_size=ONLINE_HOLDOUT_SIZE,
+                    min_holdout=ONLINE_MIN_HOLDOUT
+                )
+    return vectorizer, model
 
 
 def classify_message_model(text):
-    vectorized = vectorizer.transform([text])
-    return model.predict(vectorized)[0]
+    return classify_messages_model([text])[0]
+
+
+def classify_messages_model(texts):
+    return [label for label, _ in score_messages_model(texts)]
+
+
+def score_messages_model(texts):
+    # One sparse transform + predict_proba for the whole batch -> [(label, p_employer)]
+    if not texts:
+        return []
+    load_models()
+    if online_model is not None and online_model.ready:
+        return online_model.score(texts)
+    return _score_static(texts)
+
+
+def _score_static(texts):
+    probabilities = model.predict_proba(vectorizer.transform(texts))
+    classes = list(model.classes_)
+    employer = classes.index('employer')
+    return [(classes[row.argmax()], float(row[employer])) for row in probabilities]
+
+
+def learn_from_verdict(text, verdict):
+    # Fresh (uncached) LLM verdicts become training data for the online model
+    if online_model is None:
+        return
+    label = verdict.get('label')
+    if label == 'employer':
+        online_model.learn(text, 'employer')
+    elif label in ('freelancer', 'spam', 'skip'):
+        online_model.learn(text, 'freelancer')  # The static model's non-employer class; 'unclear' is skipped
+
+
+def save_online_model():
+    if online_model is not None:
+        online_model.save()
+
+
+def gate_model_score(p_employer, employer_threshold=MODEL_EMPLOYER_THRESHOLD, reject_threshold=MODEL_REJECT_THRESHOLD):
+    # 'employer' / 'reject' when the model is confident, 'uncertain' for the band the LLM should settle
+    if p_employer >= employer_threshold:
+        return 'employer'
+    if p_employer < reject_threshold:
+        return 'reject'
+    return 'uncertain'
+
+
+# --- Micro-batcher: collects concurrent requests for a few ms, then predicts once ---
+class ModelBatcher:
+    def __init__(self, max_batch=MODEL_BATCH_SIZE, max_delay=MODEL_BATCH_DELAY):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending = []
+        self._timer = None
+
+    async def classify(self, text):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        texts = [text for text, _ in batch]
+        if offload.executor is not None:
+            # Predict off the loop; results are handed out when the worker finishes
+            offload.submit_model(texts).add_done_callback(lambda future: self._deliver(batch, future))
+            return
+
+        try:
+            scores = score_messages_model(texts)
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        self._resolve(batch, scores)
+
+    def _deliver(self, batch, future):
+        if future.cancelled():
+            self._fail(batch, asyncio.CancelledError())
+        elif future.exception() is not None:
+            self._fail(batch, future.exception())
+        else:
+            self._resolve(batch, future.result())
+
+    @staticmethod
+    def _fail(batch, error):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    @staticmethod
+    def _resolve(batch, scores):
+        for (_, future), score in zip(batch, scores):
+            if not future.done():
+                future.set_result(score)
+
+
+model_batcher = ModelBatcher()
+
+
+async def score_message_model_batched(text):
+    # (label, p_employer)
+    return await model_batcher.classify(text)
+
+
+async def classify_message_model_batched(text):
+    label, _ = await model_batcher.classify(text)
+    return label
@@ -0,0 +1,136 @@
+import hashlib
+import re
+import time
+from collections import deque
+
+import numpy as np
+
+from classifier.verdict_cache import normalize_message
+
+_URL = re.compile(r'(https?://|www\.|t\.me/)\S+')
+_HANDLE = re.compile(r'@\w+')
+_NUMBER = re.compile(r'\d+')
+_TOKEN = re.compile(r'\w+')
+
+
+def simhash_tokens(text):
+    # Links, handles and numbers are what cross-posted copies usually change
+    text = normalize_message(text)
+    text = _URL.sub(' url ', text)
+    text = _HANDLE.sub(' handle ', text)
+    text = _NUMBER.sub('0', text)
+    return _TOKEN.findall(text)
+
+
+def _feature_hash(feature):
+    # Stable across processes (unlike the salted hash()), so matches are reproducible
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'little')
+
+
+def simhash(tokens):
+    # 64-bit SimHash over word unigrams + bigrams
+    features = tokens + [a + ' ' + b for a, b in zip(tokens, tokens[1:])]
+    hashes = np.array([_feature_hash(feature) for feature in features], dtype=np.uint64)
+    bits = np.unpackbits(hashes.view(np.uint8), bitorder='little').reshape(-1, 64)
+    majority = bits.sum(axis=0, dtype=np.int32) * 2 > len(features)
+    return int(np.packbits(majority, bitorder='little').view(np.uint64)[0])
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class NearDuplicateEntry:
+    __slots__ = ('fingerprint', 'tokens', 'seen_at', 'decided', 'response', 'waiters', 'copies')
+
+    def __init__(self, fingerprint, tokens, seen_at):
+        self.fingerprint = fingerprint
+        self.tokens = tokens  # Masked token set, for confirming a SimHash match
+        self.seen_at = seen_at
+        self.decided = False
+        self.response = None  # DM text when the original was a confirmed employer, else None
+        self.waiters = []  # Copies that arrived while the original was still being classified
+        self.copies = 0
+
+
+# --- Sliding-window SimHash index: messages within max_distance bits of a recent one are
+# near-duplicates. Bands make lookups exact without a full scan: split 64 bits into
+# max_distance + 1 bands and any match must agree on at least one of them (pigeonhole).
+# A SimHash match only counts if the masked token sets also overlap by min_jaccard. ---
+class NearDuplicateIndex:
+    def __init__(self, max_distance=3, window=1800, max_entries=10000, min_tokens=12, min_jaccard=0.9):
+        self.max_distance = max_distance
+        self.window = window
+        self.max_entries = max_entries
+        self.min_tokens = min_tokens
+        self.min_jaccard = min_jaccard
+        self.band_count = max_distance + 1
+        self.band_bits = 64 // self.band_count
+        self._bands = [{} for _ in range(self.band_count)]  # band value -> {entries}
+        self._entries = deque()  # oldest first
+        self.lookups = 0
+        self.matches = 0
+
+    def fingerprint(self, text):
+        # -> (fingerprint, masked token set) or None
+        tokens = simhash_tokens(text)
+        if len(tokens) < self.min_tokens:
+            return None  # Too short to fingerprint reliably (and cheap to classify anyway)
+        return simhash(tokens), frozenset(tokens)
+
+    def _band_keys(self, fingerprint):
+        mask = (1 << self.band_bits) - 1
+        keys = [(fingerprint >> (i * self.band_bits)) & mask for i in range(self.band_count - 1)]
+        keys.append(fingerprint >> ((self.band_count - 1) * self.band_bits))  # Last band takes the leftover bits
+        return keys
+
+    def lookup(self, fingerprint, tokens):
+        self._evict(time.monotonic())
+        self.lookups += 1
+        best, best_distance = None, self.max_distance + 1
+        for band, key in zip(self._bands, self._band_keys(fingerprint)):
+            for entry in band.get(key, ()):
+                distance = (entry.fingerprint ^ fingerprint).bit_count()
+                if distance < best_distance and jaccard(entry.tokens, tokens) >= self.min_jaccard:
+                    best, best_distance = entry, distance
+        if best is not None:
+            self.matches += 1
+            best.copies += 1
+        return best
+
+    def add(self, fingerprint, tokens):
+        entry = NearDuplicateEntry(fingerprint, tokens, time.monotonic())
+        self._entries.append(entry)
+        for band, key in zip(self._bands, self._band_keys(fingerprint)):
+            band.setdefault(key, set()).add(entry)
+        return entry
+
+    def settle(self, entry, response, decided=True):
+        # Records the original's outcome and hands back the copies waiting on it. An undecided
+        # entry (the original was dropped before classification) leaves the index.
+        entry.decided = decided
+        entry.response = response
+        waiters, entry.waiters = entry.waiters, []
+        if not decided:
+            self._unlink(entry)
+        return waiters
+
+    def _unlink(self, entry):
+        for band, key in zip(self._bands, self._band_keys(entry.fingerprint)):
+            entries = band.get(key)
+            if entries is not None:
+                entries.discard(entry)
+                if not entries:
+                    del band[key]
+
+    def _evict(self, now):
+        entries = self._entries
+        while entries and (len(entries) > self.max_entries or now - entries[0].seen_at > self.window):
+            self._unlink(entries.popleft())
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'lookups': self.lookups,
+            'matches': self.matches,
+        }
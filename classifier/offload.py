@@ -0,0 +1,66 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from classifier.keyword_classifier import label_message_keywords
+
+# --- Optional executor for the CPU-bound tiers, so they don't stall the Telethon loop ---
+# 'inline' runs them on the loop (default), 'thread' in a thread pool, 'process' in a warm
+# process pool whose workers load the models with mmap_mode='r' (shared page cache).
+mode = 'inline'
+executor = None
+keyword_min_chars = 1000
+
+
+def _warm_worker():
+    from classifier import model_classifier
+    model_classifier.load_models()
+
+
+def _ping():
+    return True
+
+
+def start(selected_mode='inline', workers=2, min_chars=1000):
+    global mode, executor, keyword_min_chars
+    if executor is not None or selected_mode == 'inline':
+        return
+    if selected_mode == 'process':
+        # fork (where available) so workers don't re-import main.py; call this before the
+        # Telegram client starts its threads
+        context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_warm_worker)
+        for _ in range(workers):
+            executor.submit(_ping)  # Spawn every worker now, not on the first message
+    elif selected_mode == 'thread':
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='classify')
+    else:
+        raise ValueError(f"Unknown classification executor: {selected_mode}")
+    mode = selected_mode
+    keyword_min_chars = min_chars
+    print(f"🏭 Classification offloaded to a {mode} pool ({workers} workers)")
+
+
+def shutdown():
+    global executor, mode
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+        executor = None
+        mode = 'inline'
+
+
+async def label_keywords(text):
+    # Short messages are cheaper to match inline than to ship to a worker
+    if executor is None or len(text) < keyword_min_chars:
+        return label_message_keywords(text)
+    return await asyncio.get_running_loop().run_in_executor(executor, label_message_keywords, text)
+
+
+def submit_model(texts):
+    # -> asyncio future of [(label, p_employer)]
+    from classifier import model_classifier
+
+    target = executor
+    if mode == 'process' and model_classifier.online_model is not None:
+        target = None  # The online model trains in this process; score it on the default thread pool
+    return asyncio.get_running_loop().run_in_executor(target, model_classifier.score_messages_model, texts)
@@ -0,0 +1,190 @@
+import asyncio
+import copy
+import math
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+ONLINE_MODEL_PATH = Path('models/online_model.pkl')
+CLASSES = ['employer', 'freelancer']  # Same label set as the static TF-IDF model
+
+
+# --- Hashing vectorizer + SGD logistic regression, trained from LLM verdicts as they arrive ---
+# The vectorizer is stateless (fixed number of hashed features), so memory does not grow with
+# the vocabulary. Each batch is trained on a copy of the classifier in a worker thread and then
+# swapped in, so scoring never sees a half-updated model.
+# It only trains on verdicts for messages the gate sent to the LLM, a biased sample, so it takes
+# over the tier only while it beats the static model (log-loss) on a held-out slice of them.
+class OnlineModel:
+    def __init__(self, path=ONLINE_MODEL_PATH, n_features=2 ** 18, batch_size=16, min_samples=200,
+                 checkpoint_interval=600, baseline=None, holdout_every=5, holdout_size=200, min_holdout=50):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.path = Path(path)
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features, ngram_range=(1, 2), alternate_sign=False, lowercase=True
+        )
+        self.batch_size = batch_size
+        self.min_samples = min_samples
+        self.checkpoint_interval = checkpoint_interval
+        self.baseline = baseline  # texts -> [p_employer] from the static model, or None to skip validation
+        self.holdout_every = holdout_every  # Every n-th verdict is held out instead of trained on
+        self.holdout = deque(maxlen=holdout_size)
+        self.min_holdout = min_holdout
+        self.classifier = None
+        self.samples = 0
+        self.seen = 0
+        self.batches = 0
+        self.pending = []
+        self.validated = False
+        self.validation = None  # Latest {'online_log_loss', 'static_log_loss', 'holdout'}
+        self._training = False
+        self._lock = threading.Lock()  # One training/save at a time
+        self._saved_at = time.monotonic()
+        self._saved_samples = 0
+        self.load()
+
+    @property
+    def ready(self):
+        return self.validated
+
+    def load(self):
+        if not self.path.exists():
+            return
+        try:
+            import joblib
+
+            state = joblib.load(self.path)
+            if state.get('n_features') != self.vectorizer.n_features:
+                print(f"⚠️ Ignoring {self.path.name}: trained with a different feature count")
+                return
+            self.classifier = state['classifier']
+            self.samples = self._saved_samples = state['samples']
+            self.holdout.extend(tuple(example) for example in state.get('holdout', []))
+            self.validated = self._validate(self.classifier, list(self.holdout))
+            print(f"📈 Loaded online model ({self.samples} samples learned, "
+                  f"{'serving' if self.ready else 'static model serving'})")
+        except Exception as e:
+            print(f"⚠️ Could not load online model: {e}")
+
+    def score(self, texts):
+        classifier = self.classifier  # Snapshot: a swap mid-call can't mix two models
+        probabilities = classifier.predict_proba(self.vectorizer.transform(texts))
+        employer = list(classifier.classes_).index('employer')
+        return [('employer' if row[employer] >= 0.5 else 'freelancer', float(row[employer])) for row in probabilities]
+
+    def learn(self, text, label):
+        self.seen += 1
+        if self.holdout_every and self.seen % self.holdout_every == 0:
+            self.holdout.append((text, label))
+            return
+
+        self.pending.append((text, label))
+        if len(self.pending) >= self.batch_size and not self._training:
+            batch, self.pending = self.pending, []
+            holdout = list(self.holdout)  # Snapshot on the loop; learn() keeps appending
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._train(batch, holdout)  # No loop (scripts/tools): train inline
+                return
+            self._training = True
+            future = loop.run_in_executor(None, self._train, batch, holdout)
+            future.add_done_callback(self._trained)
+
+    def _trained(self, future):
+        self._training = False
+        if future.exception() is not None:
+            print(f"⚠️ Online model update failed: {future.exception()}")
+
+    def _train(self, batch, holdout=()):
+        from sklearn.linear_model import SGDClassifier
+
+        with self._lock:
+            texts = [text for text, _ in batch]
+            labels = [label for _, label in batch]
+            if self.classifier is None:
+                updated = SGDClassifier(loss='log_loss', alpha=1e-5, random_state=0)
+            else:
+                updated = copy.deepcopy(self.classifier)
+            updated.partial_fit(self.vectorizer.transform(texts), labels, classes=CLASSES)
+
+            was_ready = self.ready
+            self.classifier = updated  # Hot swap
+            self.samples += len(batch)
+            self.batches += 1
+            self.validated = self._validate(updated, holdout)
+            if self.ready and not was_ready:
+                print(f"📈 Online model took over the model tier after {self.samples} samples: {self.validation}")
+            elif was_ready and not self.ready:
+                print(f"📉 Online model fell behind the static model, handing the tier back: {self.validation}")
+
+            if time.monotonic() - self._saved_at >= self.checkpoint_interval:
+                self._save()
+
+    def _validate(self, classifier, holdout):
+        # True when `classifier` may serve: enough training samples and, with a baseline, a
+        # log-loss on the held-out verdicts no worse than the static model's
+        if classifier is None or self.samples < self.min_samples:
+            return False
+        if self.baseline is None:
+            return True
+        if len(holdout) < self.min_holdout:
+            return False
+
+        texts = [text for text, _ in holdout]
+        truth = [label == 'employer' for _, label in holdout]
+        employer = list(classifier.classes_).index('employer')
+        online = classifier.predict_proba(self.vectorizer.transform(texts))[:, employer]
+        self.validation = {
+            'online_log_loss': round(log_loss(truth, online), 4),
+            'static_log_loss': round(log_loss(truth, self.baseline(texts)), 4),
+            'holdout': len(holdout),
+        }
+        return self.validation['online_log_loss'] <= self.validation['static_log_loss']
+
+    def _save(self):
+        if self.classifier is None or self.samples == self._saved_samples:
+            return
+        import joblib
+
+        self.path.parent.mkdir(exist_ok=True)
+        tmp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+        joblib.dump(
+            {'classifier': self.classifier, 'samples': self.samples, 'n_features': self.vectorizer.n_features,
+             'holdout': list(self.holdout)},
+            tmp_path
+        )
+        os.replace(tmp_path, self.path)
+        self._saved_at = time.monotonic()
+        self._saved_samples = self.samples
+
+    def save(self):
+        # Unsaved partial batches are dropped; they are a few verdicts at most
+        with self._lock:
+            try:
+                self._save()
+            except Exception as e:
+                print(f"⚠️ Could not save online model: {e}")
+
+    def stats(self):
+        return {
+            'ready': self.ready,
+            'samples': self.samples,
+            'batches': self.batches,
+            'pending': len(self.pending),
+            'holdout': len(self.holdout),
+            'validation': self.validation,
+            'features': self.vectorizer.n_features,
+        }
+
+
+def log_loss(truth, p_employer, eps=1e-6):
+    # Mean binary cross-entropy; truth: is-employer flags
+    total = 0.0
+    for is_employer, p in zip(truth, p_employer):
+        p = min(max(float(p), eps), 1 - eps)
+        total -= math.log(p if is_employer else 1 - p)
+    return total / len(truth) if truth else 0.0
@@ -0,0 +1,104 @@
+import glob
+import hashlib
+import json
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+from managers.checkpoint_manager import WriteBehindFile
+
+DATA_DIR = Path('data')
+VERDICT_CACHE_FILE = DATA_DIR / 'llm_verdicts.json'
+
+# Emoji, pictographs, modifiers, joiners and variation selectors
+_IGNORED_CATEGORIES = {'So', 'Sk', 'Cf', 'Cs', 'Co', 'Mn'}
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_message(text):
+    text = unicodedata.normalize('NFKC', text).lower()
+    text = ''.join(c for c in text if unicodedata.category(c) not in _IGNORED_CATEGORIES)
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def message_key(text):
+    return hashlib.sha1(normalize_message(text).encode('utf-8')).hexdigest()
+
+
+# --- LRU + TTL cache of LLM verdicts, persisted across restarts (written behind, off the loop) ---
+# Each worker writes its own file (worker_path); `seed_pattern` also loads the other workers' verdicts.
+class VerdictCache(WriteBehindFile):
+    def __init__(self, path=VERDICT_CACHE_FILE, max_size=5000, ttl=7 * 24 * 3600, flush_interval=5.0,
+                 seed_pattern=None):
+        super().__init__(path, interval=flush_interval)
+        self.seed_pattern = seed_pattern
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (timestamp, verdict), oldest first
+        self.hits = 0
+        self.misses = 0
+        self.load_from_disk()
+
+    def get(self, text):
+        key = message_key(text)
+        entry = self.entries.get(key)
+        if entry is None or time.time() - entry[0] > self.ttl:
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return dict(entry[1])
+
+    def put(self, text, verdict):
+        key = message_key(text)
+        self.entries[key] = (time.time(), {
+            'label': verdict.get('label'),
+            'reason': verdict.get('reason', ''),
+            'response': verdict.get('response', ''),
+        })
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        self.mark_dirty()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def load_from_disk(self):
+        paths = [self.path]
+        if self.seed_pattern is not None:
+            paths += [Path(other) for other in sorted(glob.glob(str(self.seed_pattern))) if Path(other) != self.path]
+
+        # Same message verdicted by several workers: the newest verdict wins
+        merged = {}
+        now = time.time()
+        for path in paths:
+            try:
+                if path.exists():
+                    with open(path, 'r', encoding='utf-8') as f:
+                        rows = json.load(f)
+                    for key, timestamp, verdict in rows:
+                        if now - timestamp <= self.ttl and timestamp > merged.get(key, (0,))[0]:
+                            merged[key] = (timestamp, verdict)
+            except Exception as e:
+                print(f"⚠️ Error loading LLM verdict cache {path.name}: {e}")
+
+        for key, entry in sorted(merged.items(), key=lambda item: item[1][0]):
+            self.entries[key] = entry
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def snapshot(self):
+        # Verdicts are never mutated in place, so a shallow copy is enough
+        return [[key, ts, verdict] for key, (ts, verdict) in self.entries.items()]
@@ -7,4 +7,9 @@ api_id = int(os.getenv("API_ID"))
 api_hash = os.getenv("API_HASH")
 session_name = os.getenv("SESSION_NAME", "anon")  # Default to "anon" if not set
 open_router_api_key = os.getenv("OPENROUTER_API_KEY")
-gemini_api_key = os.getenv("GEMINI_API_KEY")
\ No newline at end of file
+gemini_api_key = os.getenv("GEMINI_API_KEY")
+
+# Set by supervisor.py for each worker process; unset when running a single bot
+worker_id = os.getenv("WORKER_ID")
+worker_index = int(os.getenv("WORKER_INDEX", "0"))
+worker_groups = os.getenv("WORKER_GROUPS")
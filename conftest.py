@@ -0,0 +1,3 @@
+import os
+
+os.environ.setdefault("API_ID", "0")  # config.py needs it; tests never connect to Telegram
@@ -37,5 +37,146 @@ barred_keywords = [
     "dating", "tinder", "grindr", "bumble", "DA", "IG"
 ]
 
-GROUP_MESSAGE_INTERVAL = 3600  # Time between full rounds (e.g., 1 hour)
-PER_GROUP_DELAY = 10
+# Match keywords only as whole words/phrases, so short entries like "jb" or "da" stop firing
+# inside unrelated words. Off by default to keep labels identical to the substring matcher.
+KEYWORD_WORD_BOUNDARY = False
+
+# TF-IDF micro-batching: flush after this many queued messages or this many seconds
+MODEL_BATCH_SIZE = 32
+MODEL_BATCH_DELAY = 0.005
+
+# Gemini: max concurrent requests and per-call deadline (seconds) before falling back
+GEMINI_CONCURRENCY = 4
+GEMINI_TIMEOUT = 20
+
+# LLM verdict cache: max entries and time-to-live (seconds)
+LLM_CACHE_SIZE = 5000
+LLM_CACHE_TTL = 7 * 24 * 3600
+
+# LLM provider routing: per-call deadline, hedging past a provider's p95 latency, and the
+# circuit breaker (consecutive failures before a provider is skipped, cooldown in seconds)
+OPENROUTER_TIMEOUT = 30
+LLM_CALL_TIMEOUT = 30
+LLM_HEDGE = True
+LLM_CIRCUIT_FAILURES = 3
+LLM_CIRCUIT_COOLDOWN = 300
+
+# Batched LLM requests: up to LLM_BATCH_SIZE candidates (LLM_BATCH_MAX_CHARS of text in total)
+# waiting at most LLM_BATCH_DELAY seconds share one request and are answered with an indexed
+# JSON array; anything missing from the reply is retried per message. 1 disables batching.
+# A batch is also sent once every classify worker is waiting on it, or when the ingest queue
+# is empty. With LLM_HEDGE a slow batch is re-sent whole to a second provider.
+LLM_BATCH_SIZE = 1
+LLM_BATCH_DELAY = 0.5
+LLM_BATCH_MAX_CHARS = 6000
+LLM_BATCH_TIMEOUT = 60
+
+# Seconds to coalesce last_read checkpoint updates before writing them to disk
+CHECKPOINT_FLUSH_INTERVAL = 5
+
+# Message pipeline: classification/outreach worker counts and ingest queue bound (backpressure)
+PIPELINE_CLASSIFY_WORKERS = 4
+PIPELINE_OUTREACH_WORKERS = 2
+PIPELINE_QUEUE_SIZE = 200
+
+# Outbound send scheduler: global and per-chat token buckets (messages/second, burst size)
+# and how many times a send is retried after a FloodWait
+SEND_GLOBAL_RATE = 1.0
+SEND_GLOBAL_BURST = 3
+SEND_PER_CHAT_RATE = 0.2
+SEND_PER_CHAT_BURST = 2
+SEND_MAX_RETRIES = 3
+
+# Missed-message replay: groups fetched concurrently, and max messages replayed per group
+REPLAY_CONCURRENCY = 4
+REPLAY_MAX_MESSAGES = 1000
+# Seconds of history replayed for a group re-enabled at runtime; older posts (stale ads) are skipped
+REPLAY_MAX_AGE = 6 * 3600
+
+# Seconds before a cached peer access hash is refreshed from Telegram
+ENTITY_CACHE_TTL = 7 * 24 * 3600
+
+# Local Prometheus endpoint (0 disables it) and seconds between summary log lines
+METRICS_PORT = 9464
+METRICS_LOG_INTERVAL = 300
+
+PER_GROUP_DELAY = 10  # Stagger between first-ever broadcasts to each group
+
+# Per-group broadcast schedule: interval between pitches, random jitter added to each,
+# and back-off for failed sends (doubles per retry, then waits for the next interval)
+BROADCAST_INTERVAL = 24 * 3600
+BROADCAST_JITTER = 1800
+BROADCAST_RETRY_DELAY = 600
+BROADCAST_MAX_RETRIES = 3
+
+# Multi-process mode (supervisor.py): seconds before a worker's processing claim on a sender
+# expires (crashed worker), restart back-off, restarts allowed per window before the worker is
+# declared dead and its groups are rebalanced, and seconds before a dead worker is retried
+CLAIM_TTL = 1800
+SUPERVISOR_RESTART_DELAY = 5
+SUPERVISOR_MAX_RESTARTS = 3
+SUPERVISOR_RESTART_WINDOW = 300
+SUPERVISOR_REVIVE_AFTER = 1800
+
+# Bloom filter size (bits) in front of the messaged-users ID set; 0 disables it.
+# ~10 bits per contacted user keeps false positives around 1%.
+DEDUP_BLOOM_BITS = 0
+
+# Model tier gate on P(employer) for messages the keyword tier is unsure about:
+# below MODEL_REJECT_THRESHOLD the message is dropped without an LLM call (0.5 = plain predict),
+# at or above MODEL_EMPLOYER_THRESHOLD it counts as a confident employer, and the band in between
+# goes to the LLM. Confident employers only skip the LLM when MODEL_SKIP_LLM_ON_EMPLOYER is set;
+# they are then DM'd with a private pitch instead of an LLM-written reply.
+# Tune with: python evaluate_gate.py labelled_export.jsonl
+MODEL_EMPLOYER_THRESHOLD = 0.9
+MODEL_REJECT_THRESHOLD = 0.5
+MODEL_SKIP_LLM_ON_EMPLOYER = False
+
+# Online model tier: a hashing-vectorizer SGD model trained from fresh LLM verdicts
+# (ONLINE_BATCH_SIZE at a time); checkpointed to models/online_model.pkl every
+# ONLINE_CHECKPOINT_INTERVAL seconds. Memory is fixed by ONLINE_N_FEATURES. Every
+# ONLINE_HOLDOUT_EVERY-th verdict is held out (the last ONLINE_HOLDOUT_SIZE are kept), and the
+# online model replaces the static TF-IDF model only after ONLINE_MIN_SAMPLES training samples
+# and while its log-loss on at least ONLINE_MIN_HOLDOUT held-out verdicts is no worse.
+ONLINE_MODEL = False
+ONLINE_N_FEATURES = 2 ** 18
+ONLINE_BATCH_SIZE = 16
+ONLINE_MIN_SAMPLES = 200
+ONLINE_CHECKPOINT_INTERVAL = 600
+ONLINE_HOLDOUT_EVERY = 5
+ONLINE_HOLDOUT_SIZE = 200
+ONLINE_MIN_HOLDOUT = 50
+
+# Near-duplicate suppression at ingest: messages within NEAR_DUP_DISTANCE bits (SimHash, 64-bit)
+# of one seen in the last NEAR_DUP_WINDOW seconds, whose masked word sets (links, handles and
+# numbers masked) overlap by at least NEAR_DUP_MIN_JACCARD, inherit its decision; an employer DM
+# is only inherited by exact copies up to those masked tokens. 0 disables the index.
+# Messages with fewer than NEAR_DUP_MIN_TOKENS words are always classified on their own.
+NEAR_DUP_DISTANCE = 3
+NEAR_DUP_WINDOW = 1800
+NEAR_DUP_MAX_ENTRIES = 10000
+NEAR_DUP_MIN_TOKENS = 12
+NEAR_DUP_MIN_JACCARD = 0.9
+
+# Where the keyword and model tiers run: 'inline' (on the event loop), 'thread' or 'process'
+# (warm pool, models memory-mapped per worker). Only messages of at least
+# CLASSIFY_OFFLOAD_MIN_CHARS characters ship their keyword pass to the pool.
+CLASSIFY_EXECUTOR = 'inline'
+CLASSIFY_EXECUTOR_WORKERS = 2
+CLASSIFY_OFFLOAD_MIN_CHARS = 1000
+
+# In-memory contact cache (LRU): at most CONTACT_CACHE_SIZE records, each trusted for
+# CONTACT_CACHE_TTL seconds; everything else lives only in the contact store.
+CONTACT_CACHE_SIZE = 5000
+CONTACT_CACHE_TTL = 3600
+
+# Group registry (data/groups.json). GROUPS above is always monitored; the bot also syncs its
+# dialogs every GROUP_DISCOVERY_INTERVAL seconds (0 disables), paging only dialogs active since
+# the last sync, with a full pass every GROUP_DISCOVERY_FULL_INTERVAL to notice groups it left.
+# New groups are recorded disabled; set "enabled": true to monitor one. With
+# GROUP_DISCOVERY_AUTO_MONITOR, groups joined after the first sync are monitored right away.
+# Hand edits to the file ("enabled": true/false) are picked up within GROUP_REGISTRY_POLL seconds.
+GROUP_DISCOVERY_INTERVAL = 600
+GROUP_DISCOVERY_FULL_INTERVAL = 24 * 3600
+GROUP_DISCOVERY_AUTO_MONITOR = False
+GROUP_REGISTRY_POLL = 30
@@ -0,0 +1,109 @@
+import argparse
+import time
+
+from classifier.keyword_classifier import label_message_keywords
+from classifier.model_classifier import score_messages_model, load_models
+from shadow import read_export, chunked
+
+# Threshold report for the model tier's confidence gate on a labelled export:
+#
+#   python evaluate_gate.py labelled_export.jsonl [--llm-latency 1.5]
+#
+# Each line needs "text" and a ground-truth "label". For each (reject, employer) threshold pair
+# it shows how many messages would still go to the LLM, the LLM time that costs, and the
+# precision/recall of the resulting DMs. The LLM is assumed to agree with the ground truth, so
+# every error in the report comes from the keyword/model tiers skipping it.
+
+REJECT_THRESHOLDS = (0.2, 0.3, 0.4, 0.5, 0.6)
+EMPLOYER_THRESHOLDS = (0.8, 0.9, 0.95, 0.99, None)  # None: confident employers still go to the LLM
+
+
+def load_scored(path, chunk_size):
+    rows = []
+    for chunk in chunked((row for row in read_export(path) if row.get('label')), chunk_size):
+        texts = [row['text'] for row in chunk]
+        keyword_labels = [label_message_keywords(text) for text in texts]
+        unsure = [text for text, label in zip(texts, keyword_labels) if label == 'unsure']
+        scores = iter(score_messages_model(unsure))
+        for row, keyword_label in zip(chunk, keyword_labels):
+            p_employer = next(scores)[1] if keyword_label == 'unsure' else None
+            rows.append((keyword_label, p_employer, row['label'] == 'employer'))
+    return rows
+
+
+def evaluate(rows, reject_threshold, employer_threshold):
+    llm_calls = dm_true = dm_false = 0
+    employers = sum(1 for _, _, is_employer in rows if is_employer)
+    for keyword_label, p_employer, is_employer in rows:
+        if keyword_label == 'employer':
+            llm_calls += 1
+            dm_true += is_employer  # The LLM settles it
+        elif keyword_label == 'unsure':
+            if p_employer < reject_threshold:
+                continue
+            if employer_threshold is not None and p_employer >= employer_threshold:
+                dm_true += is_employer  # DM'd straight from the model
+                dm_false += not is_employer
+            else:
+                llm_calls += 1
+                dm_true += is_employer
+    dms = dm_true + dm_false
+    return {
+        'llm_calls': llm_calls,
+        'precision': dm_true / dms if dms else 1.0,
+        'recall': dm_true / employers if employers else 1.0,
+    }
+
+
+def calibration(rows, bins=10):
+    # Observed employer rate per predicted-probability bin (model tier messages only)
+    buckets = [[0, 0] for _ in range(bins)]
+    for _, p_employer, is_employer in rows:
+        if p_employer is None:
+            continue
+        bucket = buckets[min(bins - 1, int(p_employer * bins))]
+        bucket[0] += 1
+        bucket[1] += is_employer
+    return [(i / bins, (i + 1) / bins, count, employers / count if count else None)
+            for i, (count, employers) in enumerate(buckets)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trade-off report for the model tier's confidence thresholds")
+    parser.add_argument('export', help="labelled JSONL export ('-' for stdin)")
+    parser.add_argument('--llm-latency', type=float, default=1.5, help="mean seconds per LLM verdict")
+    parser.add_argument('--chunk-size', type=int, default=4096)
+    args = parser.parse_args()
+
+    load_models()
+    start = time.perf_counter()
+    rows = load_scored(args.export, args.chunk_size)
+    if not rows:
+        print("⚠️ No labelled messages in the export")
+        return
+    model_rows = sum(1 for _, p, _ in rows if p is not None)
+    print(f"📊 {len(rows)} labelled messages scored in {time.perf_counter() - start:.2f}s "
+          f"({model_rows} reach the model tier)")
+
+    print("\n🎚️ Calibration (model tier): predicted P(employer) vs observed")
+    for low, high, count, observed in calibration(rows):
+        if count:
+            print(f"  {low:.1f}-{high:.1f}  n={count:<6} observed={observed:.2f}")
+
+    baseline = evaluate(rows, 0.5, None)
+    print(f"\n🧪 Baseline (plain predict, every employer to the LLM): {baseline['llm_calls']} LLM calls, "
+          f"precision {baseline['precision']:.3f}, recall {baseline['recall']:.3f}")
+    print(f"\n{'reject<':>8} {'employer>=':>10} {'LLM calls':>10} {'vs base':>8} {'LLM time':>9} "
+          f"{'ms/msg':>7} {'precision':>9} {'recall':>7}")
+    for reject_threshold in REJECT_THRESHOLDS:
+        for employer_threshold in EMPLOYER_THRESHOLDS:
+            result = evaluate(rows, reject_threshold, employer_threshold)
+            llm_seconds = result['llm_calls'] * args.llm_latency
+            change = (result['llm_calls'] - baseline['llm_calls']) / baseline['llm_calls'] if baseline['llm_calls'] else 0
+            print(f"{reject_threshold:>8.2f} {employer_threshold if employer_threshold else 'LLM':>10} "
+                  f"{result['llm_calls']:>10} {change:>+8.0%} {llm_seconds:>8.0f}s "
+                  f"{llm_seconds / len(rows) * 1000:>7.1f} {result['precision']:>9.3f} {result['recall']:>7.3f}")
+
+
+if __name__ == '__main__':
+    main()
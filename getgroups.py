@@ -1,6 +1,9 @@
 import csv
 from telethon.sync import TelegramClient
 from telethon.tl.types import Channel, Chat
+from constants.keywords import GROUPS, GROUP_DISCOVERY_AUTO_MONITOR
+from managers.entity_cache import EntityCache
+from managers.group_registry import GroupRegistry
 
 # Your credentials
 api_id = 28050501
@@ -11,6 +14,10 @@ output_file = 'data/groups.csv'
 with TelegramClient(session_name, api_id, api_hash) as client:
     dialogs = client.get_dialogs()
 
+    # Share the access hashes with the bot so it doesn't re-resolve these chats
+    # (the cache is keyed by peer ID, so it works across sessions of the same account)
+    EntityCache().remember_many(dialog.entity for dialog in dialogs)
+
     group_data = []
 
     for dialog in dialogs:
@@ -36,3 +43,9 @@ with TelegramClient(session_name, api_id, api_hash) as client:
         writer.writerows(group_data)
 
     print(f"\n📁 Group info saved to {output_file}")
+
+    # Full sync of the registry the bot (or supervisor.py) follows at runtime
+    added, removed = GroupRegistry(config_groups=GROUPS).apply_dialogs(
+        (dialog.entity for dialog in dialogs), full=True, auto_monitor=GROUP_DISCOVERY_AUTO_MONITOR
+    )
+    print(f"🧭 Group registry: {len(added)} new groups, {len(removed)} left")
@@ -1,166 +1,215 @@
-import datetime
-import random
+import time
+
+START_TIME = time.perf_counter()
 
 from telethon import TelegramClient, events
 from managers.contact_manager import ContactManager
 from managers.pitch_manager import PitchManager
-from classifier.keyword_classifier import label_message_keywords
-from classifier.model_classifier import classify_message_model
-from classifier.llm_classifier import classify_message_llm
-from constants.keywords import GROUPS, GROUP_MESSAGE_INTERVAL, PER_GROUP_DELAY, PRIVATE_GROUP_ID
-from config import api_id, api_hash, session_name
+import classifier.model_classifier as model_classifier
+from classifier import offload
+import metrics
+import classifier.llm_classifier as llm_classifier
+from classifier.llm_classifier import verdict_cache, llm_router, close_llm_clients
+from classifier.near_duplicates import NearDuplicateIndex
+from classifier.online_model import ONLINE_MODEL_PATH
+from constants.keywords import (
+    GROUPS, PRIVATE_GROUP_ID, PER_GROUP_DELAY, CHECKPOINT_FLUSH_INTERVAL, ENTITY_CACHE_TTL,
+    METRICS_PORT, METRICS_LOG_INTERVAL, BROADCAST_INTERVAL, BROADCAST_JITTER, BROADCAST_RETRY_DELAY, BROADCAST_MAX_RETRIES,
+    PIPELINE_CLASSIFY_WORKERS, PIPELINE_OUTREACH_WORKERS, PIPELINE_QUEUE_SIZE,
+    NEAR_DUP_DISTANCE, NEAR_DUP_WINDOW, NEAR_DUP_MAX_ENTRIES, NEAR_DUP_MIN_TOKENS, NEAR_DUP_MIN_JACCARD,
+    CLASSIFY_EXECUTOR, CLASSIFY_EXECUTOR_WORKERS, CLASSIFY_OFFLOAD_MIN_CHARS,
+    GROUP_DISCOVERY_INTERVAL, GROUP_DISCOVERY_FULL_INTERVAL, GROUP_DISCOVERY_AUTO_MONITOR, GROUP_REGISTRY_POLL,
+    SEND_GLOBAL_RATE, SEND_GLOBAL_BURST, SEND_PER_CHAT_RATE, SEND_PER_CHAT_BURST, SEND_MAX_RETRIES, REPLAY_MAX_AGE
+)
+from config import api_id, api_hash, session_name, worker_id, worker_index, worker_groups
 import asyncio
-from on_start.get_last_messages import load_last_read, save_last_read, process_missed_messages
+from managers.checkpoint_manager import CheckpointManager, LAST_READ_FILE
+from managers.entity_cache import EntityCache, ENTITIES_FILE
+from managers.group_registry import GroupRegistry
+from on_start.get_last_messages import process_missed_messages, group_key_for
+from on_start.startup_report import StartupReport
+from pipeline.message_pipeline import MessagePipeline, high_water_key
+from pipeline.send_scheduler import SendScheduler
+from pipeline.broadcast_scheduler import BroadcastScheduler, broadcast_due_key
+from pipeline.group_discovery import GroupDiscovery
+from pipeline.sharding import parse_groups, worker_path, seed_checkpoints
+
+# Under supervisor.py each worker has its own session and owns a shard of the groups;
+# the contact store (and with it the dedup claims) is shared by all workers. A single process
+# owns the group registry and follows it live; under the supervisor, the supervisor reads it.
+group_registry = GroupRegistry(config_groups=GROUPS) if worker_groups is None else None
+MY_GROUPS = parse_groups(worker_groups) if worker_groups is not None else group_registry.monitored()
+if worker_id is not None:
+    print(f"👷 Worker {worker_id} owns {len(MY_GROUPS)} of {len(GROUPS)} groups")
 
 client = TelegramClient(session_name, api_id, api_hash)
-contact_manager = ContactManager()
+contact_manager = ContactManager(owner=worker_id)
 pitch_manager = PitchManager()
-group_entities = {}
+# Access hashes are per account, so each worker keeps its own entity cache
+entity_cache = EntityCache(client, path=worker_path(ENTITIES_FILE, worker_id), ttl=ENTITY_CACHE_TTL)
+# Every worker trains on its own verdicts; one shared file would keep only the last writer's model
+model_classifier.online_model_path = worker_path(ONLINE_MODEL_PATH, worker_id)
+
+startup_report = StartupReport(START_TIME)
+startup_report.mark("imports + setup")
 
 
 async def main():
+    # Before the client starts its threads, so a process pool can fork cleanly
+    offload.start(CLASSIFY_EXECUTOR, CLASSIFY_EXECUTOR_WORKERS, CLASSIFY_OFFLOAD_MIN_CHARS)
     await client.start()
+    startup_report.mark("telegram connect")
     print("🤖 Listening to group chats...")
 
+    # Load the TF-IDF model off the event loop while replay fetches history
+    model_warmup = asyncio.create_task(asyncio.to_thread(model_classifier.load_models))
+
+    await entity_cache.warm(MY_GROUPS + [PRIVATE_GROUP_ID])
+    startup_report.mark("entity cache warm-up")
+
     global last_read
-    last_read = load_last_read()
-    now = datetime.datetime.now(datetime.timezone.utc)
-
-    # Parse last group message timestamp if it exists
-    last_group_message_str = last_read.get("last_group_message")
-    last_group_message = (
-        datetime.datetime.fromisoformat(last_group_message_str)
-        if last_group_message_str else None
+    last_read = CheckpointManager(worker_path(LAST_READ_FILE, worker_id), interval=CHECKPOINT_FLUSH_INTERVAL)
+    if worker_id is not None:
+        # Replay mark, broadcast schedule and the timestamp checkpoint basic groups resume from
+        keys = [
+            key for group_key in map(group_key_for, MY_GROUPS)
+            for key in (high_water_key(group_key), broadcast_due_key(group_key), group_key)
+        ]
+        seeded = seed_checkpoints(last_read, keys, LAST_READ_FILE.with_name('last_read*.json'))
+        if seeded:
+            print(f"🔁 Took over {seeded} checkpoints from other workers")
+
+    send_scheduler = SendScheduler(
+        client,
+        global_rate=SEND_GLOBAL_RATE,
+        global_burst=SEND_GLOBAL_BURST,
+        per_chat_rate=SEND_PER_CHAT_RATE,
+        per_chat_burst=SEND_PER_CHAT_BURST,
+        max_retries=SEND_MAX_RETRIES
     )
+    send_scheduler.start()
+
+    pipeline = MessagePipeline(
+        client, send_scheduler, entity_cache, contact_manager, last_read,
+        classify_workers=llm_classifier.classify_worker_count(PIPELINE_CLASSIFY_WORKERS),
+        outreach_workers=PIPELINE_OUTREACH_WORKERS,
+        queue_size=PIPELINE_QUEUE_SIZE,
+        pitch_manager=pitch_manager,
+        near_duplicates=NearDuplicateIndex(
+            max_distance=NEAR_DUP_DISTANCE,
+            window=NEAR_DUP_WINDOW,
+            max_entries=NEAR_DUP_MAX_ENTRIES,
+            min_tokens=NEAR_DUP_MIN_TOKENS,
+            min_jaccard=NEAR_DUP_MIN_JACCARD
+        ) if NEAR_DUP_DISTANCE else None
+    )
+    pipeline.start()
+
+    metrics.registry.gauge('bot_ingest_queue_depth', 'Messages waiting for classification', pipeline.ingest_queue.qsize)
+    metrics.registry.gauge('bot_outreach_queue_depth', 'Outreach steps ready to send', pipeline.outreach_queue.qsize)
+    metrics.registry.gauge('bot_pending_timers', 'Outreach steps waiting on a human-like delay',
+                           lambda: pipeline.pending_timers)
+    metrics.registry.gauge('bot_send_queue_depth', 'Sends queued in the scheduler', lambda: send_scheduler.queue_depth)
+    metrics.registry.gauge('bot_contact_cache_size', 'Contact records held in memory', lambda: len(contact_manager.contact_cache))
+    metrics.registry.gauge('bot_contact_cache_bytes', 'Approximate memory held by the contact cache',
+                           contact_manager.contact_cache.memory_bytes)
+    if METRICS_PORT:
+        metrics_server = await metrics.start_metrics_server(port=METRICS_PORT + worker_index)
 
     # ⏪ Recover missed messages before starting listeners
-    await process_missed_messages(client, last_read)
-
-    async def periodic_group_message():
-        nonlocal last_group_message  # So we can update it inside this function
-        now = datetime.datetime.now(datetime.timezone.utc)
-
-        if not last_group_message or (now - last_group_message) > datetime.timedelta(hours=24):
-            print("🔁 Starting new broadcast round")
-
-            for group in GROUPS:
-                try:
-                    group_key = str(group)
-                    if group_key not in group_entities:
-                        group_entities[group_key] = await client.get_entity(group)
-
-                    await client.send_message(
-                        group_entities[group_key],
-                        pitch_manager.get_random_group_pitch()
-                    )
-                    print(f"📣 Sent broadcast to group: {group}")
-                except Exception as e:
-                    print(f"❌ Failed to send group message to {group}: {e}")
-
-                await asyncio.sleep(PER_GROUP_DELAY)
-
-            # ✅ Update last_group_message timestamp
-            last_group_message = datetime.datetime.now(datetime.timezone.utc)
-            last_read["last_group_message"] = last_group_message.isoformat()
-            save_last_read(last_read)
-
-        elif (now - last_group_message) < datetime.timedelta(hours=24):
-            print(f"🕒 Last group message was less than 24 hours ago. Skipping...")
+    await process_missed_messages(client, last_read, pipeline, MY_GROUPS)
+    startup_report.mark("missed message replay")
+
+    await model_warmup
+    startup_report.record("model load", model_classifier.model_load_time, background=True)
+    startup_report.print_report()
+
+    broadcast_scheduler = BroadcastScheduler(
+        send_scheduler, pitch_manager, last_read, entity_cache.get_input_peer,
+        interval=BROADCAST_INTERVAL,
+        jitter=BROADCAST_JITTER,
+        retry_delay=BROADCAST_RETRY_DELAY,
+        max_retries=BROADCAST_MAX_RETRIES,
+        stagger=PER_GROUP_DELAY
+    )
+    for group in MY_GROUPS:
+        broadcast_scheduler.add_group(group_key_for(group), group, migrate=True)
 
-    async def periodic_group_message_loop():
-        while True:
-            await periodic_group_message()
-            await asyncio.sleep(3600)  # Wait 1 hour before next round
+    # Filtered on a set rather than chats=..., so the monitored groups can change at runtime
+    monitored_chats = {int(group_key_for(group)) for group in MY_GROUPS}
 
-    @client.on(events.NewMessage(chats=GROUPS))
+    @client.on(events.NewMessage(func=lambda event: event.chat_id in monitored_chats))
     async def keyword_listener(event):
-        sender = await event.get_sender()
-        sender_id = sender.id
-
-        # ✅ Skip classification if we've already messaged this user
-        if sender_id in contact_manager.messaged_users or sender_id in contact_manager.processing_users:
-            print(f"⏩ Already messaged or processing {sender_id}, skipping...")
-            return
-
-        contact_manager.processing_users.add(sender_id)
-
-        text = event.message.message
-
-        # Step 1: Keyword classification
-        label = label_message_keywords(text)
-        print(f"🔍 Keyword-based label: {label}")
-
-        # Step 2: Model fallback if unsure
-        if label == 'unsure':
-            label = classify_message_model(text)
-            print(f"🤖 Model-based label: {label}")
-
-        # Step 3: Use LLM only for employer messages
-        if label == 'employer':
-            llm_result = await classify_message_llm(text)
-            confirmed_label = llm_result.get("label")
-            reason = llm_result.get("reason", "No reason provided")
-            response = llm_result.get("response", "No response provided")
-
-            if confirmed_label != 'employer':
-                print(
-                    f"❌ LLM disagreed. Ignoring message. LLM said: {confirmed_label} | Reason: {reason}"
-                )
-                return
-
-            print(f"✅ LLM confirmed employer message: {reason}")
-            print(f"💼 Detected employer message from {sender_id}: {text[:60]}...")
-
-            try:
-                user_info = await contact_manager.get_or_cache_user(client, sender_id, sender)
-                if not user_info:
-                    print(f"⚠️ Could not get contact info for {sender_id} — will try to send message anyway.")
-                else:
-                    print(f"✅ Got user info for {sender_id}: {user_info}")
-
-                await asyncio.sleep(random.randint(5, 15))  # Human-like delay
-
-                await client.send_message(
-                    sender_id,
-                    response,
-                    reply_to=event.message.id
-                )
-
-                await asyncio.sleep(random.randint(2, 3))  # Human-like delay
-
-                await client.send_message(
-                    PRIVATE_GROUP_ID,
-                    f'📢 You just texted [this employer](tg://user?id={sender_id}) regarding a job.\n\nMessage: "{text}"',
-                    parse_mode='markdown'
-                )
-
-                contact_manager.add_messaged_user(sender_id)
-                name = user_info['username'] or user_info['full_name']
-                contact_manager.processing_users.discard(sender_id)
-                print(f"💬 Messaged: {name} (ID: {sender_id})")
-
-                group_id = str(event.chat_id)
-                last_read[group_id] = datetime.datetime.now(datetime.timezone.utc).isoformat()
-                save_last_read(last_read)
-                contact_manager.save_to_disk()
-
-            except Exception as e:
-                print(f"⚠️ Failed to message {sender_id}: {e}")
-                await client.send_message(
-                    PRIVATE_GROUP_ID,
-                    f'📢 You just tried to text [this employer](tg://user?id={sender_id}) regarding a job, but failed.\n\nMessage: "{text}"',
-                    parse_mode='markdown'
-                )
-                contact_manager.processing_users.discard(sender_id)
+        await pipeline.handle_event(event)
+
+    replays = set()  # Runtime replays, so group discovery never waits on one
+
+    async def replay_added(added):
+        await entity_cache.warm(added)
+        # e.g. a re-enabled group: only recent history, and no join, since live messages are already flowing
+        await process_missed_messages(client, last_read, pipeline, added, max_age=REPLAY_MAX_AGE, join=False)
+
+    async def update_groups(added, removed):
+        # Registry changes apply without reconnecting: listener, broadcast timers, then replay
+        for group in removed:
+            monitored_chats.discard(int(group_key_for(group)))
+            broadcast_scheduler.remove_group(group_key_for(group))
+        for group in added:
+            monitored_chats.add(int(group_key_for(group)))
+            broadcast_scheduler.add_group(group_key_for(group), group)
+        print(f"🧭 Now monitoring {len(monitored_chats)} groups (+{len(added)} / -{len(removed)})")
+        if added:
+            task = asyncio.create_task(replay_added(added))
+            replays.add(task)
+            task.add_done_callback(replays.discard)
+
+    group_discovery = None
+    if group_registry is not None:
+        group_discovery = GroupDiscovery(
+            client, group_registry, entity_cache, update_groups,
+            interval=GROUP_DISCOVERY_INTERVAL,
+            full_interval=GROUP_DISCOVERY_FULL_INTERVAL,
+            poll_interval=GROUP_REGISTRY_POLL,
+            auto_monitor=GROUP_DISCOVERY_AUTO_MONITOR
+        )
 
     try:
         await asyncio.gather(
-            periodic_group_message_loop(),
-            client.run_until_disconnected()
+            broadcast_scheduler.run(),
+            metrics.log_summary_loop(METRICS_LOG_INTERVAL),
+            client.run_until_disconnected(),
+            *([group_discovery.run()] if group_discovery is not None else [])
         )
     finally:
+        for task in replays:
+            task.cancel()
+        print(metrics.summary())
+        if METRICS_PORT:
+            metrics_server.close()
+        print(f"🧵 Pipeline: {pipeline.stats()}")
+        await pipeline.stop()
+        offload.shutdown()
+        print(f"📣 Broadcasts: {broadcast_scheduler.stats()}")
+        print(f"📤 Sends: {send_scheduler.stats()}")
+        await send_scheduler.stop()
+        contact_manager.release_all()
+        print(f"👥 Contact cache: {contact_manager.contact_cache.stats()}")
         contact_manager.save_to_disk()
-        save_last_read(last_read)
+        await last_read.close()
+        if group_discovery is not None:
+            print(f"🧭 Groups: {group_discovery.stats()}")
+            await group_registry.close()
+        print(f"🗂️ Entity cache: {entity_cache.stats()}")
+        await entity_cache.close()
+        print(f"🗃️ LLM verdict cache: {verdict_cache.stats()}")
+        await verdict_cache.close()
+        print(f"🛰️ LLM providers: {llm_router.stats()}")
+        if llm_classifier.llm_batcher is not None:
+            print(f"📦 LLM batches: {llm_classifier.llm_batcher.stats()}, providers: {llm_classifier.batch_router.stats()}")
+        await close_llm_clients()
+        if model_classifier.online_model is not None:
+            print(f"📈 Online model: {model_classifier.online_model.stats()}")
+            model_classifier.save_online_model()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import os
+from pathlib import Path
+
+DATA_DIR = Path('data')
+LAST_READ_FILE = DATA_DIR / 'last_read.json'
+
+
+# --- Write-behind JSON file: changes coalesce in memory and are written atomically off the loop,
+# at most once per interval. Subclasses keep the state and say what a snapshot of it is. ---
+class WriteBehindFile:
+    def __init__(self, path, interval=5.0, indent=None):
+        self.path = Path(path)
+        self.interval = interval
+        self.indent = indent
+        self._dirty = False
+        self._timer = None
+        self._flushing = None
+
+    def snapshot(self):
+        # JSON-ready copy of the state, taken on the loop just before each write
+        raise NotImplementedError
+
+    def mark_dirty(self):
+        self._dirty = True
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._timer is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._dirty = False
+            try:
+                self._write(self.snapshot())  # No loop (scripts/tools): write through
+            except Exception as e:
+                self._dirty = True
+                print(f"⚠️ Failed to write {self.path.name}: {e}")
+            return
+        self._timer = loop.call_later(self.interval, lambda: asyncio.ensure_future(self.flush()))
+
+    async def flush(self):
+        self._timer = None
+        if self._flushing is not None:
+            await self._flushing
+        if not self._dirty:
+            return
+
+        self._dirty = False
+        snapshot = self.snapshot()
+        self._flushing = asyncio.ensure_future(asyncio.to_thread(self._write, snapshot))
+        try:
+            await self._flushing
+        except Exception as e:
+            self._dirty = True
+            print(f"⚠️ Failed to write {self.path.name}: {e}")
+        finally:
+            self._flushing = None
+
+    def _write(self, snapshot):
+        # temp file + fsync + rename: a crash leaves either the old or the new file, never half
+        self.path.parent.mkdir(exist_ok=True)
+        tmp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, indent=self.indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    async def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+
+
+# --- Write-behind checkpoints: a JSON object of keys updated in place ---
+class CheckpointManager(WriteBehindFile):
+    def __init__(self, path=LAST_READ_FILE, interval=5.0, indent=2, before_flush=None):
+        super().__init__(path, interval, indent)
+        self.before_flush = before_flush  # Called on the data just before each write (e.g. pruning)
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError as e:
+            print(f"⚠️ Corrupt checkpoint file {self.path.name}, starting empty: {e}")
+            return {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self.mark_dirty()
+
+    def update(self, values):
+        # Several keys, one (debounced) write
+        if not values:
+            return
+        self.data.update(values)
+        self.mark_dirty()
+
+    def snapshot(self):
+        if self.before_flush is not None:
+            self.before_flush(self.data)
+        return dict(self.data)
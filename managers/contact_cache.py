@@ -0,0 +1,100 @@
+import sys
+import time
+from collections import OrderedDict
+
+
+class ContactRecord:
+    __slots__ = ('username', 'full_name', 'timestamp')
+
+    def __init__(self, username, full_name, timestamp):
+        self.username = username
+        self.full_name = full_name
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return f"ContactRecord(username={self.username!r}, full_name={self.full_name!r})"
+
+
+# --- Bounded LRU + TTL cache of contact records in front of the contact store. Writes go
+# through to the store, so an evicted record is already on disk and a later miss reloads it
+# from there; memory stays at max_entries records however many senders the bot has seen. ---
+class ContactCache:
+    def __init__(self, store, max_entries=5000, ttl=3600):
+        self.store = store
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._records = OrderedDict()  # user_id -> ContactRecord, least recently used first
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, user_id):
+        return user_id in self._records
+
+    def warm(self, rows):
+        # rows: (user_id, username, full_name, timestamp), most recent first
+        now = time.time()
+        for user_id, username, full_name, timestamp in rows:
+            if len(self._records) >= self.max_entries or now - timestamp >= self.ttl:
+                break
+            self._records[user_id] = ContactRecord(username, full_name, timestamp)
+        self._records = OrderedDict(reversed(self._records.items()))  # Oldest becomes least recently used
+
+    def get(self, user_id):
+        # -> fresh ContactRecord or None
+        now = time.time()
+        record = self._records.get(user_id)
+        if record is not None:
+            if now - record.timestamp < self.ttl:
+                self._records.move_to_end(user_id)
+                self.hits += 1
+                return record
+            del self._records[user_id]
+            self.expired += 1
+
+        row = self.store.get_contact(user_id)
+        if row is not None and now - row[2] < self.ttl:
+            self.store_hits += 1
+            return self._insert(user_id, ContactRecord(*row))
+        self.misses += 1
+        return None
+
+    def put(self, user_id, username, full_name, timestamp=None):
+        record = ContactRecord(username, full_name, timestamp or time.time())
+        self.store.upsert_contact(user_id, record)
+        return self._insert(user_id, record)
+
+    def _insert(self, user_id, record):
+        self._records[user_id] = record
+        self._records.move_to_end(user_id)
+        while len(self._records) > self.max_entries:
+            self._records.popitem(last=False)
+            self.evictions += 1
+        return record
+
+    def memory_bytes(self):
+        # Approximate: the mapping, the records and their strings (small ints are shared)
+        total = sys.getsizeof(self._records)
+        for user_id, record in self._records.items():
+            total += sys.getsizeof(user_id) + sys.getsizeof(record) + sys.getsizeof(record.timestamp)
+            total += sys.getsizeof(record.username) + sys.getsizeof(record.full_name)
+        return total
+
+    def stats(self):
+        lookups = self.hits + self.store_hits + self.misses
+        return {
+            'size': len(self._records),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'store_hits': self.store_hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'hit_rate': round((self.hits + self.store_hits) / lookups, 3) if lookups else 0.0,
+            'memory_kb': round(self.memory_bytes() / 1024, 1),
+        }
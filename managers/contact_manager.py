@@ -1,57 +1,47 @@
-import csv
-import time
 from pathlib import Path
 
+from constants.keywords import CLAIM_TTL, DEDUP_BLOOM_BITS, CONTACT_CACHE_SIZE, CONTACT_CACHE_TTL
+from managers.contact_cache import ContactCache
+from managers.contact_store import ContactStore
+from managers.id_set import CompactIdSet
+
 DATA_DIR = Path('data')
-CONTACTS_CSV = DATA_DIR / 'contacts.csv'
-MESSAGED_USERS_CSV = DATA_DIR / 'messaged_users.csv'
 
 class ContactManager:
-    def __init__(self):
-        self.contact_cache = {}
-        self.messaged_users = set()
+    def __init__(self, store=None, owner=None, claim_ttl=CLAIM_TTL):
+        self.messaged_users = CompactIdSet()
         self.processing_users = set()
+        # Worker ID when several bot processes share the store; None for a single process
+        self.owner = owner
+        self.claim_ttl = claim_ttl
         DATA_DIR.mkdir(exist_ok=True)
+        self.store = store or ContactStore()
+        self.contact_cache = ContactCache(self.store, max_entries=CONTACT_CACHE_SIZE, ttl=CONTACT_CACHE_TTL)
         self.load_from_disk()
+        if owner is not None:
+            released = self.store.release_owner(owner)
+            if released:
+                print(f"🧹 Released {released} stale claims held by worker {owner}")
 
     def load_from_disk(self):
         try:
-            if CONTACTS_CSV.exists():
-                with open(CONTACTS_CSV, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        self.contact_cache[int(row['user_id'])] = {
-                            'username': row['username'],
-                            'full_name': row['full_name'],
-                            'timestamp': float(row['timestamp'])
-                        }
-
-            if MESSAGED_USERS_CSV.exists():
-                with open(MESSAGED_USERS_CSV, 'r', encoding='utf-8') as f:
-                    self.messaged_users = {int(row[0]) for row in csv.reader(f)}
-
+            self.contact_cache.warm(self.store.load_recent_contacts(self.contact_cache.max_entries))
+            self.messaged_users = CompactIdSet(self.store.load_messaged_users(), bloom_bits=DEDUP_BLOOM_BITS)
             print("✅ Loaded contact data")
         except Exception as e:
             print(f"⚠️ Error loading contact data: {e}")
 
     def save_to_disk(self):
+        # Individual writes are already durable; this just compacts the store's log
         try:
-            with open(CONTACTS_CSV, 'w', encoding='utf-8', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['user_id', 'username', 'full_name', 'timestamp'])
-                writer.writeheader()
-                for uid, info in self.contact_cache.items():
-                    writer.writerow({'user_id': uid, **info})
-
-            with open(MESSAGED_USERS_CSV, 'w', encoding='utf-8', newline='') as f:
-                writer = csv.writer(f)
-                for uid in self.messaged_users:
-                    writer.writerow([uid])
+            self.store.checkpoint()
         except Exception as e:
             print(f"⚠️ Error saving contact data: {e}")
 
     async def get_or_cache_user(self, client, user_id, sender=None):
-        if user_id in self.contact_cache and time.time() - self.contact_cache[user_id]["timestamp"] < 3600:
-            return self.contact_cache[user_id]
+        record = self.contact_cache.get(user_id)
+        if record is not None:
+            return record
 
         try:
             if sender:  # Safer: use event.sender if available
@@ -60,18 +50,56 @@ class ContactManager:
                 # Optional: skip or log if no sender
                 return None
 
-            self.contact_cache[user_id] = {
-                'username': getattr(user, 'username', None),
-                'full_name': f"{getattr(user, 'first_name', '')} {getattr(user, 'last_name', '')}".strip(),
-                'timestamp': time.time()
-            }
-            self.save_to_disk()
-            return self.contact_cache[user_id]
+            return self.contact_cache.put(
+                user_id,
+                getattr(user, 'username', None),
+                f"{getattr(user, 'first_name', '')} {getattr(user, 'last_name', '')}".strip(),
+            )
 
         except Exception as e:
             print(f"⚠️ Could not fetch user {user_id}: {e}")
             return None
 
+    def is_known(self, user_id):
+        # Local-only check, cheap enough to run before any network or classification work
+        return user_id in self.messaged_users or user_id in self.processing_users
+
+    def try_claim(self, user_id):
+        # True if this process may go ahead and classify/DM the user
+        if user_id in self.messaged_users or user_id in self.processing_users:
+            return False
+        if self.owner is not None:
+            try:
+                claimed = self.store.claim(user_id, self.owner, self.claim_ttl)
+                if not claimed and self.store.is_messaged(user_id):
+                    self.messaged_users.add(user_id)  # Another worker DM'd them
+            except Exception as e:
+                print(f"⚠️ Could not claim user {user_id}, skipping: {e}")
+                return False  # Never risk a double DM
+            if not claimed:
+                return False
+        self.processing_users.add(user_id)
+        return True
+
+    def release(self, user_id):
+        self.processing_users.discard(user_id)
+        if self.owner is not None:
+            try:
+                self.store.release(user_id, self.owner)
+            except Exception as e:
+                print(f"⚠️ Could not release claim on user {user_id}: {e}")
+
+    def release_all(self):
+        self.processing_users.clear()
+        if self.owner is not None:
+            try:
+                self.store.release_owner(self.owner)
+            except Exception as e:
+                print(f"⚠️ Could not release claims for worker {self.owner}: {e}")
+
     def add_messaged_user(self, user_id):
         self.messaged_users.add(user_id)
-        self.save_to_disk()
+        try:
+            self.store.add_messaged_user(user_id)
+        except Exception as e:
+            print(f"⚠️ Error saving messaged user {user_id}: {e}")
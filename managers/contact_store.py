@@ -0,0 +1,130 @@
+import csv
+import sqlite3
+import time
+from pathlib import Path
+
+DATA_DIR = Path('data')
+CONTACTS_DB = DATA_DIR / 'contacts.db'
+CONTACTS_CSV = DATA_DIR / 'contacts.csv'
+MESSAGED_USERS_CSV = DATA_DIR / 'messaged_users.csv'
+
+
+# --- SQLite (WAL) store: every new contact / messaged user is one small indexed write ---
+class ContactStore:
+    def __init__(self, path=CONTACTS_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(exist_ok=True)
+        self.conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS contacts (
+                user_id INTEGER PRIMARY KEY,
+                username TEXT,
+                full_name TEXT,
+                timestamp REAL
+            );
+            CREATE TABLE IF NOT EXISTS messaged_users (
+                user_id INTEGER PRIMARY KEY,
+                messaged_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS claims (
+                user_id INTEGER PRIMARY KEY,
+                owner TEXT,
+                claimed_at REAL
+            );
+        """)
+        self.migrate_csv()
+
+    def migrate_csv(self):
+        # One-off import of the legacy CSV files; they are left in place as a backup
+        if self._migrated():
+            return
+
+        contacts, messaged = [], []
+        if CONTACTS_CSV.exists():
+            with open(CONTACTS_CSV, 'r', encoding='utf-8') as f:
+                contacts = [
+                    (int(row['user_id']), row['username'] or None, row['full_name'], float(row['timestamp']))
+                    for row in csv.DictReader(f)
+                ]
+        if MESSAGED_USERS_CSV.exists():
+            with open(MESSAGED_USERS_CSV, 'r', encoding='utf-8') as f:
+                messaged = [(int(row[0]), None) for row in csv.reader(f) if row]
+
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            if self._migrated():  # Another worker process got there first
+                return
+            self.conn.executemany("INSERT OR REPLACE INTO contacts VALUES (?, ?, ?, ?)", contacts)
+            self.conn.executemany("INSERT OR IGNORE INTO messaged_users VALUES (?, ?)", messaged)
+            self.conn.execute("INSERT INTO meta VALUES ('csv_migrated', ?)", (str(time.time()),))
+
+        if contacts or messaged:
+            print(f"📦 Migrated {len(contacts)} contacts and {len(messaged)} messaged users from CSV")
+
+    def _migrated(self):
+        return self.conn.execute("SELECT 1 FROM meta WHERE key = 'csv_migrated'").fetchone() is not None
+
+    def load_recent_contacts(self, limit):
+        # Most recently refreshed first, for warming a bounded cache
+        return self.conn.execute(
+            "SELECT user_id, username, full_name, timestamp FROM contacts ORDER BY timestamp DESC LIMIT ?", (limit,)
+        ).fetchall()
+
+    def get_contact(self, user_id):
+        # -> (username, full_name, timestamp) or None
+        return self.conn.execute(
+            "SELECT username, full_name, timestamp FROM contacts WHERE user_id = ?", (user_id,)
+        ).fetchone()
+
+    def load_messaged_users(self):
+        # Primary-key order, i.e. already sorted
+        return [row[0] for row in self.conn.execute("SELECT user_id FROM messaged_users ORDER BY user_id")]
+
+    def upsert_contact(self, user_id, record):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO contacts VALUES (?, ?, ?, ?)",
+            (user_id, record.username, record.full_name, record.timestamp)
+        )
+
+    def add_messaged_user(self, user_id):
+        self.conn.execute("INSERT OR IGNORE INTO messaged_users VALUES (?, ?)", (user_id, time.time()))
+
+    def is_messaged(self, user_id):
+        return self.conn.execute("SELECT 1 FROM messaged_users WHERE user_id = ?", (user_id,)).fetchone() is not None
+
+    # --- Cross-process claims: one worker at a time may be processing a sender ---
+    def claim(self, user_id, owner, ttl):
+        # Single statement, so it is atomic across processes: succeeds only if the user was
+        # never messaged and nobody else holds a live claim (stale claims can be taken over)
+        now = time.time()
+        cursor = self.conn.execute(
+            """
+            INSERT INTO claims (user_id, owner, claimed_at)
+            SELECT ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM messaged_users WHERE user_id = ?)
+            ON CONFLICT(user_id) DO UPDATE SET owner = excluded.owner, claimed_at = excluded.claimed_at
+            WHERE claims.owner = excluded.owner OR claims.claimed_at < ?
+            """,
+            (user_id, owner, now, user_id, now - ttl)
+        )
+        return cursor.rowcount == 1
+
+    def release(self, user_id, owner):
+        self.conn.execute("DELETE FROM claims WHERE user_id = ? AND owner = ?", (user_id, owner))
+
+    def release_owner(self, owner):
+        # Drops everything a worker held, e.g. left over from a crash
+        return self.conn.execute("DELETE FROM claims WHERE owner = ?", (owner,)).rowcount
+
+    def checkpoint(self):
+        # Folds the WAL back into the main database file (atomic, crash-safe compaction)
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self.checkpoint()
+        self.conn.close()
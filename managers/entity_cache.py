@@ -0,0 +1,132 @@
+import asyncio
+import time
+from pathlib import Path
+
+from telethon import utils
+from telethon.tl.types import InputPeerUser, InputPeerChat, InputPeerChannel
+
+from managers.checkpoint_manager import CheckpointManager
+
+DATA_DIR = Path('data')
+ENTITIES_FILE = DATA_DIR / 'entities.json'
+
+
+def peer_key(peer):
+    # Marked peer ID (-100... for channels, -... for chats) as a string
+    return str(utils.get_peer_id(peer))
+
+
+# --- Persisted peer ID -> access hash cache shared by broadcast, listener, replay and getgroups.py ---
+# Holds groups/channels plus the users the bot actually messages; user records past the TTL are
+# pruned before each write, so the file doesn't grow with every sender ever seen.
+class EntityCache:
+    def __init__(self, client=None, path=ENTITIES_FILE, ttl=7 * 24 * 3600, flush_interval=5.0):
+        self.client = client
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.pruned = 0
+        self.store = CheckpointManager(path, interval=flush_interval, indent=None, before_flush=self._prune)
+        self._prune(self.store.data)
+
+    def remember(self, entity):
+        # Accepts users/chats/channels or their input peers; anything without a hash is ignored
+        if entity is None:
+            return
+        try:
+            record = self._record(utils.get_input_peer(entity, allow_self=False))
+        except (TypeError, ValueError):
+            return
+        if record is not None:
+            self.store[record['key']] = record
+
+    def remember_many(self, entities):
+        # Bulk dialog imports keep groups/channels only; users are remembered when messaged
+        records = {}
+        for entity in entities:
+            try:
+                record = self._record(utils.get_input_peer(entity, allow_self=False))
+            except (TypeError, ValueError):
+                continue
+            if record is not None and record['type'] != 'user':
+                records[record['key']] = record
+        self.store.update(records)
+
+    def _prune(self, data):
+        cutoff = time.time() - self.ttl
+        expired = [key for key, record in data.items() if record['type'] == 'user' and record['updated'] < cutoff]
+        for key in expired:
+            del data[key]
+        self.pruned += len(expired)
+
+    @staticmethod
+    def _record(input_peer):
+        if isinstance(input_peer, InputPeerUser):
+            kind, peer_id, access_hash = 'user', input_peer.user_id, input_peer.access_hash
+        elif isinstance(input_peer, InputPeerChannel):
+            kind, peer_id, access_hash = 'channel', input_peer.channel_id, input_peer.access_hash
+        elif isinstance(input_peer, InputPeerChat):
+            kind, peer_id, access_hash = 'chat', input_peer.chat_id, None
+        else:
+            return None
+        return {
+            'key': peer_key(input_peer),
+            'type': kind,
+            'id': peer_id,
+            'access_hash': access_hash,
+            'updated': time.time(),
+        }
+
+    @staticmethod
+    def _input_peer(record):
+        if record['type'] == 'user':
+            return InputPeerUser(record['id'], record['access_hash'])
+        if record['type'] == 'channel':
+            return InputPeerChannel(record['id'], record['access_hash'])
+        return InputPeerChat(record['id'])
+
+    def cached(self, peer):
+        record = self.store.get(peer_key(peer))
+        return self._input_peer(record) if record else None
+
+    async def get_input_peer(self, peer):
+        record = self.store.get(peer_key(peer))
+        if record and time.time() - record['updated'] < self.ttl:
+            self.hits += 1
+            return self._input_peer(record)
+
+        self.misses += 1
+        try:
+            entity = await self.client.get_entity(peer)
+        except Exception as e:
+            if record:
+                print(f"⚠️ Could not refresh entity {peer}, using cached hash: {e}")
+                return self._input_peer(record)
+            raise
+        self.remember(entity)
+        return utils.get_input_peer(entity)
+
+    async def warm(self, peers, concurrency=4):
+        # Resolves any missing or stale peers up front so first sends skip the round-trip
+        semaphore = asyncio.Semaphore(concurrency)
+        peers = list({peer_key(peer): peer for peer in peers}.values())
+        stale = [
+            peer for peer in peers
+            if not (record := self.store.get(peer_key(peer))) or time.time() - record['updated'] >= self.ttl
+        ]
+
+        async def resolve(peer):
+            async with semaphore:
+                try:
+                    await self.get_input_peer(peer)
+                except Exception as e:
+                    print(f"⚠️ Could not resolve {peer}: {e}")
+
+        await asyncio.gather(*(resolve(peer) for peer in stale))
+        print(f"🗂️ Entity cache warm: {len(peers) - len(stale)} cached, {len(stale)} resolved")
+
+    def stats(self):
+        return {'size': len(self.store.data), 'hits': self.hits, 'misses': self.misses, 'pruned': self.pruned}
+
+    async def close(self):
+        await self.store.close()
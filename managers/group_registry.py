@@ -0,0 +1,171 @@
+import os
+import time
+from pathlib import Path
+
+from telethon import utils
+from telethon.tl.types import Channel, Chat, PeerChat
+
+from managers.checkpoint_manager import CheckpointManager
+from pipeline.sharding import format_group, parse_group
+
+DATA_DIR = Path('data')
+GROUPS_FILE = DATA_DIR / 'groups.json'
+
+
+def dialog_group(entity):
+    # Group (PeerChat for basic groups, marked -100... ID for supergroups) or None for anything else
+    if isinstance(entity, Chat):
+        return PeerChat(entity.id)
+    if isinstance(entity, Channel) and getattr(entity, 'megagroup', False):
+        return utils.get_peer_id(entity)
+    return None
+
+
+# --- Persisted set of known groups and which ones the bot monitors. GROUPS from the config is
+# always monitored; discovered groups are added by the in-bot dialog sync (or getgroups.py),
+# and the file can be edited by hand ("enabled": false) while the bot runs. Whenever the file
+# changed underneath us, it is merged in before our next write: groups we changed since the
+# last write keep our version, everything else follows the file. ---
+class GroupRegistry:
+    def __init__(self, path=GROUPS_FILE, config_groups=(), flush_interval=5.0):
+        self.store = CheckpointManager(path, interval=flush_interval, before_flush=self._before_flush)
+        self.groups = self.store.get('groups', {})  # group_key -> record
+        self._mtime = self._stat()
+        self._changed = set()  # Keys added/updated here since the last write
+        self._removed = set()  # Keys deleted here since the last write
+        self._merged = False  # A pre-write merge changed the groups; reported by the next reload()
+        config_keys = set()
+        for group in config_groups:
+            key = self.key(group)
+            config_keys.add(key)
+            if key not in self.groups or self.groups[key]['source'] != 'config':
+                self.groups[key] = self._record(group, source='config', enabled=True)
+                self._changed.add(key)
+                self._save()
+        for key, record in self.groups.items():
+            if record['source'] == 'config' and key not in config_keys:
+                # Dropped from GROUPS: kept as a known group, but no longer monitored
+                record.update(source='discovered', enabled=False)
+                self._changed.add(key)
+                self._save()
+
+    @staticmethod
+    def key(group):
+        # Same value as event.chat_id, as a string
+        if isinstance(group, PeerChat):
+            return str(-abs(group.chat_id))
+        return str(group)
+
+    @staticmethod
+    def _record(group, source, enabled, title=None, username=None):
+        return {
+            'group': format_group(group),
+            'title': title,
+            'username': username,
+            'source': source,
+            'enabled': enabled,
+            'added_at': time.time(),
+        }
+
+    @property
+    def synced_at(self):
+        return self.store.get('synced_at')
+
+    @property
+    def full_synced_at(self):
+        return self.store.get('full_synced_at')
+
+    def monitored(self):
+        return [parse_group(record['group']) for record in self.groups.values() if record['enabled']]
+
+    def apply_dialogs(self, entities, full=False, auto_monitor=False):
+        # Records groups not seen before; a full sync also forgets discovered groups the account
+        # has left. The first sync only builds the baseline, so existing memberships aren't
+        # suddenly monitored. Returns (added keys, removed keys).
+        baseline = self.synced_at is None
+        started = time.time()
+        added, seen = [], set()
+        for entity in entities:
+            group = dialog_group(entity)
+            if group is None:
+                continue
+            key = self.key(group)
+            seen.add(key)
+            if key in self.groups:
+                continue
+            self.groups[key] = self._record(
+                group, source='discovered', enabled=auto_monitor and not baseline,
+                title=getattr(entity, 'title', None), username=getattr(entity, 'username', None)
+            )
+            self._changed.add(key)
+            self._removed.discard(key)
+            added.append(key)
+
+        removed = []
+        if full:
+            removed = [key for key, record in self.groups.items() if record['source'] == 'discovered' and key not in seen]
+            for key in removed:
+                del self.groups[key]
+                self._changed.discard(key)
+                self._removed.add(key)
+
+        self.store.update({'synced_at': started, **({'full_synced_at': started} if full else {})})
+        self._save()
+        return added, removed
+
+    def _save(self):
+        self.store['groups'] = self.groups
+
+    def _stat(self):
+        # Atomic writes replace the file, so the inode changes even within one mtime tick
+        try:
+            stat = os.stat(self.store.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _merge_disk(self):
+        # Merges the file into memory if it changed since we last read it; True if groups changed
+        mtime = self._stat()
+        if mtime is None or mtime == self._mtime:
+            return False
+        data = self.store._load()
+        groups = data.get('groups')
+        if groups is None:
+            return False  # Unreadable mid-edit: retried on the next poll/write
+        self._mtime = mtime
+
+        merged = {key: record for key, record in groups.items() if key not in self._removed}
+        merged.update((key, self.groups[key]) for key in self._changed if key in self.groups)
+        for key in ('synced_at', 'full_synced_at'):
+            if (data.get(key) or 0) > (self.store.get(key) or 0):
+                self.store.data[key] = data[key]
+
+        changed = merged != self.groups
+        self.groups = merged
+        self.store.data['groups'] = merged
+        return changed
+
+    def _before_flush(self, data):
+        # Runs right before each write, so edits made since the last reload aren't overwritten
+        self._merged |= self._merge_disk()
+        self._changed.clear()
+        self._removed.clear()
+
+    def reload(self):
+        # Picks up hand edits (and getgroups.py syncs) to the file; True if the groups changed,
+        # including edits a write merged in since the last reload
+        changed = self._merge_disk() or self._merged
+        self._merged = False
+        return changed
+
+    def stats(self):
+        return {
+            'known': len(self.groups),
+            'monitored': sum(record['enabled'] for record in self.groups.values()),
+            'synced_at': self.synced_at,
+            'full_synced_at': self.full_synced_at,
+        }
+
+    async def close(self):
+        await self.store.close()
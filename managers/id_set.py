@@ -0,0 +1,68 @@
+from array import array
+from bisect import bisect_left
+from itertools import chain
+
+_MASK = (1 << 64) - 1
+
+
+# --- Bloom filter over int IDs: a cheap definite "no" before the exact lookup ---
+class BloomFilter:
+    def __init__(self, bits, hashes=3):
+        self.size = bits
+        self.hashes = hashes
+        self.bits = bytearray((bits + 7) // 8)
+
+    def _positions(self, value):
+        h1 = (value * 0x9E3779B97F4A7C15) & _MASK
+        h2 = ((value ^ (value >> 29)) * 0xBF58476D1CE4E5B9 & _MASK) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+# --- Compact set of user IDs: a sorted array('q') (8 bytes per ID, vs ~60+ in a set of ints)
+# plus a small set of recent additions that is merged in batches ---
+class CompactIdSet:
+    def __init__(self, ids=(), merge_threshold=4096, bloom_bits=0):
+        self._sorted = array('q', sorted(set(ids)))
+        self._recent = set()
+        self.merge_threshold = merge_threshold
+        self.bloom = None
+        if bloom_bits:
+            self.bloom = BloomFilter(bloom_bits)
+            for user_id in self._sorted:
+                self.bloom.add(user_id)
+
+    def __contains__(self, user_id):
+        if self.bloom is not None and user_id not in self.bloom:
+            return False
+        if user_id in self._recent:
+            return True
+        ids = self._sorted
+        i = bisect_left(ids, user_id)
+        return i < len(ids) and ids[i] == user_id
+
+    def add(self, user_id):
+        if user_id in self:
+            return
+        self._recent.add(user_id)
+        if self.bloom is not None:
+            self.bloom.add(user_id)
+        if len(self._recent) >= self.merge_threshold:
+            self._merge()
+
+    def _merge(self):
+        self._sorted = array('q', sorted(chain(self._sorted, self._recent)))
+        self._recent = set()
+
+    def __len__(self):
+        return len(self._sorted) + len(self._recent)
+
+    def __iter__(self):
+        return chain(self._sorted, self._recent)
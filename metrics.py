@@ -0,0 +1,239 @@
+import asyncio
+import bisect
+import time
+
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+# --- Minimal in-process metrics (Prometheus text format), cheap enough for the hot path ---
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._children = {}
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _label_str(self, values, extra=''):
+        pairs = [f'{k}="{v}"' for k, v in zip(self.label_names, values)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def total(self):
+        return sum(child.value for child in self._children.values())
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{self._label_str(values)} {child.value}"]
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return None
+        target = q * self.count
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            if running >= target:
+                return bound
+        return float('inf')
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _render_child(self, values, child):
+        lines = []
+        running = 0
+        for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+            running += count
+            le = '+Inf' if bound == float('inf') else repr(float(bound))
+            le_label = f'le="{le}"'
+            lines.append(f"{self.name}_bucket{self._label_str(values, le_label)} {running}")
+        lines.append(f"{self.name}_sum{self._label_str(values)} {child.sum}")
+        lines.append(f"{self.name}_count{self._label_str(values)} {child.count}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, read):
+        super().__init__(name, help_text)
+        self.read = read  # Sampled only when scraped / summarised
+
+    def render(self):
+        try:
+            value = self.read()
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+
+    def _register(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, label_names=()):
+        return self._register(Counter(name, help_text, label_names))
+
+    def histogram(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, label_names, buckets))
+
+    def gauge(self, name, help_text, read):
+        # Re-registering replaces the reader (e.g. a new pipeline instance)
+        self.metrics[name] = Gauge(name, help_text, read)
+        return self.metrics[name]
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# --- Pipeline metrics ---
+MESSAGES_RECEIVED = registry.counter('bot_messages_received_total', 'Messages entering the pipeline', ['source'])
+MESSAGES_DEDUPLICATED = registry.counter('bot_messages_deduplicated_total', 'Messages skipped before classification')
+STAGE_LATENCY = registry.histogram('bot_stage_latency_seconds', 'Time spent in each pipeline stage', ['stage'])
+END_TO_END_LATENCY = registry.histogram(
+    'bot_receipt_to_dm_seconds', 'Event receipt to employer DM sent (includes human-like delays)',
+    buckets=(1, 5, 10, 15, 20, 30, 60, 120, 300, 600)
+)
+TIER_DECISIONS = registry.counter('bot_tier_decisions_total', 'Which tier decided the final label', ['tier', 'label'])
+LLM_CALLS = registry.counter('bot_llm_calls_total', 'LLM provider calls by outcome', ['provider', 'outcome'])
+LLM_FALLBACKS = registry.counter('bot_llm_fallbacks_total', 'Verdicts not served by the first-choice provider')
+LLM_CACHE = registry.counter('bot_llm_cache_total', 'LLM verdict cache lookups', ['result'])
+SENDS = registry.counter('bot_sends_total', 'Outbound sends by class and outcome', ['kind', 'outcome'])
+SEND_QUEUE_LATENCY = registry.histogram('bot_send_queue_seconds', 'Time a send waited in the scheduler', ['kind'])
+
+
+def summary():
+    stage = STAGE_LATENCY._children
+    parts = [
+        f"recv={MESSAGES_RECEIVED.total()}",
+        f"dedup={MESSAGES_DEDUPLICATED.total()}",
+    ]
+    for (name,), child in sorted(stage.items()):
+        parts.append(f"{name}_p50={child.quantile(0.5)}s/p99={child.quantile(0.99)}s")
+    llm_total = LLM_CALLS.total()
+    if llm_total:
+        parts.append(f"llm_calls={llm_total} fallback={LLM_FALLBACKS.total()}")
+    parts.append(f"sent={sum(c.value for (k, o), c in SENDS._children.items() if o == 'ok')}")
+    for metric in registry.metrics.values():
+        if isinstance(metric, Gauge):
+            try:
+                parts.append(f"{metric.name.removeprefix('bot_')}={metric.read()}")
+            except Exception:
+                pass
+    return "📊 " + ' '.join(parts)
+
+
+# --- Local Prometheus endpoint + periodic summary line ---
+async def _handle_scrape(reader, writer):
+    try:
+        request_line = await reader.readline()
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+        if request_line.split(b' ')[1:2] == [b'/metrics']:
+            body, status = registry.render().encode(), '200 OK'
+        else:
+            body, status = b'Not found\n', '404 Not Found'
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host='127.0.0.1', port=9464):
+    server = await asyncio.start_server(_handle_scrape, host, port)
+    print(f"📊 Metrics on http://{host}:{port}/metrics")
+    return server
+
+
+async def log_summary_loop(interval=300):
+    while True:
+        await asyncio.sleep(interval)
+        print(summary())
+
+
+class timed:
+    # with timed(STAGE_LATENCY.labels('keyword')): ...
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
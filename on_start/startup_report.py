@@ -0,0 +1,25 @@
+import time
+
+
+class StartupReport:
+    def __init__(self, started_at=None):
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self._last_mark = self.started_at
+        self.phases = []
+
+    def mark(self, phase):
+        # Records the time elapsed since the previous mark
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last_mark))
+        self._last_mark = now
+
+    def record(self, phase, seconds, background=False):
+        # For phases timed elsewhere, e.g. model loading on a worker thread
+        if seconds is not None:
+            self.phases.append((f"{phase} (background)" if background else phase, seconds))
+
+    def print_report(self):
+        total = time.perf_counter() - self.started_at
+        print(f"⏱️ Startup finished in {total:.2f}s")
+        for phase, seconds in self.phases:
+            print(f"   • {phase:<28} {seconds:6.2f}s")
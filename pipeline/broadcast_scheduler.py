@@ -0,0 +1,136 @@
+import asyncio
+import datetime
+import heapq
+import random
+import time
+
+from pipeline.send_scheduler import PRIORITY_BROADCAST
+
+
+def broadcast_due_key(group_key):
+    # last_read key holding the next due broadcast time (epoch seconds) for a group
+    return f"broadcast_due:{group_key}"
+
+
+# --- Per-group broadcast timers: one heap, sleeps exactly until the next group is due ---
+class BroadcastScheduler:
+    def __init__(self, send_scheduler, pitch_manager, last_read, resolve_entity, interval=24 * 3600, jitter=1800,
+                 retry_delay=600, max_retries=3, stagger=10):
+        self.send_scheduler = send_scheduler
+        self.pitch_manager = pitch_manager
+        self.last_read = last_read
+        self.resolve_entity = resolve_entity
+        self.interval = interval
+        self.jitter = jitter
+        self.retry_delay = retry_delay
+        self.max_retries = max_retries
+        self.stagger = stagger
+
+        self.groups = {}  # group_key -> group
+        self.failures = {}
+        self.in_flight = set()
+        self._tasks = set()
+        self._due = {}  # group_key -> current due time; heap entries that don't match are stale
+        self._heap = []  # (due, group_key)
+        self._wakeup = asyncio.Event()
+        self.sent = 0
+        self.failed = 0
+
+    def add_group(self, group_key, group, migrate=False):
+        # migrate: startup groups only; groups added at runtime never inherit the legacy timestamp
+        if group_key in self.groups:
+            return
+        self.groups[group_key] = group
+
+        due = self.last_read.get(broadcast_due_key(group_key))
+        if due is None:
+            due = (migrate and self._legacy_due()) or time.time() + self.stagger * len(self.groups)
+            self.last_read[broadcast_due_key(group_key)] = due  # Persisted, so the migration happens once
+        self._due[group_key] = due
+        heapq.heappush(self._heap, (due, group_key))
+        self._wakeup.set()
+
+    def remove_group(self, group_key):
+        # Its heap entry goes stale and is skipped when it comes up
+        self.groups.pop(group_key, None)
+        self.failures.pop(group_key, None)
+        self._due.pop(group_key, None)
+
+    def _legacy_due(self):
+        # One-time migration: startup groups with no per-group schedule inherit the old
+        # single-round timestamp, which is no longer written
+        last_group_message = self.last_read.get("last_group_message")
+        if not last_group_message:
+            return None
+        last = datetime.datetime.fromisoformat(last_group_message).timestamp()
+        return last + self.interval + random.uniform(0, self.jitter)
+
+    def _reschedule(self, group_key, due):
+        if group_key not in self.groups:
+            return
+        self.last_read[broadcast_due_key(group_key)] = due
+        self._due[group_key] = due
+        heapq.heappush(self._heap, (due, group_key))
+        self._wakeup.set()
+
+    async def run(self):
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            due, group_key = self._heap[0]
+            wait = due - time.time()
+            if wait > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._heap)
+            if self._due.get(group_key) != due or group_key in self.in_flight:
+                continue
+            # Sends are paced by the send scheduler, so due groups don't wait on each other here
+            self.in_flight.add(group_key)
+            task = asyncio.create_task(self._broadcast(group_key))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _broadcast(self, group_key):
+        group = self.groups.get(group_key)
+        try:
+            entity = await self.resolve_entity(group)
+            await self.send_scheduler.send(entity, self.pitch_manager.get_random_group_pitch(), priority=PRIORITY_BROADCAST)
+        except Exception as e:
+            self.failed += 1
+            attempts = self.failures.get(group_key, 0) + 1
+            if attempts <= self.max_retries:
+                self.failures[group_key] = attempts
+                delay = self.retry_delay * 2 ** (attempts - 1)
+                print(f"❌ Failed to send group message to {group}: {e} — retry {attempts} in {delay}s")
+            else:
+                self.failures.pop(group_key, None)
+                delay = self.interval + random.uniform(0, self.jitter)
+                print(f"❌ Failed to send group message to {group}: {e} — giving up until next round")
+            self._reschedule(group_key, time.time() + delay)
+            return
+        finally:
+            self.in_flight.discard(group_key)
+
+        self.sent += 1
+        self.failures.pop(group_key, None)
+        print(f"📣 Sent broadcast to group: {group}")
+        self._reschedule(group_key, time.time() + self.interval + random.uniform(0, self.jitter))
+
+    def stats(self):
+        next_due = min(self._due.values(), default=None)
+        return {
+            'groups': len(self.groups),
+            'sent': self.sent,
+            'failed': self.failed,
+            'retrying': len(self.failures),
+            'next_due_in': round(next_due - time.time()) if next_due else None,
+        }
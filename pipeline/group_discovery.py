@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+
+# --- In-bot dialog sync + registry hot reload. Incremental syncs page dialogs newest-first and
+# stop at the last sync (joining a group posts a service message, so new groups come first);
+# a periodic full sync also notices groups the account has left. ---
+class GroupDiscovery:
+    def __init__(self, client, registry, entity_cache, on_change, interval=600, full_interval=24 * 3600,
+                 poll_interval=30, auto_monitor=False, slack=300):
+        self.client = client
+        self.registry = registry
+        self.entity_cache = entity_cache
+        self.on_change = on_change  # async fn(added groups, removed groups)
+        self.interval = interval
+        self.full_interval = full_interval
+        self.poll_interval = poll_interval
+        self.auto_monitor = auto_monitor
+        self.slack = slack
+        self.monitored = {registry.key(group): group for group in registry.monitored()}
+        self.syncs = 0
+        self.dialogs_paged = 0
+
+    async def sync(self, full=False):
+        since = None if full or self.registry.synced_at is None else self.registry.synced_at - self.slack
+        entities = []
+        async for dialog in self.client.iter_dialogs(ignore_pinned=since is not None):
+            if since is not None and dialog.date and dialog.date.timestamp() < since:
+                break
+            entities.append(dialog.entity)
+        self.entity_cache.remember_many(entities)
+
+        added, removed = self.registry.apply_dialogs(entities, full=full, auto_monitor=self.auto_monitor)
+        self.syncs += 1
+        self.dialogs_paged += len(entities)
+        print(f"🛰️ Group sync ({'full' if full else 'incremental'}): {len(entities)} dialogs, "
+              f"{len(added)} new groups, {len(removed)} left")
+        await self.apply()
+
+    async def apply(self):
+        # Diffs the registry's monitored set against what the bot currently listens to
+        current = {self.registry.key(group): group for group in self.registry.monitored()}
+        added = [group for key, group in current.items() if key not in self.monitored]
+        removed = [group for key, group in self.monitored.items() if key not in current]
+        self.monitored = current
+        if added or removed:
+            await self.on_change(added, removed)
+
+    async def run(self):
+        next_sync = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if self.interval and now >= next_sync:
+                last_full = self.registry.full_synced_at
+                full = last_full is None or time.time() - last_full >= self.full_interval
+                try:
+                    await self.sync(full=full)
+                except Exception as e:
+                    print(f"⚠️ Group sync failed: {type(e).__name__} - {e}")
+                next_sync = now + self.interval
+            elif self.registry.reload():
+                print("📝 Group registry changed on disk, reloading")
+                await self.apply()
+            await asyncio.sleep(self.poll_interval)
+
+    def stats(self):
+        return {**self.registry.stats(), 'syncs': self.syncs, 'dialogs_paged': self.dialogs_paged}
@@ -0,0 +1,394 @@
+import asyncio
+import datetime
+import random
+import time
+from collections import Counter, defaultdict
+
+from classifier.offload import label_keywords
+from classifier.llm_classifier import classify_message_llm
+from classifier.model_classifier import score_message_model_batched, gate_model_score
+from constants.keywords import PRIVATE_GROUP_ID, MODEL_SKIP_LLM_ON_EMPLOYER
+from metrics import (
+    MESSAGES_RECEIVED, MESSAGES_DEDUPLICATED, STAGE_LATENCY, END_TO_END_LATENCY, TIER_DECISIONS, timed
+)
+from pipeline.send_scheduler import PRIORITY_DM, PRIORITY_NOTICE
+
+
+def high_water_key(group_key):
+    # last_read key holding the highest message ID the pipeline has handled in a chat
+    return f"min_id:{group_key}"
+
+
+class MessageJob:
+    __slots__ = ('chat_id', 'group_key', 'message_id', 'sender_id', 'sender', 'text', 'source', 'received_at',
+                 'keyword_label', 'near_tokens', 'near_entry', 'duplicate_of')
+
+    def __init__(self, chat_id, group_key, message_id, sender_id, sender, text, source='live'):
+        self.chat_id = chat_id
+        self.group_key = group_key  # last_read checkpoint key for the chat
+        self.message_id = message_id
+        self.sender_id = sender_id
+        self.sender = sender
+        self.text = text
+        self.source = source
+        self.received_at = time.monotonic()
+        self.keyword_label = None  # Set at ingest, so classify() doesn't repeat the keyword pass
+        self.near_tokens = None  # Masked token set, when the message was fingerprinted
+        self.near_entry = None  # Near-duplicate index entry this message decides
+        self.duplicate_of = None  # ...or the entry of the recent message it copies
+
+
+# --- Ingest -> classification workers -> outreach stage ---
+# Handlers only enqueue; classification runs on a worker pool, and the human-like delays
+# before each send are timers that release jobs to the outreach workers, not held sleeps.
+class MessagePipeline:
+    def __init__(self, client, send_scheduler, entity_cache, contact_manager, last_read, classify_workers=4,
+                 outreach_workers=2, queue_size=200, dm_delay=(5, 15), notice_delay=(2, 3), pitch_manager=None,
+                 skip_llm_on_employer=MODEL_SKIP_LLM_ON_EMPLOYER, near_duplicates=None):
+        self.client = client
+        self.send_scheduler = send_scheduler
+        self.entity_cache = entity_cache
+        self.contact_manager = contact_manager
+        self.last_read = last_read
+        self.classify_workers = classify_workers
+        self.outreach_workers = outreach_workers
+        self.dm_delay = dm_delay  # Human-like delay ranges (seconds)
+        self.notice_delay = notice_delay
+        # Confident model employers are DM'd a private pitch without asking the LLM (needs pitches)
+        self.pitch_manager = pitch_manager
+        self.skip_llm_on_employer = skip_llm_on_employer and pitch_manager is not None
+        self.near_duplicates = near_duplicates  # NearDuplicateIndex, or None to classify every copy
+        self.ingest_queue = asyncio.Queue(maxsize=queue_size)
+        self.outreach_queue = asyncio.Queue()
+        self.pending_timers = 0
+        # Per group: message IDs submitted but not done yet (a DM counts as done once sent),
+        # and the highest ID that is done; the persisted mark never passes a pending message
+        self._in_flight = defaultdict(Counter)
+        self._finished = {}
+        self._requeues = set()  # Copies on their way back into the ingest queue
+        self.counters = {'submitted': 0, 'deduplicated': 0, 'near_duplicate': 0, 'rejected': 0, 'classified': 0,
+                         'confirmed': 0, 'sent': 0, 'failed': 0}
+        self._tasks = []
+
+    def start(self):
+        for i in range(self.classify_workers):
+            self._tasks.append(asyncio.create_task(self._classify_worker(), name=f'classify-{i}'))
+        for i in range(self.outreach_workers):
+            self._tasks.append(asyncio.create_task(self._outreach_worker(), name=f'outreach-{i}'))
+        print(f"🧵 Pipeline started: {self.classify_workers} classify / {self.outreach_workers} outreach workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def join(self):
+        # Waits until everything enqueued so far has been classified (replay uses this),
+        # including near-duplicate copies sent back to be classified on their own
+        await self.ingest_queue.join()
+        while self._requeues:
+            await asyncio.wait(list(self._requeues))
+            await self.ingest_queue.join()
+
+    # --- Ingest stage ---
+    async def handle_event(self, event):
+        # NewMessage handler body; the sender entity is only resolved for messages that
+        # survive deduplication and the keyword tier
+        if event.sender_id is None:
+            return False  # Anonymous admin / channel post
+        return await self.submit(MessageJob(
+            chat_id=event.chat_id,
+            group_key=str(event.chat_id),
+            message_id=event.message.id,
+            sender_id=event.sender_id,
+            sender=None,
+            text=event.message.message or "",
+        ), get_sender=event.get_sender)
+
+    async def _early_reject(self, job):
+        # Checks that need neither the sender entity nor the network
+        if self.contact_manager.is_known(job.sender_id):
+            self._deduplicated(job)
+            return True
+
+        if self.near_duplicates is not None and self._check_near_duplicate(job):
+            return True
+        if job.duplicate_of is not None:
+            return False  # Inherits the original's decision; no classifier tier runs
+
+        try:
+            with timed(STAGE_LATENCY.labels('keyword')):
+                job.keyword_label = await label_keywords(job.text)
+        except BaseException:
+            self._settle(job.near_entry, None, decided=False)
+            raise
+        if job.keyword_label in ('barred', 'freelancer'):
+            print(f"🔍 Keyword-based label: {job.keyword_label}, skipping {job.sender_id}")
+            TIER_DECISIONS.labels('keyword', job.keyword_label).inc()
+            self.counters['rejected'] += 1
+            self._settle(job.near_entry, None)
+            return True
+        return False
+
+    def _check_near_duplicate(self, job):
+        # True if the message copies a recent one that was not an employer post
+        with timed(STAGE_LATENCY.labels('near_duplicate')):
+            signature = self.near_duplicates.fingerprint(job.text)
+            if signature is None:
+                return False
+            fingerprint, job.near_tokens = signature
+            entry = self.near_duplicates.lookup(fingerprint, job.near_tokens)
+            if entry is None:
+                job.near_entry = self.near_duplicates.add(fingerprint, job.near_tokens)
+                return False
+
+        if entry.decided and entry.response is None:
+            print(f"🪞 Near-duplicate of a rejected message, skipping {job.sender_id}")
+            self.counters['near_duplicate'] += 1
+            TIER_DECISIONS.labels('near_duplicate', 'not_employer').inc()
+            return True
+        job.duplicate_of = entry
+        return False
+
+    def _deduplicated(self, job):
+        print(f"⏩ Already messaged or processing {job.sender_id}, skipping...")
+        self.counters['deduplicated'] += 1
+        MESSAGES_DEDUPLICATED.inc()
+
+    async def submit(self, job, get_sender=None):
+        MESSAGES_RECEIVED.labels(job.source).inc()
+        self._track(job)
+        try:
+            return await self._submit(job, get_sender)
+        except BaseException:
+            self._done(job)
+            raise
+
+    async def _submit(self, job, get_sender):
+        if await self._early_reject(job):
+            self._done(job)
+            return False
+
+        try:
+            if get_sender is not None:
+                job.sender = await get_sender()
+
+            # Checked again after the await; with several workers this also claims the sender in the shared store
+            claimed = self.contact_manager.try_claim(job.sender_id)
+        except BaseException:
+            self._settle(job.near_entry, None, decided=False)
+            raise
+        if not claimed:
+            self._deduplicated(job)
+            self._settle(job.near_entry, None, decided=False)
+            self._done(job)
+            return False
+
+        self.counters['submitted'] += 1
+        if job.duplicate_of is not None:
+            self._inherit(job)  # Done once it has the original's decision (and any DM is sent)
+            return True
+        await self.ingest_queue.put(job)  # Blocks the producer when the queue is full (backpressure)
+        return True
+
+    # --- Near-duplicates: copies take the original's decision instead of being classified ---
+    def _inherit(self, job):
+        entry = job.duplicate_of
+        if not entry.decided:
+            entry.waiters.append(job)  # Settled when the original's classification finishes
+            return
+        if entry.response is not None and job.near_tokens != entry.tokens:
+            # An employer DM is only reused when the copy differs in links, handles, numbers
+            # or emoji alone; one changed word can be the one that made it a job post
+            self._classify_alone(job)
+            return
+        self.counters['near_duplicate'] += 1
+        TIER_DECISIONS.labels('near_duplicate', 'employer' if entry.response else 'not_employer').inc()
+        print(f"🪞 Near-duplicate from {job.sender_id}, reusing the earlier decision")
+        self._apply_decision(job, entry.response)
+
+    def _settle(self, entry, response, decided=True):
+        if entry is None:
+            return
+        for job in self.near_duplicates.settle(entry, response, decided):
+            if decided:
+                self._inherit(job)
+            else:
+                self._classify_alone(job)  # The original never got a decision
+
+    def _classify_alone(self, job):
+        # Stays in flight (holding the replay mark) until a worker has classified it
+        job.duplicate_of = None
+        task = asyncio.ensure_future(self.ingest_queue.put(job))
+        self._requeues.add(task)
+        task.add_done_callback(self._requeues.discard)
+
+    def _apply_decision(self, job, response):
+        if response is None:
+            self.contact_manager.release(job.sender_id)
+            self._done(job)
+        else:
+            self.counters['confirmed'] += 1
+            self._schedule(random.randint(*self.dm_delay), ('dm', job, response))  # Human-like delay
+
+    # --- Classification stage ---
+    async def _classify_worker(self):
+        while True:
+            job = await self.ingest_queue.get()
+            try:
+                response = await self.classify(job)
+                self.counters['classified'] += 1
+                self._apply_decision(job, response)
+                self._settle(job.near_entry, response)
+            except Exception as e:
+                print(f"⚠️ Failed to classify message {job.message_id} from {job.sender_id}: {e}")
+                self.contact_manager.release(job.sender_id)
+                self._settle(job.near_entry, None, decided=False)
+                self._done(job)
+            finally:
+                self.ingest_queue.task_done()
+
+    # --- Replay high-water mark: the highest message ID below every one still in flight, so a
+    # crash never skips a message that was queued, being classified or waiting on its DM ---
+    def _track(self, job):
+        self._in_flight[job.group_key][job.message_id] += 1
+
+    def _done(self, job):
+        group_key = job.group_key
+        pending = self._in_flight[group_key]
+        pending[job.message_id] -= 1
+        if pending[job.message_id] <= 0:
+            del pending[job.message_id]
+
+        finished = max(self._finished.get(group_key, 0), job.message_id)
+        self._finished[group_key] = finished
+        mark = min(finished, min(pending) - 1) if pending else finished
+        key = high_water_key(group_key)
+        if mark > self.last_read.get(key, 0):
+            self.last_read[key] = mark
+
+    async def classify(self, job):
+        # Returns the DM text for a confirmed employer message, otherwise None
+        text = job.text
+
+        # Step 1: Keyword classification (normally already done at ingest)
+        label = job.keyword_label
+        if label is None:
+            with timed(STAGE_LATENCY.labels('keyword')):
+                label = await label_keywords(text)
+        print(f"🔍 Keyword-based label: {label}")
+        tier = 'keyword'
+
+        # Step 2: Model fallback if unsure, gated on its confidence
+        if label == 'unsure':
+            with timed(STAGE_LATENCY.labels('model')):
+                label, p_employer = await score_message_model_batched(text)
+            gate = gate_model_score(p_employer)
+            print(f"🤖 Model-based label: {label} (p_employer={p_employer:.2f}, {gate})")
+            tier = 'model'
+
+            if gate == 'reject':
+                TIER_DECISIONS.labels(tier, 'not_employer').inc()
+                return None
+            if gate == 'employer' and self.skip_llm_on_employer:
+                TIER_DECISIONS.labels(tier, 'employer').inc()
+                print(f"💼 Confident model employer, skipping LLM for {job.sender_id}: {text[:60]}...")
+                return self.pitch_manager.get_random_private_pitch()
+            label = 'employer'  # Uncertain band (or confident employer) -> the LLM decides
+
+        # Step 3: Use LLM only for employer messages
+        if label != 'employer':
+            TIER_DECISIONS.labels(tier, label).inc()
+            return None
+
+        with timed(STAGE_LATENCY.labels('llm')):
+            # An empty ingest queue means no other message is coming to share the batch
+            llm_result = await classify_message_llm(text, flush=self.ingest_queue.empty())
+        confirmed_label = llm_result.get("label")
+        TIER_DECISIONS.labels('llm', confirmed_label).inc()
+        reason = llm_result.get("reason", "No reason provided")
+        response = llm_result.get("response", "No response provided")
+
+        if confirmed_label != 'employer':
+            print(f"❌ LLM disagreed. Ignoring message. LLM said: {confirmed_label} | Reason: {reason}")
+            return None
+
+        print(f"✅ LLM confirmed employer message: {reason}")
+        print(f"💼 Detected employer message from {job.sender_id}: {text[:60]}...")
+        return response
+
+    # --- Outreach stage ---
+    def _schedule(self, delay, item):
+        self.pending_timers += 1
+
+        def release():
+            self.pending_timers -= 1
+            self.outreach_queue.put_nowait(item)
+
+        asyncio.get_running_loop().call_later(delay, release)
+
+    async def _outreach_worker(self):
+        while True:
+            kind, job, payload = await self.outreach_queue.get()
+            try:
+                if kind == 'dm':
+                    await self._send_dm(job, payload)
+                else:
+                    await self._send_notice(job, payload)
+            except Exception as e:
+                print(f"⚠️ Outreach step '{kind}' failed for {job.sender_id}: {e}")
+            finally:
+                if kind == 'dm':
+                    self._done(job)  # Sent or given up on: replay no longer needs it
+                self.outreach_queue.task_done()
+
+    async def _send_dm(self, job, response):
+        sender_id = job.sender_id
+        try:
+            user_info = await self.contact_manager.get_or_cache_user(self.client, sender_id, job.sender)
+            if not user_info:
+                print(f"⚠️ Could not get contact info for {sender_id} — will try to send message anyway.")
+            else:
+                print(f"✅ Got user info for {sender_id}: {user_info}")
+
+            # Only senders the bot messages are cached, not everyone who posts in a group
+            self.entity_cache.remember(job.sender)
+            peer = await self.entity_cache.get_input_peer(sender_id)
+            with timed(STAGE_LATENCY.labels('dm')):
+                await self.send_scheduler.send(peer, response, reply_to=job.message_id, priority=PRIORITY_DM)
+        except Exception as e:
+            print(f"⚠️ Failed to message {sender_id}: {e}")
+            self.counters['failed'] += 1
+            self.contact_manager.release(sender_id)
+            self._schedule(0, ('notice', job, False))
+            return
+
+        self.counters['sent'] += 1
+        END_TO_END_LATENCY.observe(time.monotonic() - job.received_at)
+        self.contact_manager.add_messaged_user(sender_id)
+        self.contact_manager.release(sender_id)
+        name = (user_info.username or user_info.full_name) if user_info else sender_id
+        prefix = "[Replay] " if job.source == 'replay' else ""
+        print(f"💬 {prefix}Messaged: {name} (ID: {sender_id})")
+
+        self.last_read[job.group_key] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        self._schedule(random.randint(*self.notice_delay), ('notice', job, True))  # Human-like delay
+
+    async def _send_notice(self, job, sent):
+        sender_id = job.sender_id
+        if sent:
+            notice = f'📢 You just texted [this employer](tg://user?id={sender_id}) regarding a job.\n\nMessage: "{job.text}"'
+        else:
+            notice = f'📢 You just tried to text [this employer](tg://user?id={sender_id}) regarding a job, but failed.\n\nMessage: "{job.text}"'
+        peer = await self.entity_cache.get_input_peer(PRIVATE_GROUP_ID)
+        await self.send_scheduler.send(peer, notice, parse_mode='markdown', priority=PRIORITY_NOTICE)
+
+    def stats(self):
+        return {
+            **self.counters,
+            'ingest_queue': self.ingest_queue.qsize(),
+            'outreach_queue': self.outreach_queue.qsize(),
+            'pending_timers': self.pending_timers,
+            **({'near_duplicates': self.near_duplicates.stats()} if self.near_duplicates is not None else {}),
+        }
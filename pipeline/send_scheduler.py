@@ -0,0 +1,216 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+from telethon import utils
+from telethon.errors import FloodWaitError, SlowModeWaitError
+
+from metrics import SENDS, SEND_QUEUE_LATENCY
+
+# Priority classes, lowest value goes first
+PRIORITY_DM = 0
+PRIORITY_NOTICE = 1
+PRIORITY_BROADCAST = 2
+PRIORITY_NAMES = {PRIORITY_DM: 'dm', PRIORITY_NOTICE: 'notice', PRIORITY_BROADCAST: 'broadcast'}
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def ready_in(self, now):
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+
+class SendRequest:
+    __slots__ = ('destination', 'args', 'kwargs', 'priority', 'future', 'enqueued_at', 'attempts')
+
+    def __init__(self, destination, args, kwargs, priority, future):
+        self.destination = destination
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+
+
+# --- Single outbound path: global + per-destination token buckets, priorities, FloodWait back-off ---
+class SendScheduler:
+    def __init__(self, client, global_rate=1.0, global_burst=3, per_chat_rate=0.2, per_chat_burst=2, max_retries=3):
+        self.client = client
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.max_retries = max_retries
+        self.chat_buckets = {}
+        self.paused_until = 0.0  # Global FloodWait
+        self.chat_paused_until = {}  # Slow mode / per-chat waits
+
+        self._queue = []  # heap of (priority, seq, request)
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+        self.started_at = time.monotonic()
+        self.sent = dict.fromkeys(PRIORITY_NAMES.values(), 0)
+        self.failed = 0
+        self.flood_waits = 0
+        self.flood_wait_seconds = 0
+        self.queue_latency_total = 0.0
+        self.queue_latency_max = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._dispatch_loop(), name='send-scheduler')
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for _, _, request in self._queue:
+            if not request.future.done():
+                request.future.cancel()
+        self._queue.clear()
+
+    async def send(self, destination, *args, priority=PRIORITY_DM, **kwargs):
+        # Same arguments as client.send_message; resolves once the message actually went out
+        future = asyncio.get_running_loop().create_future()
+        self._push(SendRequest(destination, args, kwargs, priority, future))
+        return await future
+
+    @property
+    def queue_depth(self):
+        # Sends waiting for a token or a flood/slow-mode wait to pass
+        return len(self._queue)
+
+    def _push(self, request):
+        heapq.heappush(self._queue, (request.priority, next(self._seq), request))
+        self._wakeup.set()
+
+    @staticmethod
+    def _chat_key(destination):
+        # Same key whether a chat is addressed by ID, entity or input peer
+        try:
+            return utils.get_peer_id(destination)
+        except (TypeError, ValueError):
+            return str(destination)
+
+    def _chat_bucket(self, destination):
+        key = self._chat_key(destination)
+        bucket = self.chat_buckets.get(key)
+        if bucket is None:
+            bucket = self.chat_buckets[key] = TokenBucket(self.per_chat_rate, self.per_chat_burst)
+        return bucket
+
+    def _next_ready(self, now):
+        # Highest-priority request whose destination can send now; otherwise the shortest wait
+        global_wait = max(self.global_bucket.ready_in(now), self.paused_until - now)
+        if global_wait > 0:
+            return None, global_wait
+
+        shortest = None
+        for entry in sorted(self._queue):
+            request = entry[2]
+            key = self._chat_key(request.destination)
+            wait = max(self._chat_bucket(request.destination).ready_in(now), self.chat_paused_until.get(key, 0) - now)
+            if wait <= 0:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                return request, 0.0
+            shortest = wait if shortest is None else min(shortest, wait)
+        return None, shortest
+
+    async def _dispatch_loop(self):
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            request, wait = self._next_ready(time.monotonic())
+            if request is None:
+                # Sleep until a bucket refills, but wake early if a new (maybe higher-priority) send arrives
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            if request.future.cancelled():
+                continue
+            await self._deliver(request)
+
+    async def _deliver(self, request):
+        kind = PRIORITY_NAMES.get(request.priority, str(request.priority))
+        now = time.monotonic()
+        self.global_bucket.consume(now)
+        self._chat_bucket(request.destination).consume(now)
+        request.attempts += 1
+
+        try:
+            result = await self.client.send_message(request.destination, *request.args, **request.kwargs)
+        except (FloodWaitError, SlowModeWaitError) as e:
+            SENDS.labels(kind, 'flood_wait').inc()
+            self.flood_waits += 1
+            self.flood_wait_seconds += e.seconds
+            if isinstance(e, FloodWaitError):
+                self.paused_until = time.monotonic() + e.seconds
+                print(f"🌊 FloodWait: pausing all sends for {e.seconds}s")
+            else:
+                self.chat_paused_until[self._chat_key(request.destination)] = time.monotonic() + e.seconds
+                print(f"🐌 Slow mode in {request.destination}: waiting {e.seconds}s")
+
+            if request.attempts <= self.max_retries:
+                self._push(request)
+            else:
+                self.failed += 1
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        except Exception as e:
+            SENDS.labels(kind, 'error').inc()
+            self.failed += 1
+            if not request.future.done():
+                request.future.set_exception(e)
+            return
+
+        latency = time.monotonic() - request.enqueued_at
+        self.queue_latency_total += latency
+        self.queue_latency_max = max(self.queue_latency_max, latency)
+        SENDS.labels(kind, 'ok').inc()
+        SEND_QUEUE_LATENCY.labels(kind).observe(latency)
+        self.sent[kind] = self.sent.get(kind, 0) + 1
+        if not request.future.done():
+            request.future.set_result(result)
+
+    def stats(self):
+        total_sent = sum(self.sent.values())
+        uptime = time.monotonic() - self.started_at
+        return {
+            'sent': dict(self.sent),
+            'failed': self.failed,
+            'queued': self.queue_depth,
+            'flood_waits': self.flood_waits,
+            'flood_wait_seconds': self.flood_wait_seconds,
+            'throughput_per_min': round(total_sent / uptime * 60, 2) if uptime else 0.0,
+            'avg_queue_latency': round(self.queue_latency_total / total_sent, 2) if total_sent else 0.0,
+            'max_queue_latency': round(self.queue_latency_max, 2),
+        }
@@ -0,0 +1,98 @@
+import datetime
+import glob
+import hashlib
+import json
+from pathlib import Path
+
+from telethon.tl.types import PeerChat
+
+
+# --- Group <-> string, for WORKER_GROUPS and shard hashing ---
+def format_group(group):
+    if isinstance(group, PeerChat):
+        return f"chat:{group.chat_id}"
+    return str(group)
+
+
+def parse_group(value):
+    value = value.strip()
+    if value.startswith('chat:'):
+        return PeerChat(int(value[5:]))
+    return int(value)
+
+
+def format_groups(groups):
+    return ','.join(format_group(group) for group in groups)
+
+
+def parse_groups(value):
+    return [parse_group(part) for part in value.split(',') if part.strip()]
+
+
+# --- Rendezvous hashing: each group goes to the highest-scoring live worker, so when a
+# worker joins or leaves only the groups it owns (or takes) move ---
+def _score(worker, group):
+    return hashlib.sha1(f"{worker}:{format_group(group)}".encode()).digest()
+
+
+def assign_groups(groups, workers):
+    assignment = {worker: [] for worker in workers}
+    if not workers:
+        return assignment
+    for group in groups:
+        owner = max(workers, key=lambda worker: _score(worker, group))
+        assignment[owner].append(group)
+    return assignment
+
+
+# --- Per-worker state files ---
+def worker_path(path, worker_id):
+    # data/last_read.json -> data/last_read.<worker>.json; unchanged for a single process
+    path = Path(path)
+    if worker_id is None:
+        return path
+    return path.with_name(f"{path.stem}.{worker_id}{path.suffix}")
+
+
+def _portable(key):
+    # Message IDs are global only in channels/supergroups (-100...). Basic groups number messages
+    # per account, so another worker's `min_id:` mark (high_water_key) would skip or repeat
+    # messages; those groups resume from the timestamp checkpoint instead.
+    return not key.startswith('min_id:') or key[len('min_id:'):].startswith('-100')
+
+
+def _newer(value, current):
+    # Numbers (message IDs, due times) or ISO timestamps (the legacy per-group checkpoint)
+    if current is None:
+        return isinstance(value, (int, float, str))
+    if isinstance(value, (int, float)) and isinstance(current, (int, float)):
+        return value > current
+    if isinstance(value, str) and isinstance(current, str):
+        try:
+            return datetime.datetime.fromisoformat(value) > datetime.datetime.fromisoformat(current)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def seed_checkpoints(last_read, keys, pattern):
+    # A group that moved between workers keeps its replay position and broadcast schedule:
+    # take the newest value for each key across every worker's checkpoint file
+    keys = [key for key in keys if _portable(key)]
+    merged = {}
+    for other in glob.glob(str(pattern)):
+        if Path(other) == last_read.path:
+            continue
+        try:
+            with open(other, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        for key in keys:
+            value = data.get(key)
+            if value is not None and _newer(value, merged.get(key)):
+                merged[key] = value
+
+    updates = {key: value for key, value in merged.items() if _newer(value, last_read.get(key))}
+    last_read.update(updates)
+    return len(updates)
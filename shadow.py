@@ -0,0 +1,261 @@
+import argparse
+import asyncio
+import functools
+import json
+import sys
+import time
+from collections import Counter
+
+from classifier.keyword_classifier import label_message_keywords
+from classifier.model_classifier import score_messages_model, gate_model_score, load_models
+from classifier.verdict_cache import VerdictCache, VERDICT_CACHE_FILE
+from constants.keywords import LLM_CACHE_SIZE, LLM_CACHE_TTL, MODEL_SKIP_LLM_ON_EMPLOYER
+
+# Offline shadow run: streams an exported message dump through the classifier tiers
+# without Telegram, sends or human-like delays, and reports what each tier would decide.
+#
+#   python shadow.py export.jsonl [--llm off|cache|live] [--out labels.jsonl]
+#
+# One JSON object per line with "text" (or "message"); "id", "chat_id", "sender_id" are
+# passed through, and an optional "label" is treated as ground truth.
+
+CONFIDENT_LABELS = {'employer', 'freelancer'}
+
+
+def read_export(path):
+    with (sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            text = row.get('text', row.get('message')) or ''
+            if isinstance(text, list):
+                # Telegram Desktop exports rich text as a list of strings and entity dicts
+                text = ''.join(part if isinstance(part, str) else part.get('text', '') for part in text)
+            row['text'] = text
+            yield row
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# --- Per-tier labels, agreement and cost ---
+class ShadowStats:
+    def __init__(self):
+        self.total = 0
+        self.decided_by = Counter()  # tier -> messages it decided (before the LLM)
+        self.labels = {'keyword': Counter(), 'model': Counter(), 'decision': Counter(), 'llm': Counter()}
+        self.agreement = Counter()  # '<a>_vs_<b>' -> agreements, '<a>_vs_<b>_n' -> comparisons
+        self.truth = Counter()  # '<tier>' -> correct, '<tier>_n' -> labelled messages seen
+        self.llm_needed = 0
+        self.llm_cache_hits = 0
+        self.llm_calls = 0
+        self.seconds = Counter()
+
+    def compare(self, name, a, b):
+        self.agreement[name + '_n'] += 1
+        self.agreement[name] += a == b
+
+    def score(self, tier, predicted, truth):
+        self.truth[tier + '_n'] += 1
+        self.truth[tier] += predicted == truth
+
+    def rate(self, counter, name):
+        seen = counter[name + '_n']
+        return f"{counter[name] / seen:.1%} of {seen}" if seen else "n/a"
+
+    def report(self, elapsed):
+        non_llm = self.seconds['keyword'] + self.seconds['model']
+        lines = [
+            f"📼 Shadow run: {self.total} messages in {elapsed:.2f}s ({self.total / elapsed:,.0f} msg/s overall)",
+            f"⚡ Keyword + model tiers: {self.total / non_llm:,.0f} msg/s "
+            f"(keyword {self.seconds['keyword']:.2f}s, model {self.seconds['model']:.2f}s, "
+            f"llm {self.seconds['llm']:.2f}s, io {self.seconds['io']:.2f}s)" if non_llm else "",
+            f"🔍 Keyword labels: {dict(self.labels['keyword'])}",
+            f"🤖 Model labels: {dict(self.labels['model'])}",
+            f"🧭 Decided by: {dict(self.decided_by)} -> {dict(self.labels['decision'])}",
+            f"🤝 Keyword vs model (keyword confident): {self.rate(self.agreement, 'keyword_vs_model')}",
+            f"🤝 Pre-LLM employer confirmed by LLM: {self.rate(self.agreement, 'decision_vs_llm')}",
+            f"💸 LLM: {self.llm_needed} employer candidates, {self.llm_cache_hits} cached, "
+            f"{self.llm_calls} calls made, {self.llm_needed - self.llm_cache_hits - self.llm_calls} unresolved",
+            f"🧾 LLM labels: {dict(self.labels['llm'])}",
+        ]
+        if self.truth:
+            lines.append(
+                "🎯 Accuracy vs export labels: "
+                f"keyword (confident) {self.rate(self.truth, 'keyword')}, model {self.rate(self.truth, 'model')}, "
+                f"pre-LLM {self.rate(self.truth, 'decision')}, final {self.rate(self.truth, 'final')}"
+            )
+        return '\n'.join(line for line in lines if line)
+
+
+# --- LLM tier: only for messages the cheaper tiers call employer, as in the bot ---
+@functools.lru_cache(maxsize=None)
+def saved_verdicts():
+    # Cache mode reads the bot's verdict files (one per worker) directly, so it runs without a .env
+    return VerdictCache(max_size=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL,
+                        seed_pattern=VERDICT_CACHE_FILE.with_name('llm_verdicts*.json'))
+
+
+async def resolve_llm(texts, mode, stats, concurrency):
+    # Returns {text: verdict} for whatever could be resolved in this mode
+    if mode == 'off' or not texts:
+        return {}
+    if mode == 'live':
+        from classifier import llm_classifier  # Needs the .env (API keys) only when used
+        cache = llm_classifier.verdict_cache
+    else:
+        cache = saved_verdicts()
+
+    verdicts = {}
+    misses = []
+    for text in dict.fromkeys(texts):
+        cached = cache.get(text)
+        if cached is not None:
+            verdicts[text] = cached
+        else:
+            misses.append(text)
+    stats.llm_cache_hits += sum(1 for text in texts if text in verdicts)
+
+    if mode == 'live' and misses:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(text):
+            async with semaphore:
+                verdicts[text] = await llm_classifier.classify_message_llm(text)
+
+        await asyncio.gather(*(call(text) for text in misses))
+        stats.llm_calls += len(misses)
+    return verdicts
+
+
+async def run(args):
+    stats = ShadowStats()
+    out = None
+    if args.out:
+        out = sys.stdout if args.out == '-' else open(args.out, 'w', encoding='utf-8')
+
+    load_models()
+    start = time.perf_counter()
+    chunks = chunked(read_export(args.export), args.chunk_size)
+    try:
+        while True:
+            tick = time.perf_counter()
+            chunk = next(chunks, None)
+            stats.seconds['io'] += time.perf_counter() - tick
+            if chunk is None:
+                break
+            await process_chunk(chunk, args, stats, out)
+    finally:
+        if out is not None and out is not sys.stdout:
+            out.close()
+        if args.llm == 'live':
+            from classifier.llm_classifier import close_llm_clients
+            await close_llm_clients()
+
+    print(stats.report(time.perf_counter() - start), file=sys.stderr if args.out == '-' else sys.stdout)
+
+
+async def process_chunk(chunk, args, stats, out):
+    texts = [row['text'] for row in chunk]
+
+    tick = time.perf_counter()
+    keyword_labels = [label_message_keywords(text) for text in texts]
+    stats.seconds['keyword'] += time.perf_counter() - tick
+
+    # The bot only asks the model about 'unsure' messages; shadow mode scores every message
+    # (one batched transform) so keyword/model agreement can be measured too
+    tick = time.perf_counter()
+    scores = score_messages_model(texts) if texts else []
+    stats.seconds['model'] += time.perf_counter() - tick
+    model_labels = [label for label, _ in scores]
+    gates = [gate_model_score(p_employer) for _, p_employer in scores]
+
+    # Same thresholds as the pipeline: rejects never reach the LLM, the uncertain band (and
+    # confident employers, unless MODEL_SKIP_LLM_ON_EMPLOYER) is settled by it
+    decisions = []
+    skip_llm = set()
+    for i, (keyword_label, gate) in enumerate(zip(keyword_labels, gates)):
+        if keyword_label != 'unsure':
+            decisions.append(('keyword', keyword_label))
+        elif gate == 'reject':
+            decisions.append(('model', 'freelancer'))
+        else:
+            decisions.append(('model', 'employer'))
+            if gate == 'employer' and MODEL_SKIP_LLM_ON_EMPLOYER:
+                skip_llm.add(i)
+
+    tick = time.perf_counter()
+    candidates = [
+        text for i, (text, (_, label)) in enumerate(zip(texts, decisions)) if label == 'employer' and i not in skip_llm
+    ]
+    stats.llm_needed += len(candidates)
+    verdicts = await resolve_llm(candidates, args.llm, stats, args.llm_concurrency)
+    stats.seconds['llm'] += time.perf_counter() - tick
+
+    for i, (row, text, keyword_label, model_label, (tier, decision)) in enumerate(zip(
+        chunk, texts, keyword_labels, model_labels, decisions
+    )):
+        stats.total += 1
+        stats.labels['keyword'][keyword_label] += 1
+        stats.labels['model'][model_label] += 1
+        stats.labels['decision'][decision] += 1
+        stats.decided_by[tier] += 1
+        if keyword_label in CONFIDENT_LABELS:
+            stats.compare('keyword_vs_model', keyword_label, model_label)
+
+        final = decision
+        llm_label = None
+        if decision == 'employer' and i not in skip_llm and text in verdicts:
+            llm_label = verdicts[text].get('label')
+            stats.labels['llm'][llm_label] += 1
+            stats.compare('decision_vs_llm', decision, llm_label)
+            final = llm_label
+
+        truth = row.get('label')
+        if truth:
+            if keyword_label in CONFIDENT_LABELS:
+                stats.score('keyword', keyword_label, truth)
+            stats.score('model', model_label, truth)
+            stats.score('decision', decision, truth)
+            stats.score('final', final, truth)
+
+        if out is not None:
+            out.write(json.dumps({
+                'id': row.get('id'),
+                'chat_id': row.get('chat_id'),
+                'sender_id': row.get('sender_id'),
+                'keyword': keyword_label,
+                'model': model_label,
+                'p_employer': round(scores[i][1], 4),
+                'gate': gates[i],
+                'tier': tier,
+                'decision': decision,
+                'llm': llm_label,
+                'final': final,
+            }) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay an exported message dump through the classifiers, sending nothing")
+    parser.add_argument('export', help="JSONL message export ('-' for stdin)")
+    parser.add_argument('--llm', choices=['off', 'cache', 'live'], default='cache',
+                        help="off: skip the LLM tier; cache: verdict cache only; live: call providers on cache misses")
+    parser.add_argument('--llm-concurrency', type=int, default=4)
+    parser.add_argument('--out', help="write per-message labels as JSONL ('-' for stdout)")
+    parser.add_argument('--chunk-size', type=int, default=4096)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import time
+from collections import deque
+
+from constants.keywords import (
+    GROUPS, SUPERVISOR_RESTART_DELAY, SUPERVISOR_MAX_RESTARTS, SUPERVISOR_RESTART_WINDOW, SUPERVISOR_REVIVE_AFTER,
+    GROUP_REGISTRY_POLL
+)
+from managers.group_registry import GroupRegistry
+from pipeline.sharding import assign_groups, format_groups, format_group
+
+# Runs one bot process per Telegram session, each owning a shard of the monitored groups
+# (GROUPS plus anything enabled in data/groups.json, e.g. by getgroups.py or by hand):
+#
+#   python supervisor.py account1 account2 account3
+#
+# Each session must already be logged in (run main.py once with SESSION_NAME=<session>).
+# Workers share data/contacts.db, so two workers never DM the same user.
+
+
+class Worker:
+    def __init__(self, session, index):
+        self.session = session
+        self.index = index
+        self.process = None
+        self.groups = []
+        self.exits = deque()  # monotonic times of recent unexpected exits
+        self.restart_at = None
+        self.dead_until = None
+
+    @property
+    def alive(self):
+        return self.dead_until is None
+
+
+class Supervisor:
+    def __init__(self, sessions, groups=GROUPS, restart_delay=SUPERVISOR_RESTART_DELAY,
+                 max_restarts=SUPERVISOR_MAX_RESTARTS, restart_window=SUPERVISOR_RESTART_WINDOW,
+                 revive_after=SUPERVISOR_REVIVE_AFTER, stop_timeout=30, registry=None, poll_interval=GROUP_REGISTRY_POLL):
+        self.workers = [Worker(session, index) for index, session in enumerate(sessions)]
+        self.registry = registry
+        self.groups = registry.monitored() if registry is not None else list(groups)
+        self.poll_interval = poll_interval
+        self.restart_delay = restart_delay
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.revive_after = revive_after
+        self.stop_timeout = stop_timeout
+
+    async def spawn(self, worker):
+        env = {
+            **os.environ,
+            'WORKER_ID': worker.session,
+            'WORKER_INDEX': str(worker.index),
+            'SESSION_NAME': worker.session,
+            'WORKER_GROUPS': format_groups(worker.groups),
+        }
+        worker.process = await asyncio.create_subprocess_exec(sys.executable, 'main.py', env=env)
+        print(f"🚀 Started worker {worker.session} (pid {worker.process.pid}) with {len(worker.groups)} groups")
+
+    async def stop(self, worker):
+        process, worker.process = worker.process, None
+        if process is None or process.returncode is not None:
+            return
+        process.send_signal(signal.SIGINT)  # Lets main.py flush checkpoints and release claims
+        try:
+            await asyncio.wait_for(process.wait(), timeout=self.stop_timeout)
+        except asyncio.TimeoutError:
+            print(f"🔪 Worker {worker.session} did not stop in {self.stop_timeout}s, killing it")
+            process.kill()
+            await process.wait()
+
+    async def rebalance(self):
+        live = [worker for worker in self.workers if worker.alive]
+        assignment = assign_groups(self.groups, [worker.session for worker in live])
+        for worker in self.workers:
+            groups = assignment.get(worker.session, [])
+            if not worker.alive:
+                worker.groups = []
+                continue
+            if worker.process is not None and groups == worker.groups:
+                continue
+            # A worker only learns its groups at startup, so changed shards mean a restart;
+            # replay picks up anything posted in between from the moved checkpoints
+            await self.stop(worker)
+            worker.groups = groups
+            worker.restart_at = None
+            await self.spawn(worker)
+        print(f"🧩 Shards: { {w.session: len(w.groups) for w in self.workers} }")
+
+    def _record_exit(self, worker, now):
+        code = worker.process.returncode
+        worker.process = None
+        worker.exits.append(now)
+        while worker.exits and now - worker.exits[0] > self.restart_window:
+            worker.exits.popleft()
+
+        if len(worker.exits) > self.max_restarts:
+            worker.exits.clear()
+            worker.dead_until = now + self.revive_after
+            print(f"💀 Worker {worker.session} exited {self.max_restarts + 1} times in {self.restart_window}s "
+                  f"(last code {code}); moving its groups to the other workers")
+            return True
+
+        worker.restart_at = now + self.restart_delay
+        print(f"⚠️ Worker {worker.session} exited with code {code}, restarting in {self.restart_delay}s")
+        return False
+
+    def _reload_groups(self):
+        # True if the registry's monitored set changed; rendezvous hashing keeps the move minimal
+        if self.registry is None or not self.registry.reload():
+            return False
+        groups = self.registry.monitored()
+        if {format_group(group) for group in groups} == {format_group(group) for group in self.groups}:
+            return False
+        print(f"📝 Group registry changed: {len(self.groups)} -> {len(groups)} groups")
+        self.groups = groups
+        return True
+
+    async def run(self):
+        await self.rebalance()
+        next_poll = time.monotonic() + self.poll_interval
+        while True:
+            await asyncio.sleep(1)
+            now = time.monotonic()
+            changed = False
+            if now >= next_poll:
+                next_poll = now + self.poll_interval
+                changed = self._reload_groups()
+            for worker in self.workers:
+                if worker.process is not None and worker.process.returncode is not None:
+                    changed |= self._record_exit(worker, now)
+                elif not worker.alive and now >= worker.dead_until:
+                    print(f"🩹 Giving worker {worker.session} another chance")
+                    worker.dead_until = None
+                    changed = True
+                elif worker.alive and worker.process is None and worker.restart_at and now >= worker.restart_at:
+                    worker.restart_at = None
+                    await self.spawn(worker)
+            if changed:
+                await self.rebalance()
+
+    async def shutdown(self):
+        await asyncio.gather(*(self.stop(worker) for worker in self.workers))
+
+
+async def main(sessions):
+    registry = GroupRegistry(config_groups=GROUPS)
+    supervisor = Supervisor(sessions, registry=registry)
+    try:
+        await supervisor.run()
+    finally:
+        print("🛑 Stopping workers...")
+        await supervisor.shutdown()
+        await registry.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run one bot worker per Telegram session, sharding the groups")
+    parser.add_argument('sessions', nargs='+', help="session names, one per worker account")
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.sessions))
+    except KeyboardInterrupt:
+        print("\n🛑 Supervisor stopped by user")
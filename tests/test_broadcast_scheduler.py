@@ -0,0 +1,29 @@
+import datetime
+import time
+
+from pipeline.broadcast_scheduler import BroadcastScheduler, broadcast_due_key
+
+INTERVAL = 24 * 3600
+
+
+def make_scheduler(last_read):
+    return BroadcastScheduler(None, None, last_read, None, interval=INTERVAL, jitter=0, stagger=10)
+
+
+def test_legacy_timestamp_only_seeds_startup_groups():
+    sent_at = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=1)
+    last_read = {"last_group_message": sent_at.isoformat()}
+    scheduler = make_scheduler(last_read)
+
+    scheduler.add_group('-1001', -1001, migrate=True)
+    scheduler.add_group('-1002', -1002)  # Added at runtime
+
+    assert last_read[broadcast_due_key('-1001')] == sent_at.timestamp() + INTERVAL
+    assert last_read[broadcast_due_key('-1002')] < time.time() + 60
+
+
+def test_persisted_due_time_wins_over_the_legacy_timestamp():
+    last_read = {"last_group_message": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                 broadcast_due_key('-1001'): 123.0}
+    make_scheduler(last_read).add_group('-1001', -1001, migrate=True)
+    assert last_read[broadcast_due_key('-1001')] == 123.0
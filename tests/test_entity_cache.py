@@ -0,0 +1,42 @@
+import asyncio
+import json
+import time
+
+from telethon.tl.types import Channel, ChatPhotoEmpty, User
+
+from managers.entity_cache import EntityCache
+
+
+def make_user(user_id):
+    return User(id=user_id, access_hash=user_id * 7)
+
+
+def make_channel(channel_id):
+    return Channel(id=channel_id, title='group', photo=ChatPhotoEmpty(), date=None, access_hash=channel_id * 3,
+                   megagroup=True)
+
+
+def test_dialog_import_keeps_groups_and_skips_users(tmp_path):
+    cache = EntityCache(path=tmp_path / 'entities.json')
+    cache.remember_many([make_user(1), make_channel(2)])
+    assert [record['type'] for record in cache.store.data.values()] == ['channel']
+
+
+def test_expired_users_are_pruned_before_writing(tmp_path):
+    path = tmp_path / 'entities.json'
+
+    async def run():
+        cache = EntityCache(path=path, ttl=60, flush_interval=0.01)
+        cache.remember(make_user(1))
+        cache.remember(make_user(2))
+        cache.remember(make_channel(3))
+        for record in cache.store.data.values():
+            if record['id'] in (1, 3):
+                record['updated'] = time.time() - 120  # Expired
+        await cache.close()
+        return cache
+
+    cache = asyncio.run(run())
+    on_disk = json.loads(path.read_text())
+    assert sorted(record['id'] for record in on_disk.values()) == [2, 3]  # Stale groups are kept
+    assert cache.stats()['pruned'] == 1
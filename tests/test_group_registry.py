@@ -0,0 +1,86 @@
+import asyncio
+import json
+import os
+
+from telethon import utils
+from telethon.tl.types import Channel, ChatPhotoEmpty
+
+from managers.group_registry import GroupRegistry
+
+CONFIG_GROUP = -1001
+
+
+def key(channel_id):
+    return str(utils.get_peer_id(megagroup(channel_id)))
+
+
+def megagroup(channel_id):
+    return Channel(id=channel_id, title=f'group {channel_id}', photo=ChatPhotoEmpty(), date=None,
+                   access_hash=channel_id, megagroup=True)
+
+
+def hand_edit(path, edit):
+    data = json.loads(path.read_text())
+    edit(data['groups'])
+    path.write_text(json.dumps(data))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))  # In-place edit on a coarse-mtime filesystem
+
+
+def make_registry(path, **kwargs):
+    registry = GroupRegistry(path, config_groups=[CONFIG_GROUP], **kwargs)
+    registry.apply_dialogs([megagroup(1002)])  # Baseline sync: known, not monitored
+    return registry
+
+
+def test_hand_edit_survives_a_pending_flush(tmp_path):
+    path = tmp_path / 'groups.json'
+    make_registry(path)
+
+    async def run():
+        registry = GroupRegistry(path, config_groups=[CONFIG_GROUP], flush_interval=60)
+        registry.apply_dialogs([megagroup(1002), megagroup(1003)], auto_monitor=True)  # Pending write
+        hand_edit(path, lambda groups: groups[key(1002)].update(enabled=True))
+        assert registry.reload()  # Not skipped while our own write is pending
+        assert registry.groups[key(1002)]['enabled']
+        hand_edit(path, lambda groups: groups[str(CONFIG_GROUP)].update(title='renamed'))
+        await registry.close()
+
+    asyncio.run(run())
+    groups = json.loads(path.read_text())['groups']
+    assert groups[key(1002)]['enabled']
+    assert groups[key(1003)]['enabled']
+    assert groups[str(CONFIG_GROUP)]['title'] == 'renamed'
+
+
+def test_sync_from_another_process_is_merged_before_writing(tmp_path):
+    path = tmp_path / 'groups.json'
+    make_registry(path)
+
+    async def run():
+        bot = GroupRegistry(path, config_groups=[CONFIG_GROUP], flush_interval=60)
+        bot.apply_dialogs([megagroup(1002), megagroup(1004)])
+        # getgroups.py meanwhile: its own registry, written out before the bot's flush
+        other = GroupRegistry(path, config_groups=[CONFIG_GROUP])
+        other.apply_dialogs([megagroup(1002), megagroup(1005)])
+        await other.close()
+        await bot.close()
+
+    asyncio.run(run())
+    assert set(json.loads(path.read_text())['groups']) == {str(CONFIG_GROUP), key(1002), key(1004), key(1005)}
+
+
+def test_edit_merged_by_a_write_is_still_reported_by_reload(tmp_path):
+    path = tmp_path / 'groups.json'
+    make_registry(path)
+
+    async def run():
+        registry = GroupRegistry(path, config_groups=[CONFIG_GROUP], flush_interval=60)
+        registry.apply_dialogs([megagroup(1002), megagroup(1003)])  # Pending write
+        hand_edit(path, lambda groups: groups[key(1002)].update(enabled=True))
+        await registry.store.flush()  # The write merges the edit before reload() sees it
+        assert registry.reload()
+        assert not registry.reload()
+        await registry.close()
+
+    asyncio.run(run())
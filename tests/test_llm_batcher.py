@@ -0,0 +1,45 @@
+import asyncio
+
+import classifier.llm_classifier as llm_classifier
+from benchmarks.llm_stubs import stub_batch_verdicts
+from classifier.llm_classifier import LLMBatcher
+
+
+class RecordingRouter:
+    def __init__(self):
+        self.batches = []
+
+    async def classify(self, messages):
+        self.batches.append(list(messages))
+        return 'stub', stub_batch_verdicts(messages)
+
+
+def run_batch(monkeypatch, batcher, calls):
+    router = RecordingRouter()
+    monkeypatch.setattr(llm_classifier, 'batch_router', router)
+
+    async def run():
+        start = asyncio.get_running_loop().time()
+        results = await asyncio.gather(*(batcher.classify(message, flush=flush) for message, flush in calls))
+        return results, asyncio.get_running_loop().time() - start
+
+    results, elapsed = asyncio.run(run())
+    return router.batches, results, elapsed
+
+
+def test_batch_is_sent_once_every_worker_is_waiting(monkeypatch):
+    # 8-message batches but only 3 workers: the third caller sends it, not the 10s timer
+    batcher = LLMBatcher(max_batch=8, max_delay=10, max_waiting=3)
+    calls = [(f"hiring assistant {i}", False) for i in range(3)]
+    batches, results, elapsed = run_batch(monkeypatch, batcher, calls)
+    assert batches == [[message for message, _ in calls]]
+    assert all(provider == 'stub' and verdict['label'] for provider, verdict in results)
+    assert elapsed < 1
+
+
+def test_empty_queue_flushes_the_pending_batch(monkeypatch):
+    batcher = LLMBatcher(max_batch=8, max_delay=10, max_waiting=8)
+    calls = [("looking for a designer", False), ("need a va today", True)]
+    batches, _, elapsed = run_batch(monkeypatch, batcher, calls)
+    assert batches == [["looking for a designer", "need a va today"]]
+    assert elapsed < 1
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+
+import classifier.llm_classifier as llm_classifier
+from benchmarks.llm_stubs import StubServer
+from classifier.llm_classifier import openrouter_provider, is_valid_verdict
+from classifier.llm_router import LLMRouter
+
+
+@pytest.fixture
+def server(monkeypatch):
+    # Stub OpenRouter per model: (latency seconds, fail every n-th call or 0); edited live by the tests
+    server = StubServer({}).start()
+    monkeypatch.setattr(llm_classifier, 'OPENROUTER_URL', server.url)
+    yield server
+    server.shutdown()
+
+
+def make_router(models, **options):
+    return LLMRouter({model: openrouter_provider(model) for model in models}, validate=is_valid_verdict, timeout=5,
+                     **options)
+
+
+def run(router, messages):
+    async def classify_all():
+        try:
+            return [await router.classify(message) for message in messages]
+        finally:
+            await llm_classifier.close_llm_clients()
+    return asyncio.run(classify_all())
+
+
+def test_falls_back_to_the_next_provider(server):
+    server.models.update({"stub/down": (0, 1), "stub/up": (0.01, 0)})
+    router = make_router(["stub/down", "stub/up"], hedge=False)
+    [(provider, verdict)] = run(router, ["we are hiring an assistant"])
+    assert provider == "stub/up" and verdict["label"] in llm_classifier.VALID_LABELS
+    assert server.calls == {"stub/down": 1, "stub/up": 1}
+
+
+def test_circuit_opens_and_closes_after_a_half_open_trial(server):
+    server.models.update({"stub/a": (0, 1), "stub/b": (0.01, 0)})
+    router = make_router(["stub/a", "stub/b"], hedge=False, failure_threshold=1, cooldown=0.3)
+    results = run(router, [f"message {i}" for i in range(4)])
+    assert [provider for provider, _ in results] == ["stub/b"] * 4
+    assert server.calls["stub/a"] == 1  # Skipped while open
+    assert router.stats()['providers']["stub/a"]['circuit'] == 'open'
+
+    time.sleep(0.35)
+    assert router.stats()['providers']["stub/a"]['circuit'] == 'half-open'
+    server.models.update({"stub/a": (0, 0), "stub/b": (0, 1)})  # a recovers, b starts failing
+    [(provider, _)] = run(router, ["trial"])
+    assert provider == "stub/a"
+    assert router.stats()['providers']["stub/a"]['circuit'] == 'closed'
+
+
+def test_hedges_a_slow_provider_with_the_runner_up(server):
+    server.models.update({"stub/usual": (0.01, 0), "stub/backup": (0.2, 0)})
+    router = make_router(["stub/usual", "stub/backup"], hedge=False, min_hedge_samples=3)
+    warmup = run(router, [f"warm {i}" for i in range(6)])  # Both explored, then the fast one wins
+    assert [provider for provider, _ in warmup[2:]] == ["stub/usual"] * 4
+
+    router.hedge = True
+
+    server.models["stub/usual"] = (1.0, 0)  # Suddenly far past its p95
+    start = time.monotonic()
+    [(provider, verdict)] = run(router, ["slow one"])
+    assert provider == "stub/backup" and verdict is not None
+    assert router.hedged_requests == 1
+    assert time.monotonic() - start < 0.9
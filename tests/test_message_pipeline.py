@@ -0,0 +1,175 @@
+import asyncio
+
+from classifier.near_duplicates import NearDuplicateIndex
+from constants.keywords import barred_keywords
+from pipeline.message_pipeline import MessageJob, MessagePipeline, high_water_key
+
+GROUP = '-100'
+MARK = high_water_key(GROUP)
+
+
+class FakeContacts:
+    def __init__(self):
+        self.messaged = set()
+
+    def is_known(self, user_id):
+        return user_id in self.messaged
+
+    def try_claim(self, user_id):
+        return user_id not in self.messaged
+
+    def release(self, user_id):
+        pass
+
+    def add_messaged_user(self, user_id):
+        self.messaged.add(user_id)
+
+    async def get_or_cache_user(self, client, user_id, sender=None):
+        return None
+
+
+class FakeEntities:
+    def remember(self, entity):
+        pass
+
+    async def get_input_peer(self, peer):
+        return peer
+
+
+class GatedSender:
+    # send() waits until the test opens the gate, like a DM stuck behind a human-like delay
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.sent = []
+
+    async def send(self, peer, text, **kwargs):
+        await self.gate.wait()
+        self.sent.append(peer)
+
+
+def job(message_id, text, sender_id=None):
+    return MessageJob(chat_id=int(GROUP), group_key=GROUP, message_id=message_id, sender_id=sender_id or message_id,
+                      sender=None, text=text)
+
+
+def make_pipeline(last_read, responses, near_duplicates=None):
+    pipeline = MessagePipeline(None, GatedSender(), FakeEntities(), FakeContacts(), last_read, classify_workers=2,
+                               dm_delay=(0, 0), notice_delay=(0, 0), near_duplicates=near_duplicates)
+
+    async def classify(job):
+        return responses.get(job.message_id)
+
+    pipeline.classify = classify
+    return pipeline
+
+
+def test_mark_waits_for_queued_messages_and_unsent_dms():
+    async def run():
+        last_read = {}
+        pipeline = make_pipeline(last_read, {100: "Hi! I saw your job post."})
+        await pipeline.submit(job(100, "hello, anyone around today"))  # Queued, workers not started yet
+        await pipeline.submit(job(101, f"cheap {barred_keywords[0]} here"))  # Rejected at once
+        assert last_read[MARK] == 99  # Not 101: a crash now must still replay message 100
+
+        pipeline.start()
+        await pipeline.join()
+        await asyncio.sleep(0.01)
+        assert pipeline.counters['confirmed'] == 1
+        assert last_read[MARK] == 99  # Confirmed employer, DM not sent yet
+
+        pipeline.send_scheduler.gate.set()
+        await asyncio.sleep(0.01)
+        assert pipeline.send_scheduler.sent[0] == 100
+        assert last_read[MARK] == 101
+        await pipeline.stop()
+
+    asyncio.run(run())
+
+
+def test_fast_job_does_not_jump_a_slow_one():
+    async def run():
+        last_read = {}
+        pipeline = make_pipeline(last_read, {})
+        slow = asyncio.Event()
+
+        async def classify(job):
+            if job.message_id == 5:
+                await slow.wait()  # e.g. waiting on the LLM
+            return None
+
+        pipeline.classify = classify
+        pipeline.start()
+        await pipeline.submit(job(5, "first message"))
+        await pipeline.submit(job(6, "second message"))
+        await asyncio.sleep(0.01)
+        assert last_read[MARK] == 4
+
+        slow.set()
+        await pipeline.join()
+        assert last_read[MARK] == 6
+        await pipeline.stop()
+
+    asyncio.run(run())
+
+
+AD = "we are hiring a remote virtual assistant with good english for four hours daily, salary paid weekly"
+
+
+def test_near_duplicate_copies_hold_the_mark_until_settled():
+    async def run():
+        last_read = {}
+        pipeline = make_pipeline(last_read, {}, near_duplicates=NearDuplicateIndex(min_tokens=1))
+        original = asyncio.Event()
+
+        async def classify(job):
+            if job.message_id == 10:
+                await original.wait()
+            return None
+
+        pipeline.classify = classify
+        pipeline.start()
+        await pipeline.submit(job(10, AD))
+        await pipeline.submit(job(11, AD + " 🔥"))  # Parked until the original is decided
+        await asyncio.sleep(0.01)
+        assert MARK not in last_read  # Nothing is done yet
+
+        original.set()
+        await pipeline.join()
+        assert pipeline.counters['near_duplicate'] == 1
+        assert last_read[MARK] == 11
+        await pipeline.stop()
+
+    asyncio.run(run())
+
+
+def test_copy_sent_back_to_classification_holds_the_mark():
+    async def run():
+        last_read = {}
+        # Loose index: the copy matches, but its words differ, so the employer DM isn't reused
+        index = NearDuplicateIndex(max_distance=20, min_tokens=1, min_jaccard=0.5)
+        pipeline = make_pipeline(last_read, {10: "Hi!"}, near_duplicates=index)
+        pipeline.send_scheduler.gate.set()
+        copy_classified = asyncio.Event()
+        classified = []
+
+        async def classify(job):
+            classified.append(job.message_id)
+            if job.message_id == 11:
+                await copy_classified.wait()
+            return "Hi!" if job.message_id == 10 else None
+
+        pipeline.classify = classify
+        pipeline.start()
+        await pipeline.submit(job(10, AD))
+        await asyncio.sleep(0.01)
+        await pipeline.submit(job(11, AD.replace("weekly", "monthly"), sender_id=99))
+        await asyncio.sleep(0.01)
+        assert classified == [10, 11]
+        assert last_read[MARK] == 10
+
+        copy_classified.set()
+        await pipeline.join()
+        assert last_read[MARK] == 11
+        await pipeline.stop()
+
+    asyncio.run(run())
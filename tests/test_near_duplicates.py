@@ -0,0 +1,69 @@
+import asyncio
+
+from classifier.near_duplicates import NearDuplicateIndex, simhash, simhash_tokens
+from constants.keywords import NEAR_DUP_DISTANCE, NEAR_DUP_MIN_TOKENS, NEAR_DUP_MIN_JACCARD
+from pipeline.message_pipeline import MessageJob, MessagePipeline
+
+JOB_POST = "what time zone is this role in\n\n#hiring"
+CHATTER = "what time zone is this role in"
+AD = ("We are hiring a remote virtual assistant! Requirements: good English, 4 hours daily. "
+      "Salary weekly. DM @recruiter_one to apply https://t.me/jobs_one")
+AD_REPOST = ("We are hiring a remote virtual assistant! Requirements: good English, 6 hours daily. "
+             "Salary weekly. DM @someone_else to apply https://t.me/other_channel 🔥")
+
+
+def production_index(**overrides):
+    options = dict(max_distance=NEAR_DUP_DISTANCE, min_tokens=NEAR_DUP_MIN_TOKENS, min_jaccard=NEAR_DUP_MIN_JACCARD)
+    options.update(overrides)
+    return NearDuplicateIndex(**options)
+
+
+def job(text, message_id=1):
+    return MessageJob(chat_id=-100, group_key='-100', message_id=message_id, sender_id=message_id, sender=None,
+                      text=text)
+
+
+def test_simhash_is_stable_across_processes():
+    # Pinned value: hash() salting used to change matches on every restart
+    assert simhash(simhash_tokens(AD)) == simhash(simhash_tokens(AD))
+    assert simhash(['a', 'b']) == 0x2D4B2749A1DE7280
+
+
+def test_chatter_is_not_a_copy_of_the_job_post():
+    index = production_index()
+    assert index.fingerprint(CHATTER) is None  # Too short to fingerprint
+
+    # Even when short messages are fingerprinted, one extra deciding word is not a copy
+    index = production_index(min_tokens=1)
+    index.add(*index.fingerprint(JOB_POST))
+    assert index.lookup(*index.fingerprint(CHATTER)) is None
+
+
+def test_repost_with_other_links_handles_and_numbers_matches():
+    index = production_index()
+    entry = index.add(*index.fingerprint(AD))
+    fingerprint, tokens = index.fingerprint(AD_REPOST)
+    assert index.lookup(fingerprint, tokens) is entry
+    assert tokens == entry.tokens
+
+
+def test_employer_dm_is_only_inherited_by_exact_copies():
+    async def run():
+        # Loose index so the chatter line matches the job post; the pipeline must still refuse
+        # to reuse the employer DM and classify the chatter on its own
+        index = production_index(max_distance=15, min_tokens=1, min_jaccard=0.5)
+        pipeline = MessagePipeline(None, None, None, None, {}, near_duplicates=index)
+        original, copy = job(JOB_POST, 1), job(CHATTER, 2)
+
+        assert not pipeline._check_near_duplicate(original)
+        pipeline._settle(original.near_entry, "Hey! I just saw your job posting.")
+        assert not pipeline._check_near_duplicate(copy)
+        assert copy.duplicate_of is original.near_entry
+
+        pipeline._inherit(copy)
+        await asyncio.sleep(0)
+        assert copy.duplicate_of is None
+        assert pipeline.ingest_queue.get_nowait() is copy
+        assert pipeline.counters['confirmed'] == 0
+
+    asyncio.run(run())
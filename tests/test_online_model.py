@@ -0,0 +1,57 @@
+import random
+
+from classifier.online_model import OnlineModel
+
+EMPLOYER = ["hiring a remote assistant, dm me", "we are looking for a designer, paid weekly",
+            "job opening: chat support, apply now"]
+FREELANCER = ["i am a designer available for work", "experienced va looking for clients",
+              "open for commissions, check my portfolio"]
+
+
+def labelled(count, seed=3):
+    rng = random.Random(seed)
+    for _ in range(count):
+        if rng.random() < 0.5:
+            yield f"{rng.choice(EMPLOYER)} {rng.randrange(1000)}", 'employer'
+        else:
+            yield f"{rng.choice(FREELANCER)} {rng.randrange(1000)}", 'freelancer'
+
+
+def truthful(texts):
+    # A static model that already knows the answer: the online one can never beat it
+    return [1.0 if any(text.startswith(post) for post in EMPLOYER) else 0.0 for text in texts]
+
+
+def new_model(tmp_path, baseline):
+    return OnlineModel(path=tmp_path / 'online.pkl', n_features=2 ** 12, min_samples=100, checkpoint_interval=3600,
+                       baseline=baseline, holdout_every=4, min_holdout=30)
+
+
+def test_takes_over_only_after_beating_the_static_model(tmp_path):
+    online = new_model(tmp_path, baseline=lambda texts: [0.5] * len(texts))
+    for text, label in labelled(80):
+        online.learn(text, label)
+    assert not online.ready  # Under min_samples
+
+    for text, label in labelled(400, seed=4):
+        online.learn(text, label)
+    assert online.ready
+    assert online.validation['online_log_loss'] < online.validation['static_log_loss']
+    assert online.stats()['holdout'] == 120  # Every 4th verdict, never trained on
+
+
+def test_static_model_stays_when_it_is_better(tmp_path):
+    online = new_model(tmp_path, baseline=truthful)
+    for text, label in labelled(500):
+        online.learn(text, label)
+    assert online.samples >= 100 and not online.ready
+
+
+def test_validation_is_rerun_on_load(tmp_path):
+    online = new_model(tmp_path, baseline=lambda texts: [0.5] * len(texts))
+    for text, label in labelled(500):
+        online.learn(text, label)
+    online.save()
+
+    assert new_model(tmp_path, baseline=lambda texts: [0.5] * len(texts)).ready
+    assert not new_model(tmp_path, baseline=truthful).ready
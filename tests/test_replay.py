@@ -0,0 +1,53 @@
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+from on_start.get_last_messages import replay_group
+from pipeline.message_pipeline import high_water_key
+
+GROUP = -1001234
+NOW = datetime.datetime.now(datetime.timezone.utc)
+
+
+class FakeClient:
+    def __init__(self, messages):
+        self.messages = messages  # oldest first
+
+    async def get_messages(self, group, limit=None, offset_date=None):
+        return [m for m in self.messages if m.date < offset_date][::-1][:limit]
+
+    async def iter_messages(self, group, min_id=None, offset_date=None, reverse=False, limit=None, wait_time=None):
+        for message in [m for m in self.messages if m.id > min_id][:limit]:
+            yield message
+
+
+class FakePipeline:
+    def __init__(self):
+        self.submitted = []
+
+    async def submit(self, job):
+        self.submitted.append(job.message_id)
+
+
+def history():
+    # Messages 11-15 are a day old, 16-20 from the last hour
+    return [
+        SimpleNamespace(id=i, date=NOW - datetime.timedelta(hours=24 if i <= 15 else 1),
+                        sender_id=100 + i, sender=None, message=f"post {i}")
+        for i in range(11, 21)
+    ]
+
+
+def replay(max_age):
+    pipeline = FakePipeline()
+    last_read = {high_water_key(str(GROUP)): 10}
+    asyncio.run(replay_group(FakeClient(history()), last_read, pipeline, GROUP, my_id=1, max_age=max_age))
+    return pipeline.submitted
+
+
+def test_replay_resumes_after_the_mark():
+    assert replay(max_age=None) == list(range(11, 21))
+
+
+def test_replay_skips_messages_older_than_max_age():
+    assert replay(max_age=6 * 3600) == list(range(16, 21))
@@ -0,0 +1,29 @@
+import json
+
+from managers.checkpoint_manager import CheckpointManager
+from pipeline.sharding import seed_checkpoints
+
+CHANNEL = '-1001234'
+BASIC = '-5678'
+
+
+def test_only_channel_marks_move_between_workers(tmp_path):
+    (tmp_path / 'last_read.a.json').write_text(json.dumps({
+        f"min_id:{CHANNEL}": 900,
+        f"min_id:{BASIC}": 5000,  # Another account's numbering
+        BASIC: "2026-10-01T10:00:00+00:00",
+        f"broadcast_due:{BASIC}": 1700000000.0,
+    }))
+    (tmp_path / 'last_read.b.json').write_text(json.dumps({
+        f"min_id:{CHANNEL}": 700,
+        BASIC: "2026-10-02T09:00:00+00:00",
+    }))
+    last_read = CheckpointManager(tmp_path / 'last_read.c.json')
+    last_read.data[f"min_id:{BASIC}"] = 40  # Our own account's mark is kept as is
+
+    keys = [f"min_id:{CHANNEL}", f"min_id:{BASIC}", BASIC, f"broadcast_due:{BASIC}"]
+    assert seed_checkpoints(last_read, keys, tmp_path / 'last_read*.json') == 3
+    assert last_read[f"min_id:{CHANNEL}"] == 900
+    assert last_read[f"min_id:{BASIC}"] == 40
+    assert last_read[BASIC] == "2026-10-02T09:00:00+00:00"
+    assert last_read[f"broadcast_due:{BASIC}"] == 1700000000.0
@@ -0,0 +1,42 @@
+import asyncio
+import json
+
+from classifier.verdict_cache import VerdictCache
+
+VERDICT = {'label': 'employer', 'reason': 'hiring', 'response': 'Hi!'}
+
+
+def test_puts_are_written_once_per_flush(tmp_path, monkeypatch):
+    path = tmp_path / 'verdicts.json'
+    writes = []
+
+    async def run():
+        cache = VerdictCache(path, flush_interval=0.05)
+        original = cache._write
+        monkeypatch.setattr(cache, '_write', lambda rows: (writes.append(len(rows)), original(rows)))
+        for i in range(50):
+            cache.put(f"message {i}", VERDICT)
+        assert not path.exists()  # Nothing written on the loop by put()
+        await asyncio.sleep(0.1)
+        cache.put("one more", VERDICT)
+        await cache.close()
+
+    asyncio.run(run())
+    assert writes == [50, 51]
+    assert len(json.loads(path.read_text())) == 51
+    assert VerdictCache(path).get("message 7") == VERDICT
+
+
+def test_workers_keep_their_own_file_and_seed_from_the_others(tmp_path):
+    pattern = tmp_path / 'verdicts*.json'
+    first = VerdictCache(tmp_path / 'verdicts.a.json', seed_pattern=pattern)
+    second = VerdictCache(tmp_path / 'verdicts.b.json', seed_pattern=pattern)
+    first.put("seen by a", VERDICT)
+    second.put("seen by b", VERDICT)  # No loop: both write through, neither overwrites the other
+    first.put("seen by both", {'label': 'spam'})
+    second.put("seen by both", {'label': 'employer'})
+
+    restarted = VerdictCache(tmp_path / 'verdicts.a.json', seed_pattern=pattern)
+    assert restarted.get("seen by a") == VERDICT
+    assert restarted.get("seen by b") == VERDICT
+    assert restarted.get("seen by both")['label'] == 'employer'  # Newest verdict wins